@@ -4,6 +4,10 @@
 # 2. Creates a new raw_item_data table with all fields as columns
 # 3. Populates the table with complete data from Lucy JSON files
 # 4. Replaces the old table
+#
+# -Shadow leaves the live database alone instead: import_lucy.py builds and
+# verifies a new copy next to it and publishes it atomically (shadow_db.py),
+# so running YALM2 instances keep looking items up during the rebuild.
 
 param(
     [int]$BatchSize = 2000,
@@ -11,7 +15,8 @@ param(
     [string]$LucyDir = "D:\Lucy",
     [switch]$DryRun,
     [switch]$BackupFirst,
-    [switch]$RescanFields
+    [switch]$RescanFields,
+    [switch]$Shadow
 )
 
 # Import SQLite module
@@ -37,6 +42,15 @@ if (!(Test-Path $LucyDir)) {
     exit 1
 }
 
+if ($Shadow) {
+    Write-Host "SHADOW MODE - Building a verified copy and publishing it atomically" -ForegroundColor Yellow
+    $importer = Join-Path $PSScriptRoot "import_lucy.py"
+    $importArgs = @($importer, "--shadow", "--db", $DbPath, "--lucy", $LucyDir)
+    if ($DryRun) { $importArgs += "--no-publish" }
+    & python @importArgs
+    exit $LASTEXITCODE
+}
+
 # Define cache file for field list
 $cacheDir = Split-Path $DbPath
 $cacheFile = Join-Path $cacheDir "lucy_fields_cache.txt"
@@ -1,36 +1,29 @@
 #!/usr/bin/env python3
-import json
-import os
+from lucy_archive import open_lucy
 
-lucy_dir = r'D:\lucy'
+lucy_dir = r'D:\lucy'  # Lucy directory or packed .lpak archive
 
-# Sample a few Lucy JSON files to see all possible fields
-sample_files = [
-    'lucy_item_1001.json',
-    'lucy_item_10001.json',
-    'lucy_item_50000.json',
-    'lucy_item_100000.json',
-    'lucy_item_121564.json'
-]
+# Sample a few Lucy items to see all possible fields
+sample_ids = [1001, 10001, 50000, 100000, 121564]
 
 all_fields = set()
 field_types = {}
 
-for filename in sample_files:
-    filepath = os.path.join(lucy_dir, filename)
-    if os.path.exists(filepath):
-        with open(filepath) as f:
-            data = json.load(f)
-            all_fields.update(data.keys())
-            print(f'\nFields in {filename}:')
-            for key in sorted(data.keys()):
-                value = data[key]
-                val_type = type(value).__name__
-                if val_type not in field_types:
-                    field_types[val_type] = []
-                if key not in field_types[val_type]:
-                    field_types[val_type].append(key)
-                print(f'  {key}: {val_type} = {repr(value)[:70]}')
+lucy = open_lucy(lucy_dir)
+for item_id in sample_ids:
+    data = lucy.get(item_id)
+    if data is not None:
+        all_fields.update(data.keys())
+        print(f'\nFields in lucy_item_{item_id}.json:')
+        for key in sorted(data.keys()):
+            value = data[key]
+            val_type = type(value).__name__
+            if val_type not in field_types:
+                field_types[val_type] = []
+            if key not in field_types[val_type]:
+                field_types[val_type].append(key)
+            print(f'  {key}: {val_type} = {repr(value)[:70]}')
+lucy.close()
 
 print(f'\n\n=== SUMMARY ===')
 print(f'All unique fields found across samples: {sorted(all_fields)}')
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""Structural parser and rewriter for config/armor_sets.lua
+
+Tokenizes the file once and parses the ARMOR_PROGRESSION, armor_sets and
+sod_essences table constructors into a model that keeps the source offset
+of every key and value. Edits (tier remaps, field changes) are recorded as
+text replacements and applied in a single pass, so comments, spacing, key
+order and line endings are left exactly as they were. Only real `tier`
+fields are touched - never comments or other numbers.
+
+Before writing, the new text is parsed again and checked: same tables,
+same entries and same number of tier fields.
+
+Usage:
+    python armor_config.py --tiers
+    python armor_config.py --remap 1:6 2:7 3:8 --dry-run
+    python armor_config.py --set "Scaled Head" tier 29 --dry-run
+    python armor_config.py --remap 17:22 18:23 --yes
+"""
+
+import os
+import re
+import sys
+import difflib
+import argparse
+from collections import Counter
+
+CONFIG_PATH = r'C:\MQ2\lua\yalm2\config\armor_sets.lua'
+
+# Top-level `local NAME = {...}` tables the model loads; sod_essences is
+# merged into armor_sets at runtime
+TABLE_NAMES = ['ARMOR_PROGRESSION', 'armor_sets', 'sod_essences']
+SET_TABLES = ['armor_sets', 'sod_essences']
+
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>--\[(?P<clevel>=*)\[.*?\](?P=clevel)\]|--[^\r\n]*)
+  | (?P<string>"(?:\\.|[^"\\\r\n])*"|'(?:\\.|[^'\\\r\n])*'|\[(?P<slevel>=*)\[.*?\](?P=slevel)\])
+  | (?P<number>0[xX][0-9a-fA-F]+|\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>\.\.\.|\.\.|==|~=|<=|>=|[-+*/%^#<>=(){}\[\];:,.])
+''', re.S | re.X)
+
+class LuaSyntaxError(ValueError):
+    pass
+
+class Token:
+    __slots__ = ('kind', 'text', 'start', 'end')
+
+    def __init__(self, kind, text, start, end):
+        self.kind, self.text, self.start, self.end = kind, text, start, end
+
+def tokenize(text):
+    """Significant tokens (whitespace and comments dropped, offsets kept)"""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match:
+            line = text.count('\n', 0, pos) + 1
+            raise LuaSyntaxError(f"Unexpected character {text[pos]!r} on line {line}")
+        kind = match.lastgroup
+        if kind in ('clevel', 'slevel'):
+            kind = 'comment' if match.group('comment') else 'string'
+        if kind not in ('ws', 'comment'):
+            tokens.append(Token(kind, match.group(), match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+def lua_string_value(literal):
+    if literal.startswith('['):
+        body = literal[literal.index('[', 1) + 1:literal.rindex(']', 0, -1)]
+        return body[1:] if body.startswith('\n') else body
+    body = literal[1:-1]
+    return re.sub(r'\\(.)', lambda m: {'n': '\n', 't': '\t', 'r': '\r'}.get(m.group(1), m.group(1)), body)
+
+def lua_literal(value, quote="'"):
+    """Python value -> Lua source"""
+    if value is None:
+        return 'nil'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '{ ' + ', '.join(lua_literal(v, quote) for v in value) + ' }'
+    escaped = str(value).replace('\\', '\\\\').replace(quote, '\\' + quote).replace('\n', '\\n')
+    return f'{quote}{escaped}{quote}'
+
+# --- Model ---------------------------------------------------------------
+
+class LuaValue:
+    """Scalar or unparsed expression with its source span"""
+
+    def __init__(self, kind, value, start, end):
+        self.kind, self.value, self.start, self.end = kind, value, start, end
+
+    def to_python(self):
+        return self.value
+
+class LuaField:
+    def __init__(self, key, value, start, comma_end):
+        self.key = key            # str/number for keyed fields, None for list items
+        self.value = value        # LuaValue or LuaTable
+        self.start = start        # offset of the field's first token
+        self.comma_end = comma_end  # offset after the trailing separator, or value.end
+
+class LuaTable:
+    kind = 'table'
+
+    def __init__(self, start):
+        self.start = start
+        self.end = None
+        self.fields = []
+
+    def __contains__(self, key):
+        return any(f.key == key for f in self.fields)
+
+    def field(self, key):
+        for f in self.fields:
+            if f.key == key:
+                return f
+        return None
+
+    def get(self, key, default=None):
+        f = self.field(key)
+        return f.value if f else default
+
+    def keys(self):
+        return [f.key for f in self.fields if f.key is not None]
+
+    def items(self):
+        return [(f.key, f.value) for f in self.fields if f.key is not None]
+
+    def to_python(self):
+        """Keyed tables -> dict, pure lists -> list"""
+        if self.fields and all(f.key is None for f in self.fields):
+            return [f.value.to_python() for f in self.fields]
+        result = {}
+        for i, f in enumerate(self.fields, 1):
+            result[f.key if f.key is not None else i] = f.value.to_python()
+        return result
+
+class Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise LuaSyntaxError('Unexpected end of file')
+        self.pos += 1
+        return token
+
+    def expect(self, text):
+        token = self.next()
+        if token.text != text:
+            line = self.text.count('\n', 0, token.start) + 1
+            raise LuaSyntaxError(f"Expected '{text}' but found '{token.text}' on line {line}")
+        return token
+
+    def top_level_tables(self, names):
+        """{name: LuaTable} for each `local NAME = {` in names"""
+        tables = {}
+        while self.pos < len(self.tokens):
+            a, b, c, d = (self.peek(i) for i in range(4))
+            if (a and a.text == 'local' and b and b.kind == 'name' and b.text in names
+                    and c and c.text == '=' and d and d.text == '{'):
+                self.pos += 3
+                tables[b.text] = self.table()
+            else:
+                self.pos += 1
+        return tables
+
+    def table(self):
+        table = LuaTable(self.expect('{').start)
+        while True:
+            token = self.peek()
+            if token is None:
+                raise LuaSyntaxError('Unterminated table')
+            if token.text == '}':
+                table.end = self.next().end
+                return table
+            start = token.start
+            key = None
+            if token.text == '[':
+                self.next()
+                key_value = self.value()
+                key = key_value.value
+                self.expect(']')
+                self.expect('=')
+            elif token.kind == 'name' and self.peek(1) and self.peek(1).text == '=':
+                key = self.next().text
+                self.next()
+            value = self.value()
+            comma_end = value.end
+            sep = self.peek()
+            if sep and sep.text in (',', ';'):
+                comma_end = self.next().end
+            elif not sep or sep.text != '}':
+                line = self.text.count('\n', 0, sep.start if sep else len(self.text)) + 1
+                raise LuaSyntaxError(f"Expected ',' or '}}' on line {line}")
+            table.fields.append(LuaField(key, value, start, comma_end))
+
+    def value(self):
+        token = self.peek()
+        if token.text == '{':
+            return self.table()
+        if token.kind == 'string':
+            self.next()
+            return LuaValue('string', lua_string_value(token.text), token.start, token.end)
+        if token.kind == 'number' or (token.text == '-' and self.peek(1) and self.peek(1).kind == 'number'):
+            start = token.start
+            text = self.next().text
+            if text == '-':
+                text += self.next().text
+            end = self.tokens[self.pos - 1].end
+            if self.peek() and self.peek().text not in (',', ';', '}', ']'):
+                return self.expression(start)
+            number = float(text) if any(c in text for c in '.eE') and not text.lower().startswith(('0x', '-0x')) else int(text, 0)
+            return LuaValue('number', number, start, end)
+        if token.text in ('nil', 'true', 'false') and self.peek(1) and self.peek(1).text in (',', ';', '}', ']'):
+            self.next()
+            return LuaValue('nil' if token.text == 'nil' else 'bool', {'nil': None, 'true': True, 'false': False}[token.text],
+                            token.start, token.end)
+        return self.expression(token.start)
+
+    def expression(self, start):
+        """Anything else (function calls, references): kept as raw source"""
+        depth = 0
+        end = start
+        while True:
+            token = self.peek()
+            if token is None:
+                raise LuaSyntaxError('Unterminated expression')
+            if depth == 0 and token.text in (',', ';', '}', ']'):
+                break
+            if token.text in ('{', '(', '['):
+                depth += 1
+            elif token.text in ('}', ')', ']'):
+                depth -= 1
+            end = self.next().end
+        return LuaValue('expr', self.text[start:end], start, end)
+
+class ArmorConfig:
+    """Parsed armor_sets.lua with single-pass edits"""
+
+    def __init__(self, path=CONFIG_PATH, text=None):
+        self.path = path
+        if text is None:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        self.text = text
+        self.newline = '\r\n' if '\r\n' in text else '\n'
+        self.tables = Parser(text).top_level_tables(TABLE_NAMES)
+        missing = [name for name in ('ARMOR_PROGRESSION', 'armor_sets') if name not in self.tables]
+        if missing:
+            raise LuaSyntaxError(f"Tables not found: {', '.join(missing)}")
+        self.edits = {}
+
+    @property
+    def progression(self):
+        return self.tables['ARMOR_PROGRESSION']
+
+    def armor_sets(self):
+        """[(set name, LuaTable)] as the runtime sees armor_sets (sod_essences merged)"""
+        sets = {}
+        for name in SET_TABLES:
+            if name in self.tables:
+                for key, entry in self.tables[name].items():
+                    sets[key] = entry
+        return list(sets.items())
+
+    def entries(self, table_names=TABLE_NAMES):
+        """(table name, entry name, entry) for every table-valued entry"""
+        for table_name in table_names:
+            table = self.tables.get(table_name)
+            if table is None:
+                continue
+            for key, entry in table.items():
+                if entry.kind == 'table':
+                    yield table_name, key, entry
+
+    def find_entry(self, name, table_names=TABLE_NAMES):
+        found = [(t, entry) for t, key, entry in self.entries(table_names) if key == name]
+        if not found:
+            raise KeyError(f"No entry named '{name}'")
+        return found
+
+    def tier_counts(self, table_names=TABLE_NAMES):
+        counts = Counter()
+        for _, _, entry in self.entries(table_names):
+            tier = entry.get('tier')
+            if tier is not None and tier.kind == 'number':
+                counts[tier.value] += 1
+        return counts
+
+    # --- Edits -----------------------------------------------------------
+
+    def _replace(self, start, end, new_text):
+        for (s, e) in self.edits:
+            if start < e and s < end or (start == end == s == e):
+                raise ValueError(f"Overlapping edits at offset {start}")
+        self.edits[(start, end)] = new_text
+
+    def remap_tiers(self, mapping, table_names=TABLE_NAMES):
+        """Apply {old tier: new tier} to every tier field at once; returns the count"""
+        changed = 0
+        for _, _, entry in self.entries(table_names):
+            tier = entry.get('tier')
+            if tier is not None and tier.kind == 'number' and tier.value in mapping:
+                if mapping[tier.value] != tier.value:
+                    self._replace(tier.start, tier.end, str(mapping[tier.value]))
+                    changed += 1
+        return changed
+
+    def set_field(self, entry_name, field, value, table_names=TABLE_NAMES):
+        """Set field = value on an entry (replacing or adding the field)"""
+        for _, entry in self.find_entry(entry_name, table_names):
+            existing = entry.field(field)
+            if existing is not None:
+                quote = '"' if self.text[existing.value.start] == '"' else "'"
+                self._replace(existing.value.start, existing.value.end, lua_literal(value, quote))
+            else:
+                self._insert_field(entry, field, value)
+
+    def _insert_field(self, entry, field, value):
+        key = field if re.match(r'^[A-Za-z_]\w*$', str(field)) else f'[{lua_literal(field)}]'
+        assignment = f'{key} = {lua_literal(value)}'
+        single_line = '\n' not in self.text[entry.start:entry.end]
+        if not entry.fields:
+            self._replace(entry.start + 1, entry.start + 1, f' {assignment} ')
+            return
+        last = entry.fields[-1]
+        if single_line:
+            self._replace(last.value.end, last.value.end, f', {assignment}')
+            return
+        comma = '' if last.comma_end > last.value.end else ','
+        line_start = self.text.rfind('\n', 0, last.start) + 1
+        indent = self.text[line_start:last.start]
+        self._replace(last.comma_end, last.comma_end, f'{comma}{self.newline}{indent}{assignment},')
+
+    def render(self):
+        """New text with every edit applied in one pass"""
+        parts = []
+        pos = 0
+        for (start, end), new_text in sorted(self.edits.items()):
+            parts.append(self.text[pos:start])
+            parts.append(new_text)
+            pos = end
+        parts.append(self.text[pos:])
+        return ''.join(parts)
+
+    def diff(self):
+        new_text = self.render()
+        name = os.path.basename(self.path or 'armor_sets.lua')
+        return ''.join(difflib.unified_diff(
+            self.text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+            fromfile=f'a/{name}', tofile=f'b/{name}'))
+
+    def verify(self, new_text=None):
+        """Re-parse the edited text; returns the parsed result or raises"""
+        new = ArmorConfig(self.path, self.render() if new_text is None else new_text)
+        for name, table in self.tables.items():
+            if name not in new.tables or new.tables[name].keys() != table.keys():
+                raise LuaSyntaxError(f"Entries of {name} changed")
+        if sum(new.tier_counts().values()) < sum(self.tier_counts().values()):
+            raise LuaSyntaxError('Tier fields were lost')
+        return new
+
+    def save(self, backup=True):
+        """Verify, back up the original and atomically write the new text"""
+        new_text = self.render()
+        self.verify(new_text)
+        if backup:
+            with open(self.path + '.backup', 'w', encoding='utf-8', newline='') as f:
+                f.write(self.text)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(new_text)
+        os.replace(tmp_path, self.path)
+        self.text = new_text
+        self.tables = Parser(new_text).top_level_tables(TABLE_NAMES)
+        self.edits = {}
+
+def parse_value(text):
+    """CLI value -> Python value (numbers, nil/true/false, otherwise string)"""
+    if text in ('nil', 'true', 'false'):
+        return {'nil': None, 'true': True, 'false': False}[text]
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+def print_tier_counts(counts, label):
+    print(f"{label}:")
+    for tier in sorted(counts):
+        print(f"  tier = {tier:2d}: {counts[tier]:3d} entries")
+    print(f"  TOTAL: {sum(counts.values())} tier fields")
+
+def apply_tier_map(tier_map, path=CONFIG_PATH, dry_run=False, confirm=True):
+    """Remap tiers in one pass with before/after report, diff on dry run"""
+    config = ArmorConfig(path)
+    before = config.tier_counts()
+    changed = config.remap_tiers(tier_map)
+    after = config.verify().tier_counts()
+    print_tier_counts(before, 'BEFORE')
+    print_tier_counts(after, 'AFTER')
+    print(f"\n{changed} tier fields remapped")
+    if dry_run:
+        print(config.diff())
+        return changed
+    if changed and confirm:
+        response = input(f"\nApply {changed} tier changes to {path}? (y/n): ").strip().lower()
+        if response != 'y':
+            print("Cancelled - no changes made")
+            return 0
+    if changed:
+        config.save()
+        print(f"Updated {path} (backup: {path}.backup)")
+    return changed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect and edit config/armor_sets.lua in one pass')
+    parser.add_argument('--file', default=CONFIG_PATH, help='armor_sets.lua path')
+    parser.add_argument('--tiers', action='store_true', help='Print the tier distribution')
+    parser.add_argument('--remap', nargs='+', metavar='OLD:NEW', help='Tier remap pairs')
+    parser.add_argument('--set', nargs=3, action='append', metavar=('ENTRY', 'FIELD', 'VALUE'),
+                        help='Set a field on a progression/set entry (repeatable)')
+    parser.add_argument('--dry-run', action='store_true', help='Print a unified diff, do not write')
+    parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+    args = parser.parse_args()
+
+    config = ArmorConfig(args.file)
+    if args.tiers or not (args.remap or args.set):
+        print_tier_counts(config.tier_counts(), 'Tier distribution')
+        print(f"  Progression entries: {len(config.progression.keys())}, armor sets: {len(config.armor_sets())}")
+        sys.exit(0)
+
+    if args.remap:
+        tier_map = {int(old): int(new) for old, new in (pair.split(':') for pair in args.remap)}
+        print(f"Remapped {config.remap_tiers(tier_map)} tier fields")
+    for entry_name, field, value in args.set or []:
+        config.set_field(entry_name, field, parse_value(value))
+    config.verify()
+
+    if args.dry_run:
+        print(config.diff() or 'No changes')
+    elif config.edits:
+        if not args.yes and input(f"Apply {len(config.edits)} edits to {args.file}? (y/n): ").strip().lower() != 'y':
+            print("Cancelled - no changes made")
+            sys.exit(0)
+        config.save()
+        print(f"Updated {args.file} (backup: {args.file}.backup)")
+    else:
+        print("No changes")
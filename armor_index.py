@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Compile item name -> armor set / piece / tier into armor_item_index
+
+get_armor_item_tier and identify_armor_item (lib/equipment_distribution.lua)
+loop over every ARMOR_PROGRESSION and armor_sets entry with lower():find
+for each item they look at. This does that matching once, offline: every
+name in raw_item_data is streamed through one Aho-Corasick automaton built
+from the set names, remnant names and progression names in
+config/armor_sets.lua (parsed with armor_config.py), and the hits are
+resolved with the same rules as the Lua code:
+
+    set      item name contains the set name and a piece keyword, or
+             contains one of the set's remnant names
+    tier     tier of the ARMOR_PROGRESSION entry the name contains
+
+Where Lua's pairs() order would decide between several matches, the
+longest (most specific) name wins.
+
+Results go to the armor_item_index(item_id, name, set_name, piece, tier)
+table, keyed by name for the runtime lookup, with a checksum of the rules
+in armor_item_index_meta (the runtime ignores the index once the config no
+longer matches it, e.g. after renumber_tiers.py), and to a compact UTF-8 JSON
+export (replacing the UTF-16 tier_map.json files from the PowerShell
+scripts). Sets without a tier and sets/progressions that match no item are
+reported like find_missing_tiers.ps1.
+
+Usage:
+    python armor_index.py [--db PATH] [--config PATH] [--json FILE] [--missing FILE]
+"""
+
+import json
+import time
+import sqlite3
+import argparse
+
+from armor_config import ArmorConfig, CONFIG_PATH
+from linkdb import resolve_db_path
+
+DB_PATH = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
+JSON_PATH = r'C:\MQ2\lua\yalm2\armor_item_index.json'
+MISSING_PATH = r'C:\MQ2\lua\yalm2\missing_tiers.txt'
+
+INDEX_TABLE = 'armor_item_index'
+META_TABLE = 'armor_item_index_meta'
+FETCH_SIZE = 5000
+
+# Piece keywords from identify_armor_item
+PIECE_KEYWORDS = {
+    'Head': ['helm', 'coif', 'cap'],
+    'Arms': ['vambrace', 'sleeves', 'arms'],
+    'Wrist': ['bracer', 'wrist'],
+    'Hands': ['gauntlet', 'gloves', 'hands'],
+    'Chest': ['breastplate', 'tunic', 'robe', 'chest'],
+    'Legs': ['greaves', 'leggings', 'legs', 'trousers', 'pantaloons'],
+    'Feet': ['boots', 'sandals', 'feet'],
+    'Primary': ['axe', 'sword', 'mace', 'club', 'dagger', 'spear', 'staff', 'fists'],
+    'Secondary': ['shield', 'buckler'],
+    'Ranged': ['bow', 'pebble', 'fragment', 'shard'],
+}
+
+class PatternMatcher:
+    """Aho-Corasick automaton over lowercased patterns
+
+    find(text) returns the ids of every pattern occurring in text in one
+    pass over text.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][ch] = nxt
+                node = nxt
+            self.out[node].append(pattern_id)
+
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0) if self.goto[f].get(ch, 0) != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text):
+        hits = set()
+        node = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.update(out[node])
+        return hits
+
+def load_rules(config):
+    """(progressions, sets) from the parsed armor config
+
+    progressions: [(name, tier)]
+    sets: [(set name, tier or None, [(piece, remnant_name or None)])]
+    """
+    progressions = []
+    for name, entry in config.progression.items():
+        tier = entry.get('tier') if entry.kind == 'table' else None
+        progressions.append((name, tier.value if tier is not None and tier.kind == 'number' else None))
+
+    sets = []
+    for name, entry in config.armor_sets():
+        if entry.kind != 'table':
+            continue
+        tier = entry.get('tier')
+        pieces = []
+        pieces_table = entry.get('pieces')
+        if pieces_table is not None and pieces_table.kind == 'table':
+            for piece, piece_entry in pieces_table.items():
+                remnant = piece_entry.get('remnant_name') if piece_entry.kind == 'table' else None
+                pieces.append((piece, remnant.value if remnant is not None and remnant.kind == 'string' else None))
+        sets.append((name, tier.value if tier is not None and tier.kind == 'number' else None, pieces))
+    return progressions, sets
+
+def config_fingerprint(progressions, sets):
+    """Order-independent checksum of the rules (armor_config_fingerprint in Lua computes the same)"""
+    lines = [f"p\t{name}\t{'' if tier is None else int(tier)}" for name, tier in progressions]
+    lines += [f"s\t{name}\t{piece}\t{remnant or ''}" for name, _, pieces in sets for piece, remnant in pieces]
+    total = 0
+    for line in lines:
+        h = 0
+        for byte in line.encode('utf-8'):
+            h = (h * 31 + byte) % 4294967296
+        total = (total + h) % 4294967296
+    return total
+
+class ArmorClassifier:
+    """identify_armor_item / get_armor_item_tier over one automaton"""
+
+    def __init__(self, progressions, sets):
+        self.progressions = progressions
+        self.sets = [s for s in sets if s[2]]
+        patterns = []
+        self.kinds = []
+        for i, (name, _) in enumerate(progressions):
+            patterns.append(name.lower())
+            self.kinds.append(('progression', i, None))
+        for i, (name, _, pieces) in enumerate(self.sets):
+            patterns.append(name.lower())
+            self.kinds.append(('set', i, None))
+            for piece, remnant in pieces:
+                if remnant:
+                    patterns.append(remnant.lower())
+                    self.kinds.append(('remnant', i, piece))
+        self.patterns = patterns
+        self.matcher = PatternMatcher(patterns)
+
+    def classify(self, name):
+        """(set name, piece, tier, match) or None when nothing matches"""
+        lower = name.lower()
+        progression_hits, set_hits, remnant_hits = [], [], []
+        for pattern_id in self.matcher.find(lower):
+            kind, index, piece = self.kinds[pattern_id]
+            length = len(self.patterns[pattern_id])
+            if kind == 'progression':
+                progression_hits.append((length, index))
+            elif kind == 'set':
+                set_hits.append((length, index))
+            else:
+                remnant_hits.append((length, index, piece))
+
+        tier = None
+        if progression_hits:
+            tier = self.progressions[max(progression_hits, key=lambda h: (h[0], -h[1]))[1]][1]
+
+        for _, index in sorted(set_hits, key=lambda h: (-h[0], h[1])):
+            set_name, _, pieces = self.sets[index]
+            for piece, _ in pieces:
+                if any(word in lower for word in PIECE_KEYWORDS.get(piece, ())):
+                    return set_name, piece, tier, 'set'
+        if remnant_hits:
+            _, index, piece = max(remnant_hits, key=lambda h: (h[0], -h[1]))
+            return self.sets[index][0], piece, tier, 'remnant'
+        if tier is not None:
+            return None, None, tier, 'progression'
+        return None
+
+def compile_index(conn, classifier):
+    """Stream raw_item_data names through the classifier -> rows and per-pattern hit counts"""
+    rows = []
+    set_hits = {}
+    cursor = conn.execute("SELECT id, name FROM raw_item_data WHERE name IS NOT NULL AND name != '' ORDER BY id")
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            break
+        for item_id, name in batch:
+            result = classifier.classify(name)
+            if result is None:
+                continue
+            set_name, piece, tier, match = result
+            rows.append((item_id, name, set_name, piece, tier, match))
+            if set_name:
+                set_hits[set_name] = set_hits.get(set_name, 0) + 1
+    return rows, set_hits
+
+def write_index(conn, rows, fingerprint):
+    conn.execute(f'DROP TABLE IF EXISTS {INDEX_TABLE}')
+    conn.execute(f'DROP TABLE IF EXISTS {META_TABLE}')
+    conn.execute(f'''
+        CREATE TABLE {INDEX_TABLE} (
+            item_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            set_name TEXT,
+            piece TEXT,
+            tier INTEGER,
+            match TEXT NOT NULL
+        )''')
+    conn.executemany(f'INSERT INTO {INDEX_TABLE} VALUES (?, ?, ?, ?, ?, ?)', rows)
+    conn.execute(f'CREATE INDEX idx_{INDEX_TABLE}_name ON {INDEX_TABLE}(name)')
+    conn.execute(f'CREATE TABLE {META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+    conn.execute(f"INSERT INTO {META_TABLE} VALUES ('config_fingerprint', ?)", (str(fingerprint),))
+    conn.commit()
+
+def write_json(path, rows):
+    """Compact UTF-8 export: column list plus one array per item"""
+    export = {'columns': ['item_id', 'name', 'set', 'piece', 'tier'],
+              'rows': [[item_id, name, set_name, piece, tier] for item_id, name, set_name, piece, tier, _ in rows]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(export, f, ensure_ascii=False, separators=(',', ':'))
+
+def gap_report(progressions, sets, rows, set_hits):
+    """{'missing_tier', 'unmatched_sets', 'unmatched_progressions', 'tier_gaps'}"""
+    tiers_seen = {tier for _, tier in progressions if tier is not None} | {tier for _, tier, _ in sets if tier is not None}
+    progression_tiers = {row[4] for row in rows if row[4] is not None}
+    return {
+        'missing_tier': sorted({name for name, tier, _ in sets if tier is None}),
+        'unmatched_sets': sorted(name for name, _, pieces in sets if pieces and name not in set_hits),
+        'unmatched_progressions': sorted(name for name, tier in progressions if tier not in progression_tiers),
+        'tier_gaps': sorted(set(range(min(tiers_seen), max(tiers_seen) + 1)) - tiers_seen) if tiers_seen else [],
+    }
+
+def print_report(report):
+    print(f"Missing tier fields: {len(report['missing_tier'])}")
+    print()
+    print("Sets needing tier assignments:")
+    for name in report['missing_tier']:
+        print(f"  {name}")
+    print()
+    print(f"Sets matching no item in raw_item_data: {len(report['unmatched_sets'])}")
+    for name in report['unmatched_sets']:
+        print(f"  {name}")
+    print(f"Progression entries matching no item: {len(report['unmatched_progressions'])}")
+    for name in report['unmatched_progressions']:
+        print(f"  {name}")
+    print(f"Unused tier numbers: {', '.join(map(str, report['tier_gaps'])) or 'none'}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile the armor item index from raw_item_data names')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--config', default=CONFIG_PATH, help='config/armor_sets.lua path')
+    parser.add_argument('--json', default=JSON_PATH, help='Compact JSON export path ("" to skip)')
+    parser.add_argument('--missing', default=MISSING_PATH, help='Sets without a tier, one per line ("" to skip)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    progressions, sets = load_rules(ArmorConfig(args.config))
+    classifier = ArmorClassifier(progressions, sets)
+    print(f"Loaded {len(progressions)} progression entries and {len(sets)} armor sets "
+          f"({len(classifier.patterns)} patterns) in {time.perf_counter() - start:.2f}s")
+
+    conn = sqlite3.connect(resolve_db_path(args.db))
+    scan_start = time.perf_counter()
+    rows, set_hits = compile_index(conn, classifier)
+    print(f"Classified names in {time.perf_counter() - scan_start:.2f}s: {len(rows)} armor items "
+          f"({sum(1 for r in rows if r[2])} in a set, {sum(1 for r in rows if r[4] is not None)} with a tier)")
+    write_index(conn, rows, config_fingerprint(progressions, sets))
+    conn.close()
+    print(f"Wrote {INDEX_TABLE}")
+
+    if args.json:
+        write_json(args.json, rows)
+        print(f"Wrote {args.json}")
+
+    print()
+    report = gap_report(progressions, sets, rows, set_hits)
+    print_report(report)
+    if args.missing:
+        with open(args.missing, 'w', encoding='utf-8') as f:
+            f.write(''.join(f'{name}\n' for name in report['missing_tier']))
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Benchmarks for the LinkDB hot paths
+
+Builds a synthetic Lucy corpus (benchmarks/synthetic.py) per scale in a
+work directory and times:
+
+    import_full         import_lucy.py full rebuild (subprocess)
+    import_incremental  import_lucy.py --incremental after a simulated Lucy refresh
+    lookup_point        LinkDB.get_item, one id at a time
+    lookup_batch        LinkDB.get_items, 500 ids per call
+    stats_cached        LinkDB.get_item_stats with a warm LRU
+    equip_query         equip_index.equippable_items for random class/level/slot
+    name_resolution     item_names.resolve_name over exact, plural and fuzzy names
+    upgrade_scoring     upgrade_scoring.load_stat_arrays + compute_best_in_slot
+
+Each run is appended as one JSON line to the results file and compared with
+the previous run of the same scale, so regressions show up between commits.
+Everything a run writes stays under the work directory (WORK_DIR unless
+--work is given): the per-scale corpus and database (removed afterwards
+unless --keep), results.jsonl and the import run reports.
+
+Usage:
+    python -m benchmarks.run [--scale 10000 100000] [--only lookup_point name_resolution]
+                             [--work DIR] [--results FILE] [--workers N] [--skip-import] [--keep]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import platform
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.synthetic import DEFAULT_SEED, write_lucy_corpus, mutate_corpus, build_linkdb
+from linkdb import LinkDB
+from item_rules import CLASS_NAMES, SLOT_COUNT
+from equip_index import equippable_items
+from item_names import resolve_name
+from upgrade_scoring import load_stat_arrays, compute_best_in_slot
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = os.path.join(tempfile.gettempdir(), 'yalm2_bench')
+
+DEFAULT_SCALES = [10000]
+BENCHMARKS = ['import_full', 'import_incremental', 'lookup_point', 'lookup_batch', 'stats_cached',
+              'equip_query', 'name_resolution', 'upgrade_scoring']
+
+POINT_LOOKUPS = 20000
+BATCH_SIZE = 500
+BATCH_CALLS = 200
+EQUIP_QUERIES = 2000
+NAME_QUERIES = 3000
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def timed_calls(func, args_list):
+    """Run func(*args) for each args; (total seconds, sorted per-call latencies)"""
+    latencies = []
+    start = time.perf_counter()
+    for args in args_list:
+        t = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return total, latencies
+
+def result(name, ops, seconds, latencies=None, **extra):
+    record = {'name': name, 'ops': ops, 'seconds': round(seconds, 6),
+              'ops_per_sec': round(ops / seconds, 1) if seconds else None}
+    if latencies:
+        record['p50_us'] = round(percentile(latencies, 0.50) * 1e6, 1)
+        record['p99_us'] = round(percentile(latencies, 0.99) * 1e6, 1)
+    record.update(extra)
+    return record
+
+def run_import(db_path, lucy_path, workers, report_dir, incremental=False):
+    cmd = [sys.executable, os.path.join(REPO_DIR, 'import_lucy.py'), '--db', db_path, '--lucy', lucy_path,
+           '--workers', str(workers)]
+    if incremental:
+        cmd.append('--incremental')
+    start = time.perf_counter()
+    env = dict(os.environ, YALM2_RUN_REPORTS=report_dir)
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=REPO_DIR, env=env)
+    return time.perf_counter() - start
+
+# --- Benchmarks ----------------------------------------------------------
+
+def bench_import_full(ctx):
+    lucy_dir = os.path.join(ctx['work'], 'lucy')
+    if os.path.exists(lucy_dir):
+        shutil.rmtree(lucy_dir)
+    write_lucy_corpus(lucy_dir, ctx['scale'], ctx['seed'])
+    for name in os.listdir(ctx['work']):
+        if name != 'lucy':
+            os.remove(os.path.join(ctx['work'], name))
+    seconds = run_import(ctx['db'], lucy_dir, ctx['workers'], ctx['reports'])
+    ctx['lucy'] = lucy_dir
+    return result('import_full', ctx['scale'], seconds, workers=ctx['workers'])
+
+def bench_import_incremental(ctx):
+    if 'lucy' not in ctx:
+        return None
+    counts = mutate_corpus(ctx['lucy'], seed=ctx['seed'])
+    seconds = run_import(ctx['db'], ctx['lucy'], ctx['workers'], ctx['reports'], incremental=True)
+    return result('import_incremental', sum(counts.values()), seconds, workers=ctx['workers'], **counts)
+
+def bench_lookup_point(ctx):
+    db = LinkDB(ctx['db'])
+    ids = [(rng_id,) for rng_id in ctx['rng'].choices(ctx['ids'], k=POINT_LOOKUPS)]
+    seconds, latencies = timed_calls(db.get_item, ids)
+    db.close()
+    return result('lookup_point', len(ids), seconds, latencies)
+
+def bench_lookup_batch(ctx):
+    db = LinkDB(ctx['db'])
+    batches = [(ctx['rng'].sample(ctx['ids'], min(BATCH_SIZE, len(ctx['ids']))),) for _ in range(BATCH_CALLS)]
+    seconds, latencies = timed_calls(db.get_items, batches)
+    db.close()
+    return result('lookup_batch', BATCH_CALLS * BATCH_SIZE, seconds, latencies, batch_size=BATCH_SIZE)
+
+def bench_stats_cached(ctx):
+    db = LinkDB(ctx['db'])
+    hot = ctx['rng'].sample(ctx['ids'], min(1000, len(ctx['ids'])))
+    db.get_items_stats(hot)
+    calls = [(item_id,) for item_id in ctx['rng'].choices(hot, k=POINT_LOOKUPS)]
+    seconds, latencies = timed_calls(db.get_item_stats, calls)
+    db.close()
+    return result('stats_cached', len(calls), seconds, latencies, hit_rate=round(
+        db.stats_cache.hits / max(1, db.stats_cache.hits + db.stats_cache.misses), 4))
+
+def bench_equip_query(ctx):
+    db = LinkDB(ctx['db'])
+    rng = ctx['rng']
+    queries = [(db.conn, rng.randrange(SLOT_COUNT), rng.choice(CLASS_NAMES), rng.randrange(1, 126))
+               for _ in range(EQUIP_QUERIES)]
+    seconds, latencies = timed_calls(equippable_items, queries)
+    db.close()
+    return result('equip_query', len(queries), seconds, latencies)
+
+def name_variants(rng, names):
+    """Exact names, lowercased/pluralized names and two-word fuzzy fragments"""
+    queries = []
+    for name in rng.choices(names, k=NAME_QUERIES):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(name)
+        elif kind < 0.7:
+            queries.append(name.lower() + ('' if name.endswith('s') else 's'))
+        else:
+            words = name.split()
+            queries.append(' '.join(reversed(words[-2:])))
+    return queries
+
+def bench_name_resolution(ctx):
+    db = LinkDB(ctx['db'])
+    names = [row[0] for row in db.execute('SELECT name FROM raw_item_data WHERE name IS NOT NULL LIMIT 50000')]
+    queries = [(db.conn, q) for q in name_variants(ctx['rng'], names)]
+    seconds, latencies = timed_calls(resolve_name, queries)
+    db.close()
+    return result('name_resolution', len(queries), seconds, latencies)
+
+def bench_upgrade_scoring(ctx):
+    db = LinkDB(ctx['db'])
+    start = time.perf_counter()
+    ids, stats = load_stat_arrays(db.conn)
+    loaded = time.perf_counter()
+    rows = compute_best_in_slot(ids, stats)
+    scored = time.perf_counter()
+    db.close()
+    return result('upgrade_scoring', len(ids), scored - start, load_seconds=round(loaded - start, 6),
+                  score_seconds=round(scored - loaded, 6), rows=len(rows))
+
+# --- Driver --------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def previous_run(results_path, scale):
+    last = None
+    if os.path.exists(results_path):
+        with open(results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    continue
+                if run.get('scale') == scale:
+                    last = run
+    return last
+
+def print_results(run, previous):
+    before = {r['name']: r for r in previous['results']} if previous else {}
+    print(f"\n=== Scale {run['scale']} ({run['git_commit'] or 'no git'}) ===")
+    print(f"  {'benchmark':20s} {'ops':>8s} {'seconds':>9s} {'ops/sec':>11s} {'p50 us':>9s} {'p99 us':>9s}  vs last")
+    for r in run['results']:
+        change = ''
+        old = before.get(r['name'])
+        if old and old.get('ops_per_sec') and r.get('ops_per_sec'):
+            change = f"{(r['ops_per_sec'] / old['ops_per_sec'] - 1) * 100:+.1f}%"
+        print(f"  {r['name']:20s} {r['ops']:8d} {r['seconds']:9.3f} {r['ops_per_sec'] or 0:11,.0f} "
+              f"{r.get('p50_us', ''):>9} {r.get('p99_us', ''):>9}  {change}")
+
+def run_scale(scale, names, work, reports, workers, seed, skip_import):
+    ctx = {'scale': scale, 'work': work, 'db': os.path.join(work, 'MQ2LinkDB.db'), 'reports': reports,
+           'workers': workers, 'seed': seed, 'rng': random.Random(seed)}
+    results = []
+    if skip_import or 'import_full' not in names:
+        print(f"Generating {scale} item database...")
+        build_linkdb(ctx['db'], scale, seed)
+    for name in names:
+        if name in ('import_full', 'import_incremental') and skip_import:
+            continue
+        if name not in ('import_full', 'import_incremental') and 'ids' not in ctx:
+            with sqlite3.connect(ctx['db']) as conn:
+                ctx['ids'] = [row[0] for row in conn.execute('SELECT id FROM raw_item_data')]
+        print(f"  {name}...")
+        record = globals()[f'bench_{name}'](ctx)
+        if record is not None:
+            results.append(record)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark import, lookup, name resolution and scoring')
+    parser.add_argument('--scale', type=int, nargs='+', default=DEFAULT_SCALES, help='Item counts (10k - 500k)')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='Run only these benchmarks')
+    parser.add_argument('--work', default=WORK_DIR, help='Work directory for corpora, results and run reports')
+    parser.add_argument('--results', help='JSON-lines results file to append to (default <work>/results.jsonl)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Import worker processes')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--skip-import', action='store_true', help='Generate the database directly, skip import timings')
+    parser.add_argument('--keep', action='store_true', help='Keep the per-scale corpus and database')
+    args = parser.parse_args()
+    results_path = args.results or os.path.join(args.work, 'results.jsonl')
+    reports = os.path.join(args.work, 'run_reports')
+
+    names = [name for name in BENCHMARKS if not args.only or name in args.only]
+    for scale in args.scale:
+        work = os.path.join(args.work, f'scale_{scale}')
+        os.makedirs(work, exist_ok=True)
+        try:
+            results = run_scale(scale, names, work, reports, max(1, args.workers), args.seed, args.skip_import)
+        finally:
+            if not args.keep:
+                shutil.rmtree(work, ignore_errors=True)
+
+        run = {
+            'run_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': scale,
+            'seed': args.seed,
+            'results': results,
+        }
+        print_results(run, previous_run(results_path, scale))
+        with open(results_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run) + '\n')
+    print(f"\nResults appended to {results_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Synthetic Lucy corpora and MQ2LinkDB databases for benchmarking
+
+The checked-in MQ2LinkDB.db is a stub, so this generates data at a chosen
+scale with roughly the shape of the real thing: about half the items are
+equipment, armor and jewelry land in their real slot bits, weapons get
+damage/delay (piercers a backstab value), class masks are mostly "all
+classes" or the usual archetype groups, required levels lean towards the
+top end and stats scale with level. Every value is a string, like Lucy.
+
+Generation is deterministic for a given (count, seed).
+
+Usage:
+    python -m benchmarks.synthetic lucy  OUT_DIR  [--items N] [--seed S] [--pack]
+    python -m benchmarks.synthetic db    OUT.db   [--items N] [--seed S]
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+
+from import_lucy import convert_value, create_indexes
+from equip_index import build_equip_index
+from item_names import build_name_index
+from lucy_archive import pack_lucy_dir
+
+DEFAULT_ITEMS = 10000
+DEFAULT_SEED = 1
+
+# (itemtype, weight) - 10 Armor, 29 Jewelry, 0-5 weapons, 8 Shield,
+# 11 Tradeskill, 17 Inventory, 27 Ammo, 14/15 Food/Drink, 20 Spell, 21 Potion
+ITEMTYPE_WEIGHTS = [
+    (10, 34), (29, 9), (0, 3), (1, 2), (2, 3), (3, 3), (4, 2), (5, 2), (8, 2),
+    (11, 18), (17, 9), (27, 2), (14, 3), (15, 2), (20, 4), (21, 2),
+]
+
+ARMOR_SLOTS = [1 << 2, 1 << 3, 1 << 6, 1 << 7, 1 << 8, (1 << 9) | (1 << 10), 1 << 12,
+               1 << 17, 1 << 18, 1 << 19, 1 << 20]
+JEWELRY_SLOTS = [(1 << 1) | (1 << 4), 1 << 5, (1 << 15) | (1 << 16), 1 << 0, 1 << 21]
+WEAPON_SLOTS = {0: (1 << 13) | (1 << 14), 2: (1 << 13) | (1 << 14), 3: (1 << 13) | (1 << 14),
+                1: 1 << 13, 4: 1 << 13, 5: 1 << 11, 8: 1 << 14, 27: 1 << 22}
+
+ALL_CLASSES = 65535
+CLASS_GROUPS = [
+    (1 << 0) | (1 << 2) | (1 << 4),                        # Warrior, Paladin, Shadowknight
+    (1 << 1) | (1 << 5) | (1 << 9),                        # Cleric, Druid, Shaman
+    (1 << 10) | (1 << 11) | (1 << 12) | (1 << 13),         # Necromancer, Wizard, Magician, Enchanter
+    (1 << 3) | (1 << 6) | (1 << 8) | (1 << 15),            # Ranger, Monk, Rogue, Berserker
+    (1 << 7) | (1 << 14),                                  # Bard, Beastlord
+]
+
+ADJECTIVES = ['Ancient', 'Gleaming', 'Darkdream', 'Runed', 'Tattered', 'Blessed', 'Shadowed',
+              'Embossed', 'Frozen', 'Molten', 'Chief', 'Ethereal', 'Recondite', 'Latticed']
+MATERIALS = ['Silk', 'Leather', 'Chain', 'Plate', 'Bone', 'Obsidian', 'Velium', 'Mithril',
+             'Treant', 'Spider', 'Golem', 'Wolf', 'Crystal', 'Dragonscale']
+ARMOR_NOUNS = ['Helm', 'Mask', 'Pauldrons', 'Sleeves', 'Cloak', 'Bracer', 'Gloves', 'Tunic',
+               'Leggings', 'Boots', 'Belt', 'Robe', 'Breastplate']
+JEWELRY_NOUNS = ['Earring', 'Amulet', 'Ring', 'Charm', 'Pendant', 'Band', 'Stud']
+WEAPON_NOUNS = ['Dagger', 'Sword', 'Mace', 'Staff', 'Bow', 'Greatsword', 'Spear', 'Hammer', 'Shield', 'Arrow']
+ITEM_NOUNS = ['Bark', 'Silks', 'Bones', 'Fangs', 'Shard', 'Berries', 'Boxes', 'Pelt', 'Ore',
+              'Essence', 'Scroll', 'Potion', 'Ration', 'Water Flask', 'Gem']
+
+STAT_FIELDS = ['ac', 'hp', 'mana', 'endur', 'mr', 'fr', 'cr', 'pr', 'dr', 'attack', 'regen',
+               'manaregen', 'healamt', 'clairvoyance']
+EXTRA_FIELDS = ['str', 'sta', 'agi', 'dex', 'wis', 'int', 'cha', 'haste', 'augtype', 'augslot1type',
+                'bagslots', 'bagsize', 'icon', 'size', 'price', 'favor', 'light', 'material',
+                'elemdmgtype', 'elemdmgamt', 'range', 'skillmodtype', 'skillmodvalue', 'focuseffect',
+                'clickeffect', 'proceffect', 'worneffect', 'maxcharges', 'recastdelay', 'recasttype']
+UNKNOWN_FIELDS = [f'unk{i:03d}' for i in range(40)]
+
+# Column types of every generated field (Lucy values are all strings)
+FIELD_TYPES = {
+    'name': 'TEXT', 'lore': 'TEXT', 'weight': 'REAL',
+    **{f: 'INTEGER' for f in STAT_FIELDS},
+    **{f: 'INTEGER' for f in ['reqlevel', 'reclevel', 'classes', 'races', 'slots', 'itemtype',
+                              'damage', 'delay', 'backstabdmg', 'questitem', 'nodrop', 'norent',
+                              'magic', 'guildfavor', 'cost', 'tradeskills', 'stacksize',
+                              'stackable', 'collectible', 'bagtype']},
+    **{f: 'INTEGER' for f in EXTRA_FIELDS + UNKNOWN_FIELDS},
+}
+
+def _pick(rng, weighted):
+    total = sum(w for _, w in weighted)
+    roll = rng.random() * total
+    for value, weight in weighted:
+        roll -= weight
+        if roll < 0:
+            return value
+    return weighted[-1][0]
+
+def _classes(rng):
+    roll = rng.random()
+    if roll < 0.45:
+        return ALL_CLASSES
+    if roll < 0.70:
+        return rng.choice(CLASS_GROUPS)
+    if roll < 0.85:
+        return 1 << rng.randrange(16)
+    return rng.choice(CLASS_GROUPS) | rng.choice(CLASS_GROUPS)
+
+def _scaled(rng, scale, top, chance=1.0):
+    if rng.random() >= chance:
+        return 0
+    return max(0, int(rng.gauss(1.0, 0.25) * scale * top))
+
+def synth_item(rng, item_id):
+    """One Lucy item as {field: string}"""
+    itemtype = _pick(rng, ITEMTYPE_WEIGHTS)
+    item = {field: '' for field in FIELD_TYPES}
+    item['id'] = str(item_id)
+
+    if itemtype == 10:
+        slots = rng.choice(ARMOR_SLOTS)
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(ARMOR_NOUNS)}'
+    elif itemtype == 29:
+        slots = rng.choice(JEWELRY_SLOTS)
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(JEWELRY_NOUNS)}'
+    elif itemtype in WEAPON_SLOTS:
+        slots = WEAPON_SLOTS[itemtype]
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(WEAPON_NOUNS)}'
+    else:
+        slots = 0
+        name = f'{rng.choice(MATERIALS)} {rng.choice(ITEM_NOUNS)}'
+        if rng.random() < 0.3:
+            name = f'{rng.choice(ADJECTIVES)} {name}'
+
+    item['name'] = name
+    item['itemtype'] = str(itemtype)
+    item['slots'] = str(slots)
+    item['weight'] = f'{rng.choice([0.1, 0.5, 1.0, 1.5, 2.5, 5.0, 12.0])}'
+    item['nodrop'] = '1' if rng.random() < 0.3 else '0'
+    item['norent'] = '1' if rng.random() < 0.05 else '0'
+    item['questitem'] = '1' if rng.random() < (0.15 if slots == 0 else 0.01) else '0'
+    item['lore'] = name if rng.random() < 0.2 else ''
+    item['cost'] = str(rng.randrange(0, 500000))
+    item['icon'] = str(rng.randrange(500, 8000))
+    for field in UNKNOWN_FIELDS:
+        item[field] = '0' if rng.random() < 0.9 else str(rng.randrange(1, 1000))
+
+    if slots == 0:
+        item['classes'] = '0'
+        item['reqlevel'] = '0'
+        item['tradeskills'] = '1' if itemtype == 11 else '0'
+        item['stacksize'] = str(rng.choice([20, 100, 1000])) if itemtype in (11, 14, 15, 21) else '1'
+        item['collectible'] = '1' if rng.random() < 0.02 else '0'
+        return item
+
+    level = 0 if rng.random() < 0.08 else int(rng.triangular(1, 125, 110))
+    scale = max(level, 5) / 125
+    item['classes'] = str(_classes(rng))
+    item['reqlevel'] = str(level)
+    item['reclevel'] = str(level)
+    item['races'] = '65535'
+    item['stacksize'] = '1'
+
+    armor_like = itemtype in (10, 29, 8)
+    item['ac'] = str(_scaled(rng, scale, 400 if itemtype in (10, 8) else 60, 0.95 if armor_like else 0.3))
+    item['hp'] = str(_scaled(rng, scale, 4500, 0.9))
+    item['mana'] = str(_scaled(rng, scale, 4000, 0.6))
+    item['endur'] = str(_scaled(rng, scale, 4000, 0.6))
+    for resist in ('mr', 'fr', 'cr', 'pr', 'dr'):
+        item[resist] = str(_scaled(rng, scale, 90, 0.5))
+    item['attack'] = str(_scaled(rng, scale, 90, 0.35))
+    item['regen'] = str(_scaled(rng, scale, 60, 0.25))
+    item['manaregen'] = str(_scaled(rng, scale, 50, 0.2))
+    item['healamt'] = str(_scaled(rng, scale, 250, 0.1))
+    item['clairvoyance'] = str(_scaled(rng, scale, 120, 0.1))
+    for stat in ('str', 'sta', 'agi', 'dex', 'wis', 'int', 'cha'):
+        item[stat] = str(_scaled(rng, scale, 40, 0.5))
+
+    if itemtype in (0, 1, 2, 3, 4, 5):
+        two_hand = itemtype in (1, 4)
+        delay = rng.randrange(28, 56) if two_hand else rng.randrange(15, 45)
+        item['delay'] = str(delay)
+        item['damage'] = str(max(1, int(rng.gauss(1.0, 0.2) * scale * (260 if two_hand else 140))))
+        if itemtype == 2 and rng.random() < 0.6:
+            item['backstabdmg'] = str(int(int(item['damage']) * rng.uniform(1.2, 1.8)))
+    return item
+
+def iter_items(count, seed=DEFAULT_SEED, start_id=1):
+    rng = random.Random(seed)
+    for item_id in range(start_id, start_id + count):
+        yield synth_item(rng, item_id)
+
+def write_lucy_corpus(out_dir, count, seed=DEFAULT_SEED, pack=False):
+    """Write lucy_item_<id>.json files (and optionally a .lpak next to them)
+
+    Returns the corpus path the importer should read.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for item in iter_items(count, seed):
+        with open(os.path.join(out_dir, f"lucy_item_{item['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(item, f)
+    if pack:
+        archive_path = out_dir.rstrip('/\\') + '.lpak'
+        pack_lucy_dir(out_dir, archive_path)
+        return archive_path
+    return out_dir
+
+def mutate_corpus(lucy_dir, changed=0.01, touched=0.01, deleted=0.001, added=0.005, seed=DEFAULT_SEED):
+    """Simulate a Lucy refresh for incremental benchmarks
+
+    Rewrites a fraction of items with new stats, touches others without
+    changing their content, deletes some and adds new ids past the end.
+    Returns {'changed', 'touched', 'deleted', 'added'} counts.
+    """
+    rng = random.Random(seed + 1)
+    ids = sorted(int(name[10:-5]) for name in os.listdir(lucy_dir)
+                 if name.startswith('lucy_item_') and name.endswith('.json'))
+    picks = rng.sample(ids, int(len(ids) * (changed + touched + deleted)))
+    n_changed, n_touched = int(len(ids) * changed), int(len(ids) * touched)
+    now = time.time()
+
+    for item_id in picks[:n_changed]:
+        path = os.path.join(lucy_dir, f'lucy_item_{item_id}.json')
+        with open(path, 'r', encoding='utf-8') as f:
+            item = json.load(f)
+        item['hp'] = str(int(item['hp'] or 0) + rng.randrange(1, 50))
+        item['cost'] = str(rng.randrange(0, 500000))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(item, f)
+    for item_id in picks[n_changed:n_changed + n_touched]:
+        os.utime(os.path.join(lucy_dir, f'lucy_item_{item_id}.json'), (now, now + 1))
+    for item_id in picks[n_changed + n_touched:]:
+        os.remove(os.path.join(lucy_dir, f'lucy_item_{item_id}.json'))
+
+    n_added = int(len(ids) * added)
+    for item in iter_items(n_added, seed + 2, start_id=(ids[-1] if ids else 0) + 1):
+        with open(os.path.join(lucy_dir, f"lucy_item_{item['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(item, f)
+    return {'changed': n_changed, 'touched': n_touched, 'deleted': len(picks) - n_changed - n_touched, 'added': n_added}
+
+def build_linkdb(db_path, count, seed=DEFAULT_SEED, batch=50000):
+    """Populated raw_item_data plus the indexes import_lucy.py builds"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA synchronous = OFF')
+    fields = list(FIELD_TYPES)
+    conn.execute('CREATE TABLE raw_item_data (id INTEGER PRIMARY KEY, '
+                 + ', '.join(f'{f} {FIELD_TYPES[f]}' for f in fields) + ')')
+    sql = f"INSERT INTO raw_item_data (id, {', '.join(fields)}) VALUES ({', '.join('?' * (len(fields) + 1))})"
+
+    rows = []
+    for item in iter_items(count, seed):
+        rows.append((int(item['id']), *(convert_value(item[f], FIELD_TYPES[f]) for f in fields)))
+        if len(rows) >= batch:
+            conn.executemany(sql, rows)
+            rows = []
+    conn.executemany(sql, rows)
+    conn.commit()
+
+    build_equip_index(conn)
+    build_name_index(conn)
+    create_indexes(conn)
+    conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic Lucy corpora and LinkDB databases')
+    parser.add_argument('kind', choices=['lucy', 'db'], help='Lucy JSON corpus or populated MQ2LinkDB.db')
+    parser.add_argument('out', help='Output directory (lucy) or database file (db)')
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS, help='Number of items (10k - 500k)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--pack', action='store_true', help='Also pack the corpus into OUT.lpak')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.kind == 'lucy':
+        path = write_lucy_corpus(args.out, args.items, args.seed, args.pack)
+    else:
+        build_linkdb(args.out, args.items, args.seed)
+        path = args.out
+    print(f"Generated {args.items} items -> {path} in {time.perf_counter() - start:.1f}s")
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
-import sqlite3
+from linkdb import LinkDB
 
-conn = sqlite3.connect(r'C:\MQ2\lua\yalm2\MQ2LinkDB.db')
-cur = conn.cursor()
+db = LinkDB()
+cur = db.conn
 
 # List tables
 tables = cur.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
@@ -17,20 +17,14 @@ if tables:
         count = cur.execute("SELECT COUNT(*) FROM raw_item_data").fetchone()[0]
         print(f"  Total rows: {count}")
         
-        # Try to find items
-        print(f"\nSearching for item 121564:")
-        row = cur.execute("SELECT id, name FROM raw_item_data WHERE id = 121564").fetchone()
-        if row:
-            print(f"  Found: {row}")
-        else:
-            print(f"  Not found")
-            
-        print(f"\nSearching for item 4654:")
-        row = cur.execute("SELECT id, name FROM raw_item_data WHERE id = 4654").fetchone()
-        if row:
-            print(f"  Found: {row}")
-        else:
-            print(f"  Not found")
+        # Try to find items (one batched lookup)
+        found = db.get_items([121564, 4654], ['name'])
+        for item_id in (121564, 4654):
+            print(f"\nSearching for item {item_id}:")
+            if item_id in found:
+                print(f"  Found: {(item_id, found[item_id]['name'])}")
+            else:
+                print(f"  Not found")
             
         # Show some sample IDs
         print(f"\nSample item IDs in database (first 10):")
@@ -40,4 +34,4 @@ if tables:
     except Exception as e:
         print(f"  Error: {e}")
 
-conn.close()
+db.close()
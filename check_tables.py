@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
-import sqlite3
+from linkdb import LinkDB
 
-conn = sqlite3.connect(r'C:\MQ2\lua\yalm2\MQ2LinkDB.db')
-cur = conn.cursor()
+db = LinkDB()
+cur = db.conn
 
 # List all tables
 tables = cur.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
@@ -11,9 +11,9 @@ for t in tables:
     print(f'  {t[0]}')
 
 print('\nChecking raw_item_data table for item 121564:')
-row = cur.execute('SELECT id, name, slots, classes FROM raw_item_data WHERE id = 121564').fetchone()
-if row:
-    print(f'  raw_item_data: ID={row[0]}, Name={row[1]}, Slots={row[2]}, Classes={row[3]}')
+item = db.get_item(121564, ['name', 'slots', 'classes'])
+if item:
+    print(f"  raw_item_data: ID={item['id']}, Name={item['name']}, Slots={item['slots']}, Classes={item['classes']}")
 
 print('\nChecking raw_item_data_315 table for item 121564:')
 try:
@@ -25,4 +25,4 @@ try:
 except Exception as e:
     print(f'  Error: {e}')
 
-conn.close()
+db.close()
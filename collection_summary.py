@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""Trigger-maintained collection progress summaries for collection_needs.db
+
+get_all_collections_for_ui, get_all_collections_progress,
+get_character_progress and get_collection_details (lib/collectionscanner.lua)
+GROUP BY over every row of collection_needs (characters x collectibles) on
+each UI draw. Two summary tables hold those aggregates instead:
+
+    collection_progress   per (collection, expansion, character, server):
+                          total, needed, collected
+    collection_summary    per (collection, expansion, server): characters and
+                          complete / partial / needs counts for the UI
+
+Triggers on collection_needs keep collection_progress current through
+scan_character's DELETE + INSERT and mark_item_collected's UPDATE, and
+triggers on collection_progress keep collection_summary current, so the UI
+reads one row per collection shown. lib/collectionscanner.lua creates the
+same tables and triggers on first open; keep SUMMARY_SQL and TRIGGER_SQL in
+sync with it.
+
+Usage:
+    python collection_summary.py [--db PATH]          rebuild tables and triggers
+    python collection_summary.py --verify [--db PATH]
+    python collection_summary.py --bench [--characters 36] [--collectibles 5000]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+DB_PATH = r'C:\MQ2\config\YALM2\collection_needs.db'
+
+NEEDS_SQL = '''
+CREATE TABLE IF NOT EXISTS collection_needs (
+    character_name TEXT NOT NULL,
+    server_name TEXT NOT NULL,
+    item_name TEXT NOT NULL,
+    collection_name TEXT NOT NULL,
+    expansion TEXT NOT NULL,
+    needed INTEGER NOT NULL DEFAULT 1,
+    last_updated INTEGER,
+    PRIMARY KEY (character_name, server_name, item_name)
+);
+CREATE INDEX IF NOT EXISTS idx_item_needed ON collection_needs (item_name, needed);
+'''
+
+SUMMARY_SQL = '''
+CREATE TABLE IF NOT EXISTS collection_progress (
+    collection_name TEXT NOT NULL,
+    expansion TEXT NOT NULL,
+    character_name TEXT NOT NULL,
+    server_name TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    needed INTEGER NOT NULL DEFAULT 0,
+    collected INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (collection_name, expansion, character_name, server_name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_collection_progress_character ON collection_progress (character_name, server_name, expansion);
+CREATE INDEX IF NOT EXISTS idx_collection_progress_server ON collection_progress (server_name, expansion, collection_name, character_name);
+CREATE TABLE IF NOT EXISTS collection_summary (
+    collection_name TEXT NOT NULL,
+    expansion TEXT NOT NULL,
+    server_name TEXT NOT NULL,
+    characters INTEGER NOT NULL DEFAULT 0,
+    complete_count INTEGER NOT NULL DEFAULT 0,
+    partial_count INTEGER NOT NULL DEFAULT 0,
+    needs_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (collection_name, expansion, server_name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_collection_summary_server ON collection_summary (server_name, expansion, collection_name);
+'''
+
+# Same aggregates as the GROUP BY queries they replace; populate before the
+# triggers exist or collection_summary is counted twice
+POPULATE_SQL = '''
+INSERT INTO collection_progress (collection_name, expansion, character_name, server_name, total, needed, collected)
+SELECT collection_name, expansion, character_name, server_name,
+       COUNT(*), SUM(needed = 1), SUM(needed = 0)
+FROM collection_needs
+GROUP BY collection_name, expansion, character_name, server_name;
+INSERT INTO collection_summary (collection_name, expansion, server_name, characters, complete_count, partial_count, needs_count)
+SELECT collection_name, expansion, server_name,
+       COUNT(*), SUM(needed = 0), SUM(needed > 0 AND collected > 0), SUM(collected = 0)
+FROM collection_progress
+GROUP BY collection_name, expansion, server_name;
+'''
+
+_PROGRESS_KEY = ('collection_name = {r}.collection_name AND expansion = {r}.expansion '
+                 'AND character_name = {r}.character_name AND server_name = {r}.server_name')
+_SUMMARY_KEY = 'collection_name = {r}.collection_name AND expansion = {r}.expansion AND server_name = {r}.server_name'
+
+TRIGGER_SQL = f'''
+CREATE TRIGGER IF NOT EXISTS collection_needs_ai AFTER INSERT ON collection_needs BEGIN
+    INSERT INTO collection_progress (collection_name, expansion, character_name, server_name, total, needed, collected)
+    VALUES (new.collection_name, new.expansion, new.character_name, new.server_name, 1, new.needed = 1, new.needed = 0)
+    ON CONFLICT (collection_name, expansion, character_name, server_name) DO UPDATE SET
+        total = total + 1, needed = needed + excluded.needed, collected = collected + excluded.collected;
+END;
+CREATE TRIGGER IF NOT EXISTS collection_needs_ad AFTER DELETE ON collection_needs BEGIN
+    UPDATE collection_progress SET total = total - 1, needed = needed - (old.needed = 1), collected = collected - (old.needed = 0)
+    WHERE {_PROGRESS_KEY.format(r='old')};
+    DELETE FROM collection_progress WHERE {_PROGRESS_KEY.format(r='old')} AND total <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS collection_needs_au_needed AFTER UPDATE OF needed ON collection_needs
+WHEN old.needed IS NOT new.needed
+ AND old.collection_name = new.collection_name AND old.expansion = new.expansion
+ AND old.character_name = new.character_name AND old.server_name = new.server_name BEGIN
+    UPDATE collection_progress
+    SET needed = needed - (old.needed = 1) + (new.needed = 1), collected = collected - (old.needed = 0) + (new.needed = 0)
+    WHERE {_PROGRESS_KEY.format(r='new')};
+END;
+CREATE TRIGGER IF NOT EXISTS collection_needs_au_moved AFTER UPDATE OF collection_name, expansion, character_name, server_name ON collection_needs
+WHEN old.collection_name != new.collection_name OR old.expansion != new.expansion
+  OR old.character_name != new.character_name OR old.server_name != new.server_name BEGIN
+    UPDATE collection_progress SET total = total - 1, needed = needed - (old.needed = 1), collected = collected - (old.needed = 0)
+    WHERE {_PROGRESS_KEY.format(r='old')};
+    DELETE FROM collection_progress WHERE {_PROGRESS_KEY.format(r='old')} AND total <= 0;
+    INSERT INTO collection_progress (collection_name, expansion, character_name, server_name, total, needed, collected)
+    VALUES (new.collection_name, new.expansion, new.character_name, new.server_name, 1, new.needed = 1, new.needed = 0)
+    ON CONFLICT (collection_name, expansion, character_name, server_name) DO UPDATE SET
+        total = total + 1, needed = needed + excluded.needed, collected = collected + excluded.collected;
+END;
+CREATE TRIGGER IF NOT EXISTS collection_progress_ai AFTER INSERT ON collection_progress BEGIN
+    INSERT INTO collection_summary (collection_name, expansion, server_name, characters, complete_count, partial_count, needs_count)
+    VALUES (new.collection_name, new.expansion, new.server_name, 1,
+            new.needed = 0, new.needed > 0 AND new.collected > 0, new.collected = 0)
+    ON CONFLICT (collection_name, expansion, server_name) DO UPDATE SET
+        characters = characters + 1, complete_count = complete_count + excluded.complete_count,
+        partial_count = partial_count + excluded.partial_count, needs_count = needs_count + excluded.needs_count;
+END;
+CREATE TRIGGER IF NOT EXISTS collection_progress_ad AFTER DELETE ON collection_progress BEGIN
+    UPDATE collection_summary
+    SET characters = characters - 1, complete_count = complete_count - (old.needed = 0),
+        partial_count = partial_count - (old.needed > 0 AND old.collected > 0), needs_count = needs_count - (old.collected = 0)
+    WHERE {_SUMMARY_KEY.format(r='old')};
+    DELETE FROM collection_summary WHERE {_SUMMARY_KEY.format(r='old')} AND characters <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS collection_progress_au AFTER UPDATE OF needed, collected ON collection_progress
+WHEN (old.needed = 0) != (new.needed = 0) OR (old.collected = 0) != (new.collected = 0) BEGIN
+    UPDATE collection_summary
+    SET complete_count = complete_count - (old.needed = 0) + (new.needed = 0),
+        partial_count = partial_count - (old.needed > 0 AND old.collected > 0) + (new.needed > 0 AND new.collected > 0),
+        needs_count = needs_count - (old.collected = 0) + (new.collected = 0)
+    WHERE {_SUMMARY_KEY.format(r='new')};
+END;
+'''
+
+TRIGGERS = ['collection_needs_ai', 'collection_needs_ad', 'collection_needs_au_needed', 'collection_needs_au_moved',
+            'collection_progress_ai', 'collection_progress_ad', 'collection_progress_au']
+
+def summary_exists(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'collection_summary'").fetchone() is not None
+
+DROP_SQL = ''.join(f'DROP TRIGGER IF EXISTS {t};' for t in TRIGGERS) + \
+    'DROP TABLE IF EXISTS collection_summary; DROP TABLE IF EXISTS collection_progress;'
+
+def build_summaries(conn):
+    """(Re)create summary tables from collection_needs, then install the triggers"""
+    conn.executescript('BEGIN;' + DROP_SQL + SUMMARY_SQL + POPULATE_SQL + TRIGGER_SQL + 'COMMIT;')
+    return (conn.execute('SELECT COUNT(*) FROM collection_progress').fetchone()[0],
+            conn.execute('SELECT COUNT(*) FROM collection_summary').fetchone()[0])
+
+# --- Raw aggregates (the queries collectionscanner.lua used to run) ---------
+
+RAW_PROGRESS = '''
+    SELECT collection_name, expansion, character_name, server_name,
+           COUNT(*), SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END), SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END)
+    FROM collection_needs
+    GROUP BY collection_name, expansion, character_name, server_name'''
+
+RAW_SUMMARY = '''
+    SELECT collection_name, expansion, server_name, COUNT(*),
+           SUM(CASE WHEN needed_count = 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN needed_count > 0 AND collected_count > 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN collected_count = 0 THEN 1 ELSE 0 END)
+    FROM (
+        SELECT collection_name, expansion, server_name, character_name,
+               SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) AS needed_count,
+               SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) AS collected_count
+        FROM collection_needs
+        GROUP BY collection_name, expansion, server_name, character_name
+    )
+    GROUP BY collection_name, expansion, server_name'''
+
+def verify_summaries(conn):
+    """{table: (missing rows, stale rows)} comparing the summaries with raw aggregates"""
+    problems = {}
+    checks = [
+        ('collection_progress', RAW_PROGRESS,
+         'SELECT collection_name, expansion, character_name, server_name, total, needed, collected FROM collection_progress'),
+        ('collection_summary', RAW_SUMMARY,
+         'SELECT collection_name, expansion, server_name, characters, complete_count, partial_count, needs_count '
+         'FROM collection_summary'),
+    ]
+    for table, raw, stored in checks:
+        missing = conn.execute(f'{raw} EXCEPT {stored}').fetchall()
+        stale = conn.execute(f'{stored} EXCEPT {raw}').fetchall()
+        problems[table] = (missing, stale)
+    missing_triggers = [t for t in TRIGGERS if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (t,)).fetchone() is None]
+    return problems, missing_triggers
+
+# --- UI queries: raw GROUP BY vs summary reads ---------------------------
+
+UI_QUERIES = {
+    'collections_for_ui': (
+        '''SELECT collection_name, expansion,
+                  SUM(CASE WHEN needed_count = 0 THEN 1 ELSE 0 END),
+                  SUM(CASE WHEN needed_count > 0 AND collected_count > 0 THEN 1 ELSE 0 END),
+                  SUM(CASE WHEN collected_count = 0 THEN 1 ELSE 0 END)
+           FROM (SELECT collection_name, expansion, character_name,
+                        SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) AS needed_count,
+                        SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) AS collected_count
+                 FROM collection_needs WHERE server_name = :server
+                 GROUP BY collection_name, character_name)
+           GROUP BY collection_name, expansion ORDER BY expansion, collection_name''',
+        '''SELECT collection_name, expansion, complete_count, partial_count, needs_count
+           FROM collection_summary WHERE server_name = :server ORDER BY expansion, collection_name'''),
+    'collections_progress': (
+        '''SELECT collection_name, expansion, character_name, server_name, COUNT(*),
+                  SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END), SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END)
+           FROM collection_needs WHERE server_name = :server
+           GROUP BY collection_name, character_name, server_name ORDER BY expansion, collection_name, character_name''',
+        '''SELECT collection_name, expansion, character_name, server_name, total, needed, collected
+           FROM collection_progress WHERE server_name = :server ORDER BY expansion, collection_name, character_name'''),
+    'character_progress': (
+        '''SELECT expansion, COUNT(*), SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END), SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END)
+           FROM collection_needs WHERE character_name = :character AND server_name = :server GROUP BY expansion''',
+        '''SELECT expansion, SUM(total), SUM(needed), SUM(collected)
+           FROM collection_progress WHERE character_name = :character AND server_name = :server GROUP BY expansion'''),
+    'collection_details': (
+        '''SELECT character_name, SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) AS items_needed,
+                  SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END), COUNT(*)
+           FROM collection_needs WHERE collection_name = :collection AND server_name = :server
+           GROUP BY character_name ORDER BY items_needed DESC, character_name''',
+        '''SELECT character_name, SUM(needed) AS items_needed, SUM(collected), SUM(total)
+           FROM collection_progress WHERE collection_name = :collection AND server_name = :server
+           GROUP BY character_name ORDER BY items_needed DESC, character_name'''),
+}
+
+EXPANSIONS = ["RoF", "CotF", "TDS", "TBM", "EoK", "RoS", "TBL", "ToV", "CoV", "ToL", "NoS", "LS", "TOB", "SoR"]
+ITEMS_PER_COLLECTION = 12
+SERVERS = ['firiona', 'mischief']
+
+def generate_needs(conn, characters, collectibles, seed):
+    """Synthetic collection_needs: every character scanned against every collectible"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(collectibles):
+        collection = i // ITEMS_PER_COLLECTION
+        items.append((f'Collectible {i:05d}', f'Collection {collection:04d}', EXPANSIONS[collection % len(EXPANSIONS)]))
+    with conn:
+        for c in range(characters):
+            name, server = f'Char{c:03d}', SERVERS[c % len(SERVERS)]
+            progress = rng.random()
+            conn.executemany('INSERT INTO collection_needs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             [(name, server, item, collection, expansion, int(rng.random() > progress), 0)
+                              for item, collection, expansion in items])
+    return items
+
+def time_query(conn, sql, params, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        rows = conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / repeats, len(rows)
+
+def time_writes(db_path, characters, items, seed, with_triggers):
+    """Seconds for one scan_character rewrite and per mark_item_collected"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    if not with_triggers:
+        conn.executescript(DROP_SQL)
+    name, server = 'Char000', SERVERS[0]
+    start = time.perf_counter()
+    conn.execute('BEGIN')
+    conn.execute('DELETE FROM collection_needs WHERE character_name = ? AND server_name = ?', (name, server))
+    conn.executemany('INSERT INTO collection_needs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     [(name, server, item, collection, expansion, int(rng.random() > 0.5), 1)
+                      for item, collection, expansion in items])
+    conn.execute('COMMIT')
+    scan = time.perf_counter() - start
+
+    marks = [(f'Char{rng.randrange(characters):03d}', rng.choice(items)[0]) for _ in range(2000)]
+    start = time.perf_counter()
+    conn.execute('BEGIN')
+    for character, item in marks:
+        conn.execute('UPDATE collection_needs SET needed = 0, last_updated = 2 '
+                     'WHERE character_name = ? AND server_name = ? AND item_name = ?',
+                     (character, SERVERS[int(character[4:]) % len(SERVERS)], item))
+    conn.execute('COMMIT')
+    mark = (time.perf_counter() - start) / len(marks)
+    conn.close()
+    return scan, mark
+
+def run_bench(characters, collectibles, repeats, seed):
+    work = tempfile.mkdtemp(prefix='collection_summary_')
+    db_path = os.path.join(work, 'collection_needs.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript(NEEDS_SQL)
+    start = time.perf_counter()
+    items = generate_needs(conn, characters, collectibles, seed)
+    rows = conn.execute('SELECT COUNT(*) FROM collection_needs').fetchone()[0]
+    print(f"Generated {rows} collection_needs rows ({characters} characters x {collectibles} collectibles) "
+          f"in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    progress, summary = build_summaries(conn)
+    print(f"Built summaries in {time.perf_counter() - start:.2f}s: {progress} progress rows, {summary} summary rows")
+
+    params = {'server': SERVERS[0], 'character': 'Char000', 'collection': 'Collection 0001'}
+    print(f"\n  {'query':22s} {'raw ms':>10s} {'summary ms':>11s} {'speedup':>8s} {'rows':>6s}")
+    for name, (raw, summarized) in UI_QUERIES.items():
+        raw_seconds, raw_rows = time_query(conn, raw, params, repeats)
+        sum_seconds, sum_rows = time_query(conn, summarized, params, repeats)
+        same = sorted(conn.execute(raw, params).fetchall()) == sorted(conn.execute(summarized, params).fetchall())
+        print(f"  {name:22s} {raw_seconds * 1000:10.3f} {sum_seconds * 1000:11.3f} "
+              f"{raw_seconds / sum_seconds:7.1f}x {sum_rows:6d}{'' if same else '  MISMATCH'}")
+    conn.close()
+
+    print(f"\n  {'write':22s} {'no triggers':>12s} {'triggers':>10s}")
+    plain = time_writes(db_path, characters, items, seed, with_triggers=False)
+    conn = sqlite3.connect(db_path)
+    build_summaries(conn)
+    conn.close()
+    triggered = time_writes(db_path, characters, items, seed, with_triggers=True)
+    print(f"  {'scan_character (s)':22s} {plain[0]:12.3f} {triggered[0]:10.3f}")
+    print(f"  {'mark_item_collected us':22s} {plain[1] * 1e6:12.1f} {triggered[1] * 1e6:10.1f}")
+
+    conn = sqlite3.connect(db_path)
+    problems, _ = verify_summaries(conn)
+    conn.close()
+    print(f"\nSummaries after writes: {'consistent' if not any(m or s for m, s in problems.values()) else 'INCONSISTENT'}")
+    for suffix in ('', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.rmdir(work)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build, verify or benchmark collection progress summary tables')
+    parser.add_argument('--db', default=DB_PATH, help='collection_needs.db path')
+    parser.add_argument('--verify', action='store_true', help='Compare the summaries with raw aggregates')
+    parser.add_argument('--bench', action='store_true', help='Benchmark raw vs summary queries on synthetic data')
+    parser.add_argument('--characters', type=int, default=36)
+    parser.add_argument('--collectibles', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=15)
+    args = parser.parse_args()
+
+    if args.bench:
+        run_bench(args.characters, args.collectibles, args.repeats, args.seed)
+        sys.exit(0)
+
+    conn = sqlite3.connect(args.db)
+    if args.verify:
+        if not summary_exists(conn):
+            print("collection_summary not found - run without --verify to build it")
+            sys.exit(1)
+        problems, missing_triggers = verify_summaries(conn)
+        ok = not missing_triggers
+        for table, (missing, stale) in problems.items():
+            print(f"{table}: {len(missing)} missing/different, {len(stale)} stale")
+            for row in (missing + stale)[:10]:
+                print(f"  {row}")
+            ok = ok and not missing and not stale
+        if missing_triggers:
+            print(f"Missing triggers: {', '.join(missing_triggers)}")
+        print("OK" if ok else "Summaries out of date - rebuild with: python collection_summary.py")
+        sys.exit(0 if ok else 1)
+
+    start = time.perf_counter()
+    progress, summary = build_summaries(conn)
+    print(f"Built collection_progress ({progress} rows) and collection_summary ({summary} rows) "
+          f"in {time.perf_counter() - start:.2f}s")
+    conn.close()
@@ -1,35 +1,27 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import os
 
-db_path = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
+from linkdb import LinkDB, DB_PATH
+
+db_path = DB_PATH
 
 if not os.path.exists(db_path):
     print(f"Database not found at {db_path}")
     exit(1)
 
-conn = sqlite3.connect(db_path)
-conn.row_factory = sqlite3.Row
-cur = conn.cursor()
+db = LinkDB(db_path)
 
 # Query both items
-query = '''
-SELECT id, name, ac, hp, mana, endur, attack, mr, fr, cr, pr, dr, itemtype, slots, classes 
-FROM raw_item_data 
-WHERE id IN (121564, 4654)
-ORDER BY id
-'''
-
-cur.execute(query)
-rows = cur.fetchall()
+items = db.get_items([121564, 4654], ['name', 'ac', 'hp', 'mana', 'endur', 'attack', 'mr', 'fr', 'cr', 'pr', 'dr',
+                                      'itemtype', 'slots', 'classes'])
 
-if len(rows) < 2:
+if len(items) < 2:
     print("One or both items not found in database")
     exit(1)
 
-item2 = dict(rows[0])  # 4654
-item1 = dict(rows[1])  # 121564
+item2 = items[4654]
+item1 = items[121564]
 
 print(f"Item 121564: {item1['name']}")
 print(f"Item 4654: {item2['name']}")
@@ -101,4 +93,4 @@ elif total_score < 0:
 else:
     print("= Items are equivalent")
 
-conn.close()
+db.close()
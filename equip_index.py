@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Slot/class/level inverted index over raw_item_data
+
+can_equip_item and are_items_comparable test the classes and slots
+bitmasks and the weapon category one candidate row at a time. This
+explodes every equippable item into one row per (slot bit, class bit):
+
+    item_equip_index(slot_bit, class_bit, weapon_cat, reqlevel, item_id)
+
+clustered on that key (WITHOUT ROWID), so "everything a level 90 Rogue can
+wear in slot 13 that is 1H" is a single index range scan. classes = 0
+(no restriction) expands to every class bit.
+
+import_lucy.py builds it after a full load and refreshes changed ids on
+incremental runs.
+
+Usage:
+    python equip_index.py [--db PATH]                  rebuild
+    python equip_index.py --query Rogue 90 13 [1h_weapon]
+"""
+
+import time
+import sqlite3
+import argparse
+
+from item_rules import CLASS_BITS, SLOT_COUNT, WEAPON_CATEGORIES, normalize_class
+from linkdb import resolve_db_path
+
+DB_PATH = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
+
+INDEX_TABLE = 'item_equip_index'
+
+def _weapon_cat_sql():
+    cases = ' '.join(f"WHEN {itemtype} THEN '{cat}'" for itemtype, cat in sorted(WEAPON_CATEGORIES.items()))
+    return f"CASE CAST(r.itemtype AS INTEGER) {cases} ELSE 'other' END"
+
+def _explode_sql(where):
+    slot_bits = ', '.join(f'({b})' for b in range(SLOT_COUNT))
+    class_bits = ', '.join(f'({b})' for b in sorted(CLASS_BITS.values()))
+    return f'''
+        WITH slot_bits(b) AS (VALUES {slot_bits}),
+             class_bits(b) AS (VALUES {class_bits})
+        INSERT INTO {INDEX_TABLE} (slot_bit, class_bit, weapon_cat, reqlevel, item_id)
+        SELECT s.b, c.b, {_weapon_cat_sql()}, COALESCE(CAST(r.reqlevel AS INTEGER), 0), r.id
+        FROM raw_item_data AS r
+        JOIN slot_bits AS s ON (CAST(r.slots AS INTEGER) >> s.b) & 1
+        JOIN class_bits AS c ON COALESCE(CAST(r.classes AS INTEGER), 0) = 0
+                             OR (CAST(r.classes AS INTEGER) >> c.b) & 1
+        WHERE CAST(r.slots AS INTEGER) > 0 AND {where}
+        ORDER BY 1, 2, 3, 4, 5'''
+
+def build_equip_index(conn):
+    """Rebuild the whole index; returns the row count"""
+    conn.execute(f'DROP TABLE IF EXISTS {INDEX_TABLE}')
+    conn.execute(f'''
+        CREATE TABLE {INDEX_TABLE} (
+            slot_bit INTEGER NOT NULL,
+            class_bit INTEGER NOT NULL,
+            weapon_cat TEXT NOT NULL,
+            reqlevel INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            PRIMARY KEY (slot_bit, class_bit, weapon_cat, reqlevel, item_id)
+        ) WITHOUT ROWID''')
+    conn.execute(_explode_sql('1'))
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{INDEX_TABLE}_item ON {INDEX_TABLE}(item_id)')
+    count = conn.execute(f'SELECT COUNT(*) FROM {INDEX_TABLE}').fetchone()[0]
+    conn.commit()
+    return count
+
+def index_exists(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (INDEX_TABLE,)).fetchone() is not None
+
+def refresh_items(conn, item_ids, chunk_size=500, commit=True):
+    """Re-explode the given ids (changed or deleted items); commit=False leaves the caller's transaction open"""
+    item_ids = list(item_ids)
+    for i in range(0, len(item_ids), chunk_size):
+        chunk = item_ids[i:i + chunk_size]
+        marks = ', '.join('?' * len(chunk))
+        conn.execute(f'DELETE FROM {INDEX_TABLE} WHERE item_id IN ({marks})', chunk)
+        conn.execute(_explode_sql(f'r.id IN ({marks})'), chunk)
+    if commit:
+        conn.commit()
+
+def equippable_items(conn, slot, char_class, level, weapon_cat=None):
+    """Item ids a class of this level can wear in slot, optionally one weapon category"""
+    class_bit = CLASS_BITS[normalize_class(char_class)]
+    if weapon_cat is None:
+        rows = conn.execute(
+            f'SELECT item_id FROM {INDEX_TABLE} WHERE slot_bit = ? AND class_bit = ? AND reqlevel <= ?',
+            (slot, class_bit, level))
+    else:
+        rows = conn.execute(
+            f'SELECT item_id FROM {INDEX_TABLE} WHERE slot_bit = ? AND class_bit = ? AND weapon_cat = ? AND reqlevel <= ?',
+            (slot, class_bit, weapon_cat, level))
+    return [row[0] for row in rows]
+
+def comparable_items(conn, item_id, char_class, level):
+    """Items comparable with item_id (are_items_comparable) that the class can wear
+
+    Shares at least one slot; weapons only match the same weapon category.
+    """
+    class_bit = CLASS_BITS[normalize_class(char_class)]
+    rows = conn.execute(f'''
+        SELECT DISTINCT other.item_id
+        FROM {INDEX_TABLE} AS mine
+        JOIN {INDEX_TABLE} AS other
+          ON other.slot_bit = mine.slot_bit AND other.class_bit = mine.class_bit AND other.reqlevel <= ?
+         AND (other.weapon_cat = mine.weapon_cat OR other.weapon_cat = 'other' OR mine.weapon_cat = 'other')
+        WHERE mine.item_id = ? AND mine.class_bit = ? AND other.item_id != mine.item_id''',
+        (level, item_id, class_bit))
+    return [row[0] for row in rows]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the slot/class/level equip index')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--query', nargs='+', metavar='ARG',
+                        help='CLASS LEVEL SLOT [WEAPON_CAT]: list matching item ids')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(resolve_db_path(args.db))
+    start = time.perf_counter()
+    if args.query:
+        char_class, level, slot = args.query[0], int(args.query[1]), int(args.query[2])
+        weapon_cat = args.query[3] if len(args.query) > 3 else None
+        item_ids = equippable_items(conn, slot, char_class, level, weapon_cat)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(item_ids)} items for level {level} {char_class} in slot {slot}"
+              f"{' (' + weapon_cat + ')' if weapon_cat else ''} in {elapsed:.2f}ms")
+        print(f"  {item_ids[:50]}{' ...' if len(item_ids) > 50 else ''}")
+    else:
+        count = build_equip_index(conn)
+        print(f"Built {INDEX_TABLE}: {count} rows in {time.perf_counter() - start:.2f}s")
+    conn.close()
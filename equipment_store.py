@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Equipment snapshot store with per-slot change history
+
+write_equipped_items_ini.lua (one INI per character) and
+write_equipped_items.lua (equipped_items table in quest_tasks.db) only
+ever hold the latest loadout, so every consumer reparses all of it and
+cannot tell what changed. This ingests those snapshots into one SQLite
+store that keeps only the slots that changed between snapshots:
+
+    equipment_characters   name, class, level, last snapshot / last change
+    equipment_changes      (character, slot, snapshot time) -> new item;
+                           item_id NULL when the slot was emptied
+    equipment_current      latest item per (character, slot), kept in step
+                           with equipment_changes so the loadout query never
+                           walks the history
+
+Snapshot times are unix seconds: [Character] Updated from the INI writer
+(file mtime for older files) or equipped_items.last_updated (UTC).
+Snapshots not newer than the last one ingested for a character are
+skipped, so re-running the ingest is a no-op.
+
+changed_since(conn, t) is the feed for upgrade/distribution analyses:
+only the characters it returns need recomputing.
+
+Usage:
+    python equipment_store.py [--store PATH] [--equipped DIR] [--snapshots quest_tasks.db]
+    python equipment_store.py --since 2h|"2026-01-31 18:00"|1769900000 [--json FILE]
+    python equipment_store.py --loadout [NAME ...] [--json FILE]
+    python equipment_store.py --history NAME
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import calendar
+import argparse
+
+from item_rules import SLOT_NAMES
+
+STORE_PATH = r'C:\MQ2\config\YALM2\equipment_store.db'
+EQUIPPED_DIR = r'C:\MQ2\lua\YALM2\equipped'
+SNAPSHOT_DB = r'C:\MQ2\config\YALM2\quest_tasks.db'
+
+SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS equipment_characters (
+    character_name TEXT PRIMARY KEY,
+    char_class TEXT,
+    level INTEGER,
+    first_snapshot INTEGER NOT NULL,
+    last_snapshot INTEGER NOT NULL,
+    last_changed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS equipment_changes (
+    character_name TEXT NOT NULL,
+    slot_number INTEGER NOT NULL,
+    snapshot_time INTEGER NOT NULL,
+    item_id INTEGER,
+    item_name TEXT,
+    PRIMARY KEY (character_name, slot_number, snapshot_time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_equipment_changes_time ON equipment_changes(snapshot_time);
+CREATE TABLE IF NOT EXISTS equipment_current (
+    character_name TEXT NOT NULL,
+    slot_number INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    item_name TEXT,
+    since INTEGER NOT NULL,
+    PRIMARY KEY (character_name, slot_number)
+) WITHOUT ROWID;
+'''
+
+# Previous item for a change row, found through the primary key
+CHANGES_SQL = '''
+SELECT c.character_name, c.slot_number, c.snapshot_time, c.item_id, c.item_name,
+       p.item_id, p.item_name
+FROM equipment_changes c
+LEFT JOIN equipment_changes p
+  ON p.character_name = c.character_name AND p.slot_number = c.slot_number
+ AND p.snapshot_time = (SELECT MAX(snapshot_time) FROM equipment_changes
+                        WHERE character_name = c.character_name AND slot_number = c.slot_number
+                          AND snapshot_time < c.snapshot_time)
+'''
+
+class Snapshot:
+    def __init__(self, name, taken_at, equipped, char_class=None, level=None):
+        self.name = name
+        self.taken_at = int(taken_at)
+        self.equipped = equipped          # slot -> (item_id, item_name)
+        self.char_class = char_class
+        self.level = int(level) if level not in (None, '') else None
+
+# --- Snapshot sources ----------------------------------------------------
+
+def read_ini(path):
+    """{section: {key: value}} for LIP-written files (values may contain '=')"""
+    sections = {}
+    current = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('[') and line.endswith(']'):
+                current = sections.setdefault(line[1:-1], {})
+            elif '=' in line and current is not None:
+                key, value = line.split('=', 1)
+                current[key.strip()] = value.strip()
+    return sections
+
+def parse_item(value):
+    """'12345|Item Name' -> (12345, 'Item Name')"""
+    item_id, _, name = str(value).partition('|')
+    return int(item_id), name
+
+def read_ini_snapshots(directory):
+    """One Snapshot per write_equipped_items_ini.lua file"""
+    snapshots = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith('.ini'):
+            continue
+        path = os.path.join(directory, filename)
+        data = read_ini(path)
+        info = data.get('Character', {})
+        equipped = {int(key.split('_')[1]): parse_item(value)
+                    for key, value in data.get('Equipped', {}).items() if key.startswith('Slot_')}
+        taken_at = info.get('Updated') or os.path.getmtime(path)
+        snapshots.append(Snapshot(info.get('Name') or filename[:-4], float(taken_at), equipped,
+                                  info.get('Class'), info.get('Level')))
+    return snapshots
+
+def read_db_snapshots(db_path):
+    """One Snapshot per character in the equipped_items table"""
+    conn = sqlite3.connect(db_path)
+    by_name = {}
+    for name, slot, item_id, item_name, updated in conn.execute(
+            'SELECT character_name, slot_number, item_id, item_name, last_updated FROM equipped_items'):
+        snap = by_name.setdefault(name, Snapshot(name, 0, {}))
+        if updated:
+            snap.taken_at = max(snap.taken_at, calendar.timegm(time.strptime(updated[:19], '%Y-%m-%d %H:%M:%S')))
+        if item_id and int(item_id) > 0:
+            snap.equipped[int(slot)] = (int(item_id), item_name)
+    conn.close()
+    return list(by_name.values())
+
+# --- Store ---------------------------------------------------------------
+
+def open_store(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+def ingest(conn, snapshots):
+    """Record the slots that changed in each snapshot -> (ingested, skipped, changes)"""
+    ingested = skipped = changes = 0
+    with conn:
+        for snap in sorted(snapshots, key=lambda s: s.taken_at):
+            row = conn.execute('SELECT last_snapshot FROM equipment_characters WHERE character_name = ?',
+                               (snap.name,)).fetchone()
+            if row and snap.taken_at <= row[0]:
+                skipped += 1
+                continue
+
+            current = {slot: item_id for slot, item_id in conn.execute(
+                'SELECT slot_number, item_id FROM equipment_current WHERE character_name = ?', (snap.name,))}
+            changed = []
+            for slot in sorted(set(current) | set(snap.equipped)):
+                item_id, item_name = snap.equipped.get(slot, (None, None))
+                if current.get(slot) != item_id:
+                    changed.append((snap.name, slot, snap.taken_at, item_id, item_name))
+
+            conn.executemany('INSERT INTO equipment_changes VALUES (?, ?, ?, ?, ?)', changed)
+            conn.executemany('DELETE FROM equipment_current WHERE character_name = ? AND slot_number = ?',
+                             [(name, slot) for name, slot, _, item_id, _ in changed if item_id is None])
+            conn.executemany('INSERT OR REPLACE INTO equipment_current VALUES (?, ?, ?, ?, ?)',
+                             [(name, slot, item_id, item_name, taken_at)
+                              for name, slot, taken_at, item_id, item_name in changed if item_id is not None])
+            conn.execute('''
+                INSERT INTO equipment_characters VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(character_name) DO UPDATE SET
+                    char_class = COALESCE(excluded.char_class, char_class),
+                    level = COALESCE(excluded.level, level),
+                    last_snapshot = excluded.last_snapshot,
+                    last_changed = CASE WHEN ? THEN excluded.last_changed ELSE last_changed END''',
+                (snap.name, snap.char_class, snap.level, snap.taken_at, snap.taken_at, snap.taken_at, bool(changed)))
+            ingested += 1
+            changes += len(changed)
+    return ingested, skipped, changes
+
+def changed_since(conn, since):
+    """Slot changes after `since`: [(character, slot, time, item_id, item_name, old_id, old_name)]"""
+    return conn.execute(CHANGES_SQL + ' WHERE c.snapshot_time > ? ORDER BY c.snapshot_time, c.character_name, c.slot_number',
+                        (since,)).fetchall()
+
+def changed_characters(conn, since):
+    """Names of the characters whose gear changed after `since`"""
+    return [name for name, in conn.execute(
+        'SELECT character_name FROM equipment_characters WHERE last_changed > ? ORDER BY character_name', (since,))]
+
+def current_loadout(conn, names=None):
+    """{character: {slot: (item_id, item_name)}} for all (or the named) characters"""
+    sql = 'SELECT character_name, slot_number, item_id, item_name FROM equipment_current'
+    params = ()
+    if names:
+        sql += f" WHERE character_name IN ({', '.join('?' * len(names))})"
+        params = tuple(names)
+    loadout = {}
+    for name, slot, item_id, item_name in conn.execute(sql + ' ORDER BY character_name, slot_number', params):
+        loadout.setdefault(name, {})[slot] = (item_id, item_name)
+    return loadout
+
+def slot_history(conn, name):
+    """Every change recorded for one character, oldest first"""
+    return conn.execute(CHANGES_SQL + ' WHERE c.character_name = ? ORDER BY c.snapshot_time, c.slot_number',
+                        (name,)).fetchall()
+
+# --- CLI -----------------------------------------------------------------
+
+def parse_time(value):
+    """Unix seconds, 'YYYY-MM-DD[ HH:MM[:SS]]' (local time) or an age like 30m / 2h / 7d"""
+    match = re.fullmatch(r'(\d+)([smhd])', value)
+    if match:
+        return int(time.time()) - int(match.group(1)) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+    if value.isdigit():
+        return int(value)
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return int(time.mktime(time.strptime(value, fmt)))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"unrecognised time: {value}")
+
+def format_time(t):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))
+
+def format_item(item_id, item_name):
+    return f"{item_name} ({item_id})" if item_id else '[Empty]'
+
+def print_changes(rows):
+    for name, slot, t, item_id, item_name, old_id, old_name in rows:
+        print(f"  {format_time(t)}  {name:<15} {SLOT_NAMES.get(slot, slot):<12} "
+              f"{format_item(old_id, old_name)} -> {format_item(item_id, item_name)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest equipment snapshots and query per-slot changes')
+    parser.add_argument('--store', default=STORE_PATH, help='Equipment store database path')
+    parser.add_argument('--equipped', help=f'Ingest write_equipped_items_ini.lua files (default {EQUIPPED_DIR})')
+    parser.add_argument('--snapshots', help='Ingest the equipped_items table from this quest_tasks.db')
+    parser.add_argument('--since', type=parse_time, help='List slot changes after this time')
+    parser.add_argument('--loadout', nargs='*', metavar='NAME', help='Current loadout (all characters if no names)')
+    parser.add_argument('--history', metavar='NAME', help='All recorded changes for one character')
+    parser.add_argument('--json', help='Write --since / --loadout output as JSON')
+    args = parser.parse_args()
+
+    conn = open_store(args.store)
+    querying = args.since is not None or args.loadout is not None or args.history
+    if args.equipped or args.snapshots or not querying:
+        start = time.perf_counter()
+        snapshots = []
+        if args.equipped or not args.snapshots:
+            snapshots += read_ini_snapshots(args.equipped or EQUIPPED_DIR)
+        if args.snapshots:
+            snapshots += read_db_snapshots(args.snapshots)
+        ingested, skipped, changes = ingest(conn, snapshots)
+        print(f"Ingested {ingested} snapshots ({skipped} already stored): {changes} slot changes "
+              f"in {time.perf_counter() - start:.2f}s")
+
+    output = {}
+    if args.since is not None:
+        rows = changed_since(conn, args.since)
+        names = changed_characters(conn, args.since)
+        print(f"\n{len(rows)} slot changes on {len(names)} characters since {format_time(args.since)}:")
+        print_changes(rows)
+        output['since'] = args.since
+        output['characters'] = names
+        output['changes'] = [dict(zip(('character', 'slot', 'time', 'item_id', 'item_name', 'old_item_id', 'old_item_name'), row))
+                             for row in rows]
+
+    if args.loadout is not None:
+        loadout = current_loadout(conn, args.loadout)
+        for name, slots in loadout.items():
+            print(f"\n{name}:")
+            for slot, (item_id, item_name) in slots.items():
+                print(f"  {SLOT_NAMES.get(slot, slot):<12} {format_item(item_id, item_name)}")
+        output['loadout'] = {name: {str(slot): {'id': item_id, 'name': item_name} for slot, (item_id, item_name) in slots.items()}
+                             for name, slots in loadout.items()}
+
+    if args.history:
+        print(f"\n{args.history}:")
+        print_changes(slot_history(conn, args.history))
+
+    conn.close()
+    if args.json and output:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2)
+        print(f"Written to {args.json}")
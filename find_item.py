@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
-import sqlite3
+from linkdb import LinkDB
 
-conn = sqlite3.connect(r'C:\MQ2\lua\yalm2\MQ2LinkDB.db')
-cur = conn.cursor()
+db = LinkDB()
+cur = db.conn
 
 # Search for IDs near 4654
 print("Searching for IDs near 4654:")
@@ -17,12 +17,12 @@ for r in rows:
 
 # Look for common Rogue equipment around this level
 print("\nLet me check item 121564 (Chief Maeder's Leather Belt):")
-row = cur.execute("SELECT id, name, ac, hp, mana, endur, attack, mr, fr, cr, pr, dr, itemtype, slots, classes FROM raw_item_data WHERE id = 121564").fetchone()
-if row:
-    print(f"  ID: {row[0]}")
-    print(f"  Name: {row[1]}")
-    print(f"  AC: {row[2]}, HP: {row[3]}, Mana: {row[4]}, Endur: {row[5]}, Attack: {row[6]}")
-    print(f"  Resists - MR: {row[7]}, FR: {row[8]}, CR: {row[9]}, PR: {row[10]}, DR: {row[11]}")
-    print(f"  Itemtype: {row[12]}, Slots: {row[13]}, Classes: {row[14]}")
+item = db.get_item(121564)
+if item:
+    print(f"  ID: {item['id']}")
+    print(f"  Name: {item['name']}")
+    print(f"  AC: {item['ac']}, HP: {item['hp']}, Mana: {item['mana']}, Endur: {item['endur']}, Attack: {item['attack']}")
+    print(f"  Resists - MR: {item['mr']}, FR: {item['fr']}, CR: {item['cr']}, PR: {item['pr']}, DR: {item['dr']}")
+    print(f"  Itemtype: {item['itemtype']}, Slots: {item['slots']}, Classes: {item['classes']}")
 
-conn.close()
+db.close()
@@ -1,134 +1,466 @@
 #!/usr/bin/env python3
-"""Direct Lucy data importer using Python sqlite3"""
+"""Direct Lucy data importer using Python sqlite3
+
+Lucy items are read and parsed in a process pool; the main process is the
+single writer and streams fixed-column row tuples into raw_item_data with
+executemany inside large transactions.
+
+Column types (INTEGER/REAL/TEXT) and column order come from the cached
+full-corpus profile (lucy_profile.py), since Lucy stores every value as a
+string; --sample-schema infers types from a spread sample instead. After a
+full load the lookup indexes, the slot/class/level equip index
+(equip_index.py) and the item name index (item_names.py) are built and
+ANALYZE is run.
+
+Each run writes a JSON report (phase timings, rows/sec, peak RSS, slow
+statements with their query plans) through instrument.py.
+
+--lucy accepts the loose Lucy directory or a packed archive (lucy_archive.py).
+--incremental compares the Lucy corpus against the manifest kept next to
+the database (see lucy_manifest.py) and only upserts new or changed items
+and deletes items whose files are gone.
+
+--shadow leaves the published database alone: the import runs against a
+copy in shadow_build/, whose derived rankings and armor index are
+recomputed, and which is verified and then published atomically
+(shadow_db.py), so running YALM2 instances keep answering lookups from the
+current version and open the new one on their next connection.
+"""
 
 import sqlite3
 import json
 import os
-import glob
+import sys
+import time
+import argparse
+from multiprocessing import Pool
 from pathlib import Path
 
+import instrument
+import shadow_db
+from lucy_archive import open_lucy
+from lucy_manifest import LucyManifest, manifest_path_for, content_hash, plan_changes
+from equip_index import INDEX_TABLE, build_equip_index, index_exists, refresh_items
+from item_names import NAMES_TABLE, FTS_TABLE, build_name_index, index_exists as name_index_exists, refresh_names
+from linkdb import resolve_db_path
+from lucy_profile import NUMERIC_HOT_COLUMNS, safe_column, value_type, merge_types, load_profile, column_layout
+
 DB_PATH = r'C:\MQ2\resources\MQ2LinkDB.db'
 LUCY_DIR = r'D:\Lucy'
 
-def get_fields_from_sample():
-    """Get field list from first Lucy file"""
-    sample_file = glob.glob(os.path.join(LUCY_DIR, 'lucy_item_*.json'))[0]
-    with open(sample_file, 'r') as f:
-        data = json.load(f)
-    return sorted(data.keys())
+# Files handed to a worker per task, and rows written per transaction
+CHUNK_SIZE = 500
+TRANSACTION_ROWS = 50000
+# Incremental runs commit (and checkpoint the manifest) more often
+CHECKPOINT_ROWS = 5000
+
+# Import-time settings: the table is rebuilt from scratch, so durability of
+# the intermediate states does not matter, only the final commit
+IMPORT_PRAGMAS = [
+    'PRAGMA journal_mode = MEMORY',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',
+]
+
+# Files read to infer the schema, spread evenly over the id range
+SCHEMA_SAMPLE_SIZE = 2000
+
+# Columns the runtime filters and looks up by
+INDEXED_COLUMNS = ['name', 'slots', 'itemtype', 'classes', 'reqlevel']
+
+# Tables a full import recreates (dropped from a shadow copy before the build)
+REBUILT_TABLES = ['raw_item_data', FTS_TABLE, NAMES_TABLE, INDEX_TABLE]
 
-def create_table(fields):
+def convert_value(value, col_type):
+    """Lucy value -> value stored in a column of col_type"""
+    if col_type == 'TEXT':
+        return str(value)
+    if value == '' or value is None:
+        return None
+    try:
+        if col_type == 'INTEGER':
+            return int(value)
+        return float(value)
+    except (TypeError, ValueError):
+        # Column affinity keeps anything unexpected as text
+        return str(value)
+
+def get_schema_from_sample(lucy):
+    """Infer {column: type} from items spread evenly over the id range"""
+    item_ids = lucy.ids()
+    step = max(1, len(item_ids) // SCHEMA_SAMPLE_SIZE)
+    column_types = {}
+    for i in range(0, len(item_ids), step):
+        data = lucy.get(item_ids[i])
+        for field, value in data.items():
+            column = safe_column(field)
+            if column != 'id':
+                column_types[column] = merge_types(column_types.get(column), value_type(value))
+    return {column: col_type or ('INTEGER' if column in NUMERIC_HOT_COLUMNS else 'TEXT')
+            for column, col_type in sorted(column_types.items())}
+
+def get_schema_from_profile(lucy, workers=1):
+    """{column: type} in hot-column order from the cached corpus profile"""
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), 'lucy_profile_cache.json')
+    profile, cached = load_profile(lucy, cache_path, workers)
+    print(f"  Profile {'loaded from cache' if cached else 'rebuilt'}: {profile['items']} items, {len(profile['fields'])} fields")
+    return column_layout(profile)
+
+def create_table(column_types):
     """Create the database table"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = instrument.watch(sqlite3.connect(DB_PATH))
     cur = conn.cursor()
-    
+
     # Drop and recreate
     cur.execute('DROP TABLE IF EXISTS raw_item_data')
-    
+
     # Build CREATE TABLE
     cols = ['id INTEGER PRIMARY KEY']
-    for field in fields:
-        if field != 'id':
-            safe_field = ''.join(c if c.isalnum() or c == '_' else '_' for c in field)
-            cols.append(f'{safe_field} TEXT')
-    
+    for column, col_type in column_types.items():
+        cols.append(f'{column} {col_type}')
+
     sql = 'CREATE TABLE raw_item_data (\n    ' + ',\n    '.join(cols) + '\n)'
-    print(f"Creating table with {len(fields)} columns...")
+    print(f"Creating table with {len(cols)} columns...")
     cur.execute(sql)
     conn.commit()
     print("Table created!")
-    return conn, cur, fields
+    return conn, cur
 
-def insert_lucy_data(conn, cur, fields):
-    """Insert all Lucy data"""
-    lucy_files = sorted(glob.glob(os.path.join(LUCY_DIR, 'lucy_item_*.json')))
-    total = len(lucy_files)
-    
-    print(f"Found {total} Lucy files")
-    print("Starting insert...")
-    
-    success = 0
-    errors = 0
-    
-    for idx, lucy_file in enumerate(lucy_files):
+def get_table_columns(cur):
+    """{column: declared type} of an existing raw_item_data table (without id)"""
+    return {row[1]: (row[2] or 'TEXT').upper() for row in cur.execute('PRAGMA table_info(raw_item_data)') if row[1] != 'id'}
+
+def create_indexes(conn):
+    """Build the lookup indexes and planner statistics"""
+    existing = get_table_columns(conn.cursor())
+    for column in INDEXED_COLUMNS:
+        if column in existing:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_raw_item_data_{column} ON raw_item_data({column})')
+    conn.execute('ANALYZE')
+    conn.commit()
+
+# --- Worker side ---------------------------------------------------------
+
+_worker_lucy = None
+_worker_columns = None
+
+def _init_worker(lucy_path, columns):
+    global _worker_lucy, _worker_columns
+    _worker_lucy = open_lucy(lucy_path, scan=False)
+    _worker_columns = columns
+
+def parse_lucy_item(item_id, raw, columns):
+    """Parse one Lucy item's JSON bytes into (id, hash, row tuple, extras)
+
+    columns is a list of (column, type). The row holds one converted value
+    per column: every field that exists is kept, including 0, False and
+    empty text; fields missing from the file become NULL. Fields with no
+    column yet are returned raw in extras.
+    """
+    data = {safe_column(k): v for k, v in json.loads(raw).items()}
+    row = (item_id,) + tuple(convert_value(data[c], t) if c in data else None for c, t in columns)
+    known = {c for c, _ in columns}
+    extras = {c: v for c, v in data.items() if c != 'id' and c not in known}
+    return item_id, content_hash(raw), row, extras
+
+def _parse_chunk(tasks):
+    results = []
+    errors = []
+    for item_id in tasks:
         try:
-            # Extract item ID from filename
-            item_id = int(lucy_file.split('_')[-1].replace('.json', ''))
-            
-            # Read and parse JSON
-            with open(lucy_file, 'r') as f:
-                data = json.load(f)
-            
-            # Build INSERT with only non-null fields
-            cols = ['id']
-            vals = ['?']
-            params = [item_id]
-            
-            for field in fields:
-                if field == 'id':
-                    continue
-                if field in data:  # Insert ALL fields that exist, including 0, False, empty strings
-                    safe_field = ''.join(c if c.isalnum() or c == '_' else '_' for c in field)
-                    cols.append(safe_field)
-                    vals.append('?')
-                    params.append(str(data[field]))  # Convert to string, including "0"
-            
-            sql = f"INSERT INTO raw_item_data ({', '.join(cols)}) VALUES ({', '.join(vals)})"
-            cur.execute(sql, params)
-            success += 1
-            
-            # Commit every 10000 rows
-            if success % 10000 == 0:
-                conn.commit()
-                pct = (idx+1) / total * 100
-                print(f"Progress: {idx+1}/{total} ({pct:.1f}%) - Success: {success}, Errors: {errors}")
-        
+            raw = _worker_lucy.get_raw(item_id)
+            if raw is None:
+                raise FileNotFoundError('not in Lucy corpus')
+            results.append(parse_lucy_item(item_id, raw, _worker_columns))
         except Exception as e:
+            errors.append((item_id, str(e)))
+    return results, errors
+
+def iter_parsed_chunks(lucy, item_ids, columns, workers):
+    """Yield (results, errors) per chunk of item ids, in id order"""
+    chunks = [item_ids[i:i + CHUNK_SIZE] for i in range(0, len(item_ids), CHUNK_SIZE)]
+    if workers <= 1:
+        global _worker_lucy, _worker_columns
+        _worker_lucy, _worker_columns = lucy, columns
+        for chunk in chunks:
+            yield _parse_chunk(chunk)
+        return
+    with Pool(workers, initializer=_init_worker, initargs=(lucy.path, columns)) as pool:
+        yield from pool.imap(_parse_chunk, chunks)
+
+# --- Writer side ---------------------------------------------------------
+
+def apply_import_pragmas(conn):
+    for pragma in IMPORT_PRAGMAS:
+        conn.execute(pragma)
+
+def apply_extras(cur, added, item_id, extras):
+    """Store fields that have no column yet, adding the columns on the fly
+
+    added maps columns created during this run to their type.
+    """
+    for column, value in extras.items():
+        if column not in added:
+            added[column] = value_type(value) or 'TEXT'
+            cur.execute(f'ALTER TABLE raw_item_data ADD COLUMN {column} {added[column]}')
+            print(f"  Added {added[column]} column for new Lucy field: {column}")
+    assignments = ', '.join(f'{c} = ?' for c in extras)
+    values = [convert_value(v, added[c]) for c, v in extras.items()]
+    cur.execute(f'UPDATE raw_item_data SET {assignments} WHERE id = ?', values + [item_id])
+
+def write_lucy_rows(conn, cur, lucy, item_ids, columns, manifest, workers=1,
+                    known_hashes=None, batch_rows=TRANSACTION_ROWS, verb='INSERT'):
+    """Parse the given Lucy ids and write them to raw_item_data
+
+    Each committed batch is immediately recorded in the manifest. Files whose
+    hash matches known_hashes are not rewritten, only re-stamped.
+    Returns (written, unchanged, errors).
+    """
+    known_hashes = known_hashes or {}
+    columns = list(columns.items())
+    added = {}
+    names = ['id'] + [c for c, _ in columns]
+    sql = f"{verb} INTO raw_item_data ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+    total = len(item_ids)
+
+    written = 0
+    unchanged = 0
+    errors = 0
+    processed = 0
+    checkpoint = []
+    start = time.perf_counter()
+
+    for results, chunk_errors in iter_parsed_chunks(lucy, item_ids, columns, workers):
+        for item_id, message in chunk_errors:
             errors += 1
             if errors <= 5:
-                print(f"Error on {lucy_file}: {e}")
-    
+                print(f"Error on item {item_id}: {message}")
+
+        rows = []
+        for item_id, digest, row, extras in results:
+            size, mtime_ns = lucy.stat(item_id)
+            checkpoint.append((item_id, size, mtime_ns, digest))
+            if known_hashes.get(item_id) == digest:
+                unchanged += 1
+                continue
+            rows.append(row)
+            if extras:
+                with instrument.untraced(conn):
+                    cur.executemany(sql, rows)
+                written += len(rows)
+                instrument.count(len(rows))
+                rows = []
+                apply_extras(cur, added, item_id, extras)
+        with instrument.untraced(conn):
+            cur.executemany(sql, rows)
+        written += len(rows)
+        instrument.count(len(rows))
+        processed += len(results) + len(chunk_errors)
+
+        if len(checkpoint) >= batch_rows:
+            conn.commit()
+            manifest.record(checkpoint)
+            checkpoint = []
+            elapsed = time.perf_counter() - start
+            pct = processed / total * 100
+            print(f"Progress: {processed}/{total} ({pct:.1f}%) - Written: {written}, Errors: {errors}, {processed / elapsed:,.0f} rows/sec")
+
     # Final commit
     conn.commit()
-    
+    manifest.record(checkpoint)
+    elapsed = time.perf_counter() - start
+    print(f"  Elapsed: {elapsed:.1f}s ({processed / elapsed if elapsed else 0:,.0f} rows/sec)")
+    return written, unchanged, errors
+
+def insert_lucy_data(conn, cur, lucy, column_types, workers=1):
+    """Insert all Lucy data"""
+    total = len(lucy)
+
+    print(f"Found {total} Lucy files")
+    print(f"Starting insert with {workers} worker(s)...")
+
+    apply_import_pragmas(conn)
+    manifest = LucyManifest(manifest_path_for(DB_PATH))
+    manifest.clear()
+
+    with instrument.phase('insert'):
+        success, _, errors = write_lucy_rows(conn, cur, lucy, list(lucy.ids()), column_types, manifest, workers)
+    manifest.close()
+
+    print("Building indexes and statistics...")
+    with instrument.phase('equip_index') as phase:
+        equip_rows = build_equip_index(conn)
+        phase.count(equip_rows)
+    print(f"  Equip index rows: {equip_rows}")
+    with instrument.phase('name_index') as phase:
+        names = build_name_index(conn)
+        phase.count(names)
+    print(f"  Item names indexed: {names}")
+    with instrument.phase('indexes'):
+        create_indexes(conn)
+
     print(f"\nComplete!")
     print(f"  Processed: {total}")
     print(f"  Success: {success}")
     print(f"  Errors: {errors}")
-    
+
     # Verify
     cur.execute('SELECT COUNT(*) FROM raw_item_data')
     db_count = cur.fetchone()[0]
     print(f"  Items in database: {db_count}")
-    
+
     cur.execute('SELECT COUNT(*) FROM raw_item_data WHERE ac > 0')
     ac_count = cur.fetchone()[0]
     print(f"  Items with AC: {ac_count}")
-    
+
     cur.execute('SELECT COUNT(*) FROM raw_item_data WHERE ac > 0 AND slots > 0')
     slots_count = cur.fetchone()[0]
     print(f"  Items with AC and slots: {slots_count}")
 
+def incremental_update(workers=1):
+    """Upsert new/changed Lucy items and delete items whose files are gone"""
+    conn = instrument.watch(sqlite3.connect(DB_PATH))
+    cur = conn.cursor()
+    columns = get_table_columns(cur)
+    if not columns:
+        print("raw_item_data does not exist - run a full import first")
+        conn.close()
+        return
+
+    with instrument.phase('plan'):
+        manifest = LucyManifest(manifest_path_for(DB_PATH))
+        known = manifest.load()
+        lucy = open_lucy(LUCY_DIR)
+        candidates, deleted = plan_changes(lucy.stats(), known)
+
+    print(f"Lucy items: {len(lucy)}, manifest entries: {len(known)}")
+    print(f"  New or modified (by size/mtime): {len(candidates)}")
+    print(f"  Deleted: {len(deleted)}")
+
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -262144')
+
+    known_hashes = {item_id: known[item_id][2] for item_id in candidates if item_id in known}
+    with instrument.phase('upsert'):
+        written, unchanged, errors = write_lucy_rows(
+            conn, cur, lucy, candidates, columns, manifest, workers,
+            known_hashes=known_hashes, batch_rows=CHECKPOINT_ROWS, verb='INSERT OR REPLACE')
+
+    with instrument.phase('delete') as phase:
+        for i in range(0, len(deleted), CHECKPOINT_ROWS):
+            batch = deleted[i:i + CHECKPOINT_ROWS]
+            cur.executemany('DELETE FROM raw_item_data WHERE id = ?', ((item_id,) for item_id in batch))
+            conn.commit()
+            manifest.remove(batch)
+            phase.count(len(batch))
+
+    with instrument.phase('refresh_indexes'):
+        if index_exists(conn):
+            refresh_items(conn, candidates + deleted)
+        if name_index_exists(conn):
+            refresh_names(conn, candidates + deleted)
+
+        # Refresh planner statistics only where the changes made them stale
+        conn.execute('PRAGMA optimize')
+
+    manifest.close()
+    lucy.close()
+    conn.close()
+
+    print(f"\nIncremental update complete!")
+    print(f"  Upserted: {written}")
+    print(f"  Unchanged content (touched only): {unchanged}")
+    print(f"  Deleted: {len(deleted)}")
+    print(f"  Errors: {errors}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Rebuild raw_item_data from Lucy JSON files')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--lucy', '--lucy-dir', dest='lucy', default=LUCY_DIR,
+                        help='Directory of lucy_item_*.json files or a packed .lpak archive')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Parser processes (1 = parse in the writer process)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only apply Lucy files that changed since the last import (manifest-driven)')
+    parser.add_argument('--sample-schema', action='store_true',
+                        help='Infer column types from a sample instead of the full-corpus profile')
+    parser.add_argument('--shadow', action='store_true',
+                        help='Build into a copy, verify it and publish it atomically instead of rebuilding in place')
+    parser.add_argument('--no-publish', action='store_true',
+                        help='With --shadow: verify but leave the build in shadow_build/ (shadow_db.py publish)')
+    return parser.parse_args()
+
 if __name__ == '__main__':
+    args = parse_args()
+    LIVE_PATH = args.db
+    # In place means in the published version (a shadow build may have moved it)
+    DB_PATH = resolve_db_path(LIVE_PATH)
+    LUCY_DIR = args.lucy
+    workers = max(1, args.workers)
+
     print("=== Lucy Data Importer ===")
     print(f"Database: {DB_PATH}")
     print(f"Lucy Dir: {LUCY_DIR}")
     print()
-    
-    # Get fields
-    print("Step 1: Reading Lucy schema...")
-    fields = get_fields_from_sample()
-    print(f"  Found {len(fields)} fields")
-    print(f"  Sample: {', '.join(fields[:12])}...")
-    print()
-    
-    # Create table
-    print("Step 2: Creating table...")
-    conn, cur, fields = create_table(fields)
-    print()
-    
-    # Insert data
-    print("Step 3: Inserting data...")
-    insert_lucy_data(conn, cur, fields)
-    
-    conn.close()
+
+    published = True
+    with instrument.run('import_lucy', db_path=LIVE_PATH, args=vars(args)):
+        if args.shadow:
+            with instrument.phase('shadow_copy'):
+                DB_PATH = shadow_db.prepare(LIVE_PATH, drop=[] if args.incremental else REBUILT_TABLES)
+            print()
+
+        if args.incremental:
+            print("Incremental update from manifest...")
+            incremental_update(workers)
+        else:
+            # Get fields
+            print("Step 1: Reading Lucy schema...")
+            lucy = open_lucy(LUCY_DIR)
+            with instrument.phase('schema'):
+                if args.sample_schema:
+                    column_types = get_schema_from_sample(lucy)
+                else:
+                    column_types = get_schema_from_profile(lucy, workers)
+            type_counts = {t: list(column_types.values()).count(t) for t in ('INTEGER', 'REAL', 'TEXT')}
+            print(f"  Found {len(column_types)} fields ({', '.join(f'{n} {t}' for t, n in type_counts.items())})")
+            print(f"  Sample: {', '.join(list(column_types)[:12])}...")
+            print()
+
+            # Create table
+            print("Step 2: Creating table...")
+            conn, cur = create_table(column_types)
+            print()
+
+            # Insert data
+            print("Step 3: Inserting data...")
+            insert_lucy_data(conn, cur, lucy, column_types, workers=workers)
+
+            lucy.close()
+            conn.close()
+
+        if args.shadow:
+            print("\nRebuilding derived tables...")
+            with instrument.phase('derived_tables'):
+                for table, status in shadow_db.rebuild_derived(DB_PATH):
+                    print(f"  {table}: {status}")
+
+            print("\nVerifying shadow build...")
+            with instrument.phase('verify'):
+                lucy = open_lucy(LUCY_DIR)
+                published = shadow_db.print_checks(shadow_db.verify(DB_PATH, LIVE_PATH, set(lucy.ids())))
+                lucy.close()
+            if not published:
+                print(f"Not published - the current database is untouched; the build is in {DB_PATH}")
+            elif args.no_publish:
+                print(f"Verified; publish with: python shadow_db.py publish --db {LIVE_PATH}")
+            else:
+                with instrument.phase('publish'):
+                    mode, path = shadow_db.publish(DB_PATH, LIVE_PATH)
+                    removed, busy = shadow_db.prune(LIVE_PATH)
+                print(f"Published {path} ({'renamed over the live file' if mode == 'replaced' else 'version pointer'})")
+                if removed or busy:
+                    print(f"  Pruned {len(removed)} old version(s)" + (f"; still open: {', '.join(busy)}" if busy else ''))
+
+    sys.exit(0 if published else 1)
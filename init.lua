@@ -449,6 +449,7 @@ local function main()
 				loader.manage(global_settings.conditions, configuration.types.condition)
 				loader.manage(global_settings.helpers, configuration.types.helpers)
 				loader.manage(global_settings.subcommands, configuration.types.subcommand)
+				YALM2_Database.CheckPublished()
 				last_loader_check = current_time
 			end
 
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Phase timing, throughput and SQLite query instrumentation for the DB tools
+
+    import instrument
+
+    with instrument.run('import_lucy', db_path=args.db, args=vars(args)):
+        instrument.watch(conn)                     # slow-query log on this connection
+        with instrument.phase('insert') as p:
+            ...
+            p.count(len(rows))                     # rows/sec for the phase
+        instrument.explain(conn, sql, params)      # capture EXPLAIN QUERY PLAN now
+
+Every helper is a no-op outside instrument.run(), so library code can be
+instrumented without callers having to opt in.
+
+The slow-query log uses SQLite's hooks: the trace callback marks when each
+statement starts, and a progress handler (every PROGRESS_OPS VM steps)
+notices statements still running after the threshold. Their duration is
+measured up to the last progress tick, and their query plans are captured
+when the phase ends. Statements that finish quickly only cost the trace
+callback, but SQLite expands every bound statement for it, which is
+noticeable on wide executemany inserts: wrap those in
+instrument.untraced(conn) (the phase still times them).
+
+When the run ends, a JSON report <tool>_<YYYYmmdd_HHMMSS>.json is written
+to YALM2_RUN_REPORTS from the environment, or else to run_reports next to
+the db_path given to run() (next to the running script when there is
+none); either way the directory is absolute, never relative to the cwd.
+It holds the phases (seconds, rows, rows/s, peak RSS so far), the run's
+peak RSS, the slow statements with their plans and the explicitly
+explained statements. A summary is printed as well.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+
+REPORT_DIR_NAME = 'run_reports'
+
+SLOW_MS = 250
+PROGRESS_OPS = 20000
+MAX_SQL_CHARS = 2000
+# Statements with no useful plan
+NO_PLAN = ('BEGIN', 'COMMIT', 'ROLLBACK', 'END', 'SAVEPOINT', 'RELEASE', 'PRAGMA', 'CREATE',
+           'DROP', 'ALTER', 'ANALYZE', 'VACUUM', 'ATTACH', 'DETACH', 'REINDEX')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b-?\d+(?:\.\d+)?\b")
+
+_active = None
+
+def report_dir_for(db_path=None):
+    """YALM2_RUN_REPORTS, or run_reports next to db_path (or the running script)"""
+    override = os.environ.get('YALM2_RUN_REPORTS')
+    if override:
+        return os.path.abspath(override)
+    anchor = db_path or sys.argv[0] or os.getcwd()
+    return os.path.join(os.path.dirname(os.path.abspath(anchor)), REPORT_DIR_NAME)
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals with ? (trace gives expanded SQL)"""
+    return ' '.join(_LITERALS.sub('?', sql).split())[:MAX_SQL_CHARS]
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB"""
+    try:
+        import resource
+        scale = 1 if sys.platform == 'darwin' else 1024
+        usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                    resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        return usage * scale / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / 2 ** 20
+    except (ImportError, AttributeError, OSError):
+        pass
+    return None
+
+def query_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN rows as indented text lines"""
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    depth = {0: 0}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, 0) + 1
+        lines.append('  ' * (depth[node] - 1) + detail)
+    return lines
+
+class Phase:
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    def count(self, rows=1):
+        self.rows += rows
+
+    def to_dict(self):
+        return {'name': self.name, 'seconds': round(self.seconds, 4), 'rows': self.rows,
+                'rows_per_s': round(self.rows / self.seconds, 1) if self.rows and self.seconds else None}
+
+class QueryLog:
+    """Trace/progress hooks on one connection"""
+
+    def __init__(self, run, conn, slow_ms):
+        self.run = run
+        self.conn = conn
+        self.slow_s = slow_ms / 1000
+        self.statements = 0
+        self.current = None          # (sql, start)
+        self.elapsed = 0.0           # of the current statement, at the last progress tick
+        conn.set_trace_callback(self._trace)
+        conn.set_progress_handler(self._progress, PROGRESS_OPS)
+
+    def _trace(self, sql):
+        self._finish()
+        self.statements += 1
+        self.current = (sql, time.perf_counter())
+
+    def _progress(self):
+        if self.current:
+            self.elapsed = time.perf_counter() - self.current[1]
+        return 0
+
+    def _finish(self):
+        if self.current and self.elapsed >= self.slow_s:
+            self.run.record_slow(self, self.current[0], self.elapsed)
+        self.current = None
+        self.elapsed = 0.0
+
+    def close(self):
+        self._finish()
+        try:
+            self.conn.set_trace_callback(None)
+            self.conn.set_progress_handler(None, PROGRESS_OPS)
+        except sqlite3.ProgrammingError:
+            pass    # connection already closed
+
+class RunReport:
+    def __init__(self, tool, report_dir=None, args=None, slow_ms=SLOW_MS, db_path=None):
+        self.tool = tool
+        self.report_dir = report_dir or report_dir_for(db_path)
+        self.args = args or {}
+        self.slow_ms = slow_ms
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.phases = []
+        self.stack = []
+        self.logs = []
+        self.slow = {}               # normalized sql -> entry
+        self.pending_plans = []      # (log, key, expanded sql)
+        self.explained = []
+        self.path = None
+
+    @contextmanager
+    def phase(self, name):
+        phase = Phase('/'.join([p.name for p in self.stack] + [name]))
+        self.stack.append(phase)
+        try:
+            yield phase
+        finally:
+            self.stack.pop()
+            for log in self.logs:
+                log._finish()
+            phase.seconds = time.perf_counter() - phase.start
+            entry = phase.to_dict()
+            entry['peak_rss_mb'] = peak_rss_mb()
+            self.phases.append(entry)
+            self._capture_plans()
+            rate = f", {entry['rows_per_s']:,.0f} rows/s" if entry['rows_per_s'] else ''
+            print(f"  [{phase.name}] {phase.seconds:.2f}s{rate}")
+
+    def count(self, rows=1):
+        if self.stack:
+            self.stack[-1].count(rows)
+
+    def watch(self, conn, slow_ms=None):
+        log = QueryLog(self, conn, self.slow_ms if slow_ms is None else slow_ms)
+        self.logs.append(log)
+        return conn
+
+    def record_slow(self, log, sql, seconds):
+        key = normalize_sql(sql)
+        entry = self.slow.get(key)
+        if entry is None:
+            entry = self.slow[key] = {'sql': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                      'phase': self.stack[-1].name if self.stack else None, 'plan': None}
+            if not key.upper().startswith(NO_PLAN):
+                self.pending_plans.append((log, key, sql))
+        entry['count'] += 1
+        entry['total_ms'] += seconds * 1000
+        entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+
+    def _capture_plans(self):
+        pending, self.pending_plans = self.pending_plans, []
+        for log, key, sql in pending:
+            try:
+                self.slow[key]['plan'] = self._explain(log.conn, sql)
+            except sqlite3.Error as e:
+                self.slow[key]['plan'] = [f'unavailable: {e}']
+
+    def _explain(self, conn, sql, params=()):
+        # Keep the plan query itself out of the slow log
+        log = next((l for l in self.logs if l.conn is conn), None)
+        if log:
+            conn.set_trace_callback(None)
+        try:
+            return query_plan(conn, sql, params)
+        finally:
+            if log:
+                conn.set_trace_callback(log._trace)
+
+    @contextmanager
+    def untraced(self, conn):
+        log = next((l for l in self.logs if l.conn is conn), None)
+        if log is None:
+            yield
+            return
+        log._finish()
+        conn.set_trace_callback(None)
+        try:
+            yield
+        finally:
+            conn.set_trace_callback(log._trace)
+
+    def explain(self, conn, sql, params=(), label=None):
+        try:
+            plan = self._explain(conn, sql, params)
+        except sqlite3.Error as e:
+            plan = [f'unavailable: {e}']
+        self.explained.append({'label': label, 'phase': self.stack[-1].name if self.stack else None,
+                               'sql': ' '.join(sql.split())[:MAX_SQL_CHARS], 'plan': plan})
+        return plan
+
+    def to_dict(self, status, error=None):
+        return {
+            'tool': self.tool,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'seconds': round(time.perf_counter() - self.start, 3),
+            'status': status,
+            'error': error,
+            'args': self.args,
+            'argv': sys.argv,
+            'python': sys.version.split()[0],
+            'sqlite': sqlite3.sqlite_version,
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': self.phases,
+            'statements_traced': sum(log.statements for log in self.logs),
+            'slow_ms': self.slow_ms,
+            'slow_queries': sorted(self.slow.values(), key=lambda e: -e['total_ms']),
+            'explained': self.explained,
+        }
+
+    def write(self, status='ok', error=None):
+        for log in self.logs:
+            log.close()
+        self._capture_plans()
+        report = self.to_dict(status, error)
+        os.makedirs(self.report_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started))
+        self.path = os.path.join(self.report_dir, f'{self.tool}_{stamp}.json')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        return report
+
+    def print_summary(self, report):
+        print()
+        print(f"Run report: {self.path}")
+        rss = report['peak_rss_mb']
+        print(f"  {report['seconds']:.2f}s total, peak RSS {f'{rss:.0f} MB' if rss else 'n/a'}, "
+              f"{report['statements_traced']} statements traced")
+        for entry in report['slow_queries'][:5]:
+            print(f"  slow x{entry['count']} {entry['total_ms']:,.0f} ms: {entry['sql'][:100]}")
+            for line in entry['plan'] or []:
+                print(f"      {line}")
+
+@contextmanager
+def run(tool, report_dir=None, args=None, slow_ms=SLOW_MS, db_path=None):
+    """Activate a RunReport for the duration of the block and write it afterwards
+
+    db_path is the database the tool opens; the report goes next to it unless
+    report_dir or YALM2_RUN_REPORTS says otherwise.
+    """
+    global _active
+    report = _active = RunReport(tool, report_dir, args, slow_ms, db_path)
+    status, error = 'ok', None
+    try:
+        yield report
+    except BaseException as e:
+        status, error = 'error', f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        _active = None
+        report.print_summary(report.write(status, error))
+
+def phase(name):
+    return _active.phase(name) if _active else _NullPhase()
+
+def count(rows=1):
+    if _active:
+        _active.count(rows)
+
+def watch(conn, slow_ms=None):
+    return _active.watch(conn, slow_ms) if _active else conn
+
+def untraced(conn):
+    return _active.untraced(conn) if _active else _NullPhase()
+
+def explain(conn, sql, params=(), label=None):
+    return _active.explain(conn, sql, params, label) if _active else None
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, rows=1):
+        pass
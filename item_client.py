@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Client for the item lookup daemon (item_daemon.py)
+
+    from item_client import open_items
+
+    with open_items() as items:                   # daemon if running, else in-process
+        row = items.item(121564)                  # QueryDatabaseForItemId columns
+        rows = items.items([121564, 4654])        # list aligned with the ids (None = missing)
+        stats = items.stats([121564])             # get_item_stats records
+        found = items.name('Bark Treant')         # {'matches': [...], 'item': best match row}
+        hits = items.filter(char_class='Rogue', slot=13, reqlevel_max=70)
+        results = items.pipeline([('item', {'item_id': 1}), ('item', {'item_id': 2})])
+
+The protocol is one JSON object per line in each direction. A request is
+{"op": ..., "seq": optional tag, ...params}; the reply is
+{"seq": ..., "ok": true, "result": ...} or {"seq": ..., "ok": false,
+"error": ...}, in request order, so any number of requests can be sent
+before reading the replies.
+
+Usage:
+    python item_client.py 121564 4654 [--columns name slots]
+    python item_client.py --name "Bark Treant" [--quest]
+    python item_client.py --filter class=Rogue slot=13 reqlevel_max=70
+    python item_client.py --metrics | --ping | --reload | --shutdown
+    python item_client.py --bench 10000
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+
+HOST = '127.0.0.1'
+PORT = int(os.environ.get('YALM2_ITEM_DAEMON_PORT', 47811))
+TIMEOUT = 10
+
+class DaemonError(RuntimeError):
+    pass
+
+class _ItemAPI:
+    def item(self, item_id, columns=None):
+        return self.request('item', item_id=item_id, columns=columns)
+
+    def items(self, item_ids, columns=None):
+        return self.request('items', item_ids=list(item_ids), columns=columns)
+
+    def stats(self, item_ids):
+        return self.request('stats', item_ids=list(item_ids))
+
+    def name(self, name, quest=False, limit=10):
+        return self.request('name', name=name, quest=quest, limit=limit)
+
+    def filter(self, char_class=None, classes=None, slot=None, slots=None, itemtype=None,
+               reqlevel_min=None, reqlevel_max=None, stat_min=None, limit=None):
+        params = {'class': char_class, 'classes': classes, 'slot': slot, 'slots': slots, 'itemtype': itemtype,
+                  'reqlevel_min': reqlevel_min, 'reqlevel_max': reqlevel_max, 'stat_min': stat_min, 'limit': limit}
+        return self.request('filter', **{k: v for k, v in params.items() if v is not None})
+
+    def metrics(self):
+        return self.request('metrics')
+
+    def ping(self):
+        return self.request('ping')
+
+    def reload(self):
+        return self.request('reload')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def _result(response):
+    if not response.get('ok'):
+        raise DaemonError(response.get('error', 'request failed'))
+    return response.get('result')
+
+class ItemClient(_ItemAPI):
+    """Connection to a running item_daemon.py"""
+
+    def __init__(self, host=HOST, port=PORT, timeout=TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise DaemonError('connection closed by the daemon')
+        return json.loads(line)
+
+    def request(self, op, **params):
+        self.sock.sendall(json.dumps(dict(params, op=op)).encode() + b'\n')
+        return _result(self._read())
+
+    def pipeline(self, requests, raise_errors=True):
+        """Send every (op, params) before reading any reply -> results in order
+
+        With raise_errors=False failed requests come back as DaemonError instances.
+        """
+        payload = b''.join(json.dumps(dict(params, op=op, seq=i)).encode() + b'\n'
+                           for i, (op, params) in enumerate(requests))
+        self.sock.sendall(payload)
+        results = []
+        for _ in requests:
+            response = self._read()
+            if response.get('ok') or raise_errors:
+                results.append(_result(response))
+            else:
+                results.append(DaemonError(response.get('error')))
+        return results
+
+    def shutdown(self):
+        return self.request('shutdown')
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+class LocalItems(_ItemAPI):
+    """Same calls answered in this process (no daemon running)"""
+
+    def __init__(self, db_path=None):
+        from item_daemon import ItemService
+        self.service = ItemService(db_path) if db_path else ItemService()
+
+    def request(self, op, **params):
+        return _result(self.service.handle(dict(params, op=op)))
+
+    def pipeline(self, requests, raise_errors=True):
+        results = []
+        for op, params in requests:
+            response = self.service.handle(dict(params, op=op))
+            if response.get('ok') or raise_errors:
+                results.append(_result(response))
+            else:
+                results.append(DaemonError(response.get('error')))
+        return results
+
+    def close(self):
+        self.service.close()
+
+def open_items(host=HOST, port=PORT, db_path=None, fallback=True):
+    """ItemClient when the daemon answers, else LocalItems (unless fallback=False)"""
+    try:
+        return ItemClient(host, port, timeout=TIMEOUT)
+    except OSError:
+        if not fallback:
+            raise
+        return LocalItems(db_path)
+
+def parse_filter(terms):
+    """['class=Rogue', 'slot=13'] -> filter() keyword arguments"""
+    kwargs = {}
+    for term in terms:
+        key, _, value = term.partition('=')
+        key = 'char_class' if key == 'class' else key
+        if key == 'itemtype':
+            kwargs[key] = [int(v) for v in value.split(',')]
+        elif key.startswith('min_'):
+            kwargs.setdefault('stat_min', {})[key[4:]] = int(value)
+        else:
+            kwargs[key] = value if key == 'char_class' else int(value, 0)
+    return kwargs
+
+def bench(client, count):
+    ids = client.filter(limit=count)['ids']
+    if not ids:
+        print("No items to look up")
+        return
+    start = time.perf_counter()
+    for item_id in ids:
+        client.item(item_id)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    client.pipeline([('item', {'item_id': item_id}) for item_id in ids])
+    piped = time.perf_counter() - start
+    start = time.perf_counter()
+    client.items(ids)
+    batch = time.perf_counter() - start
+    print(f"{len(ids)} lookups ({type(client).__name__})")
+    print(f"  one at a time  {single * 1e6 / len(ids):8.1f} us/item")
+    print(f"  pipelined      {piped * 1e6 / len(ids):8.1f} us/item")
+    print(f"  one batch      {batch * 1e6 / len(ids):8.1f} us/item")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Look items up through the item daemon')
+    parser.add_argument('ids', nargs='*', type=int, help='Item ids')
+    parser.add_argument('--columns', nargs='+', help='Columns to return (default QueryDatabaseForItemId)')
+    parser.add_argument('--name', help='Resolve an item name')
+    parser.add_argument('--quest', action='store_true', help='Only quest items (--name)')
+    parser.add_argument('--filter', nargs='+', metavar='KEY=VALUE',
+                        help='class, classes, slot, slots, itemtype, reqlevel_min, reqlevel_max, limit, min_<stat>')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--local', action='store_true', help='Answer in-process even if the daemon is running')
+    parser.add_argument('--no-fallback', action='store_true', help='Fail if the daemon is not running')
+    parser.add_argument('--metrics', action='store_true')
+    parser.add_argument('--ping', action='store_true')
+    parser.add_argument('--reload', action='store_true', help='Make the daemon reopen the database')
+    parser.add_argument('--shutdown', action='store_true')
+    parser.add_argument('--bench', type=int, metavar='N', help='Time N lookups')
+    args = parser.parse_args()
+
+    try:
+        client = LocalItems() if args.local else open_items(port=args.port, fallback=not args.no_fallback)
+    except OSError as e:
+        print(f"Error: {e}" if not args.no_fallback else f"Item daemon not reachable on port {args.port}: {e}")
+        sys.exit(1)
+
+    try:
+        with client:
+            if args.shutdown:
+                print(client.shutdown())
+            elif args.ping:
+                print(client.ping())
+            elif args.reload:
+                print(client.reload())
+            elif args.metrics:
+                print(json.dumps(client.metrics(), indent=2))
+            elif args.bench:
+                bench(client, args.bench)
+            elif args.name:
+                found = client.name(args.name, args.quest)
+                for match in found['matches']:
+                    print(f"  {match['id']:7d} {match['match']:8s} {match['name']}")
+            elif args.filter:
+                result = client.filter(**parse_filter(args.filter))
+                print(f"{result['count']} items match: {' '.join(map(str, result['ids'][:50]))}"
+                      f"{' ...' if result['count'] > 50 else ''}")
+            else:
+                for item_id, row in zip(args.ids, client.items(args.ids, args.columns)):
+                    print(f"{item_id}: {json.dumps(row) if row else 'not found'}")
+    except DaemonError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
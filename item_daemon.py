@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""Long-lived item lookup daemon for MQ2LinkDB
+
+Diagnostic scripts each pay interpreter start-up, a connection open and a
+cold page cache for one lookup. This keeps one tuned read-only connection
+(linkdb.connect) open, with the QueryDatabaseForItemId column list
+prepared and warm, and answers JSON-lines requests on a local TCP port
+(item_client.py is the client library):
+
+    item     {"item_id": 121564, "columns": [...]}    row dict or null
+    items    {"item_ids": [...], "columns": [...]}    rows aligned with the ids
+    stats    {"item_ids": [...]}                      get_item_stats records
+    name     {"name": "Bark Treants", "quest": false} exact / singular / fuzzy
+                                                      matches (item_names.py)
+                                                      and the best match's row
+    filter   {"class": "Rogue", "slot": 13, "reqlevel_max": 70, ...}
+                                                      ids whose bitmasks and
+                                                      levels match, from stat
+                                                      arrays held in memory
+    metrics / ping / reload / shutdown
+
+Requests on one connection may be pipelined; replies come back in order.
+A single thread serves every connection through selectors, so lookups
+share one connection, one statement cache and one row cache. The database
+file (or the version the MQ2LinkDB.current pointer names, after a shadow
+rebuild) is re-checked every RELOAD_CHECK_S and reopened when it changes
+(reload forces it).
+
+Usage:
+    python item_daemon.py [--db PATH] [--port N] [--snapshot FILE] [--no-warm]
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import selectors
+from collections import deque
+
+import numpy as np
+
+from linkdb import (DB_PATH, ITEM_COLUMNS, CHUNK_SIZE, STAT_FIELDS, StatsCache, connect, normalize_stats,
+                    resolve_db_path)
+from item_rules import CLASS_BITS, normalize_class
+from item_names import index_exists, resolve_name, register_functions
+from item_client import HOST, PORT
+from upgrade_scoring import STAT_COLUMNS, load_stat_arrays
+
+ROW_CACHE_SIZE = 50000
+RELOAD_CHECK_S = 2.0
+FILTER_LIMIT = 1000
+MAX_LINE = 4 * 1024 * 1024
+LATENCY_SAMPLES = 2048
+
+class RequestError(ValueError):
+    pass
+
+class OpMetrics:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, ms, ok):
+        self.count += 1
+        self.errors += not ok
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.samples.append(ms)
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 4) if ordered else None
+        return {'count': self.count, 'errors': self.errors,
+                'avg_ms': round(self.total_ms / self.count, 4) if self.count else None,
+                'p50_ms': pct(0.5), 'p99_ms': pct(0.99), 'max_ms': round(self.max_ms, 4)}
+
+class ItemService:
+    """Request handler shared by the daemon and item_client.LocalItems"""
+
+    def __init__(self, db_path=DB_PATH, snapshot=None):
+        self.db_path = db_path
+        self.snapshot = snapshot
+        self.started = time.time()
+        self.metrics = {}
+        self.connections = 0
+        self.reloads = -1
+        self.stopping = False
+        self.conn = None
+        self.open()
+
+    # --- Database ----------------------------------------------------------
+
+    def _source(self):
+        path = resolve_db_path(self.db_path)
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    def open(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.source = self._source()
+        self.checked = time.monotonic()
+        self.path = self.source[0]
+        self.conn = connect(self.path)
+        register_functions(self.conn)
+        existing = [row[1] for row in self.conn.execute('PRAGMA table_info(raw_item_data)')]
+        self.columns = ['id'] + [c for c in ITEM_COLUMNS if c != 'id' and c in existing]
+        self.existing = set(existing)
+        self.item_sql = f"SELECT {', '.join(self.columns)} FROM raw_item_data WHERE id = ?"
+        self.batch_sql = (f"SELECT {', '.join(self.columns)} FROM raw_item_data "
+                          f"WHERE id IN ({', '.join('?' * CHUNK_SIZE)})")
+        self.has_names = index_exists(self.conn)
+        self.rows = StatsCache(ROW_CACHE_SIZE)
+        self.stats_cache = StatsCache(ROW_CACHE_SIZE)
+        self.ids = self.arrays = None
+        self.loaded = time.time()
+        self.reloads += 1
+
+    def warm(self):
+        """Read every row once (page cache / mmap) and load the filter arrays"""
+        start = time.perf_counter()
+        count = 0
+        for _ in self.conn.execute(f"SELECT {', '.join(self.columns)} FROM raw_item_data"):
+            count += 1
+        self.conn.execute(self.item_sql, (0,)).fetchall()
+        self.conn.execute(self.batch_sql, [0] * CHUNK_SIZE).fetchall()
+        self._filter_arrays()
+        return count, time.perf_counter() - start
+
+    def check_source(self):
+        """Reopen when the database file changed (at most every RELOAD_CHECK_S)"""
+        now = time.monotonic()
+        if now - self.checked < RELOAD_CHECK_S:
+            return False
+        self.checked = now
+        try:
+            if self._source() == self.source:
+                return False
+        except OSError:
+            return False    # mid-replace; keep serving the open file
+        self.open()
+        return True
+
+    def _filter_arrays(self):
+        if self.ids is None:
+            if self.snapshot:
+                from stat_snapshot import StatSnapshot
+                snap = StatSnapshot(self.snapshot)
+                if snap.is_current(self.path):
+                    self.ids, self.arrays = snap.stat_arrays()
+                else:
+                    snap.close()
+            if self.ids is None:
+                self.ids, self.arrays = load_stat_arrays(self.conn, '1')
+        return self.ids, self.arrays
+
+    # --- Operations --------------------------------------------------------
+
+    def _columns(self, columns):
+        if not columns:
+            return None
+        unknown = [c for c in columns if c not in self.existing]
+        if unknown:
+            raise RequestError(f"unknown column(s): {', '.join(unknown)}")
+        return ['id'] + [c for c in columns if c != 'id']
+
+    def get_rows(self, item_ids, columns=None):
+        """Rows aligned with item_ids (None where missing)"""
+        cols = self._columns(columns)
+        if cols:
+            found = {}
+            unique = list(dict.fromkeys(item_ids))
+            sql = f"SELECT {', '.join(cols)} FROM raw_item_data WHERE id IN ({', '.join('?' * CHUNK_SIZE)})"
+            for i in range(0, len(unique), CHUNK_SIZE):
+                chunk = unique[i:i + CHUNK_SIZE]
+                for row in self.conn.execute(sql, chunk + [chunk[-1]] * (CHUNK_SIZE - len(chunk))):
+                    found[row[0]] = dict(zip(cols, row))
+            return [found.get(i) for i in item_ids]
+
+        found = {}
+        missing = []
+        for item_id in dict.fromkeys(item_ids):
+            row = self.rows.get(item_id)
+            if row is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = row
+        if len(missing) == 1:
+            row = self.conn.execute(self.item_sql, missing).fetchone()
+            if row:
+                found[row[0]] = dict(zip(self.columns, row))
+                self.rows.put(row[0], found[row[0]])
+        else:
+            for i in range(0, len(missing), CHUNK_SIZE):
+                chunk = missing[i:i + CHUNK_SIZE]
+                for row in self.conn.execute(self.batch_sql, chunk + [chunk[-1]] * (CHUNK_SIZE - len(chunk))):
+                    found[row[0]] = dict(zip(self.columns, row))
+                    self.rows.put(row[0], found[row[0]])
+        return [found.get(i) for i in item_ids]
+
+    def op_item(self, item_id, columns=None):
+        return self.get_rows([_item_id(item_id)], columns)[0]
+
+    def op_items(self, item_ids, columns=None):
+        return self.get_rows([_item_id(i) for i in item_ids], columns)
+
+    def op_stats(self, item_ids):
+        item_ids = [_item_id(i) for i in item_ids]
+        result = {}
+        missing = []
+        for item_id in item_ids:
+            stats = self.stats_cache.get(item_id)
+            if stats is None:
+                missing.append(item_id)
+            else:
+                result[item_id] = stats
+        if missing:
+            for row in self.get_rows(missing, list(STAT_FIELDS.values())):
+                if row:
+                    result[row['id']] = normalize_stats(row)
+                    self.stats_cache.put(row['id'], result[row['id']])
+        return [result.get(i) for i in item_ids]
+
+    def op_name(self, name, quest=False, limit=10):
+        if not isinstance(name, str) or not name.strip():
+            raise RequestError('name must be a non-empty string')
+        if self.has_names:
+            matches = [{'id': item_id, 'name': found, 'match': match}
+                       for item_id, found, match in resolve_name(self.conn, name, bool(quest), int(limit))]
+        else:
+            quest_filter = ' AND CAST(questitem AS INTEGER) = 1' if quest and 'questitem' in self.existing else ''
+            matches = [{'id': item_id, 'name': found, 'match': 'exact'} for item_id, found in self.conn.execute(
+                f'SELECT id, name FROM raw_item_data WHERE name = ?{quest_filter} ORDER BY id LIMIT ?',
+                (name, int(limit)))]
+        return {'matches': matches, 'item': self.get_rows([matches[0]['id']])[0] if matches else None}
+
+    def op_filter(self, **params):
+        ids, arrays = self._filter_arrays()
+        mask = np.ones(len(ids), dtype=bool)
+        if 'class' in params:
+            bit = CLASS_BITS.get(normalize_class(params.pop('class')))
+            if bit is None:
+                raise RequestError('unknown class')
+            params['classes'] = (params.get('classes') or 0) | (1 << bit)
+        if 'classes' in params:
+            mask &= (arrays['classes'] == 0) | ((arrays['classes'] & int(params.pop('classes'))) != 0)
+        if 'slot' in params:
+            params['slots'] = (params.get('slots') or 0) | (1 << int(params.pop('slot')))
+        if 'slots' in params:
+            mask &= (arrays['slots'] & int(params.pop('slots'))) != 0
+        if 'itemtype' in params:
+            itemtype = params.pop('itemtype')
+            mask &= np.isin(arrays['itemtype'], itemtype if isinstance(itemtype, list) else [itemtype])
+        if 'reqlevel_min' in params:
+            mask &= arrays['reqlevel'] >= int(params.pop('reqlevel_min'))
+        if 'reqlevel_max' in params:
+            mask &= arrays['reqlevel'] <= int(params.pop('reqlevel_max'))
+        for column, minimum in (params.pop('stat_min', None) or {}).items():
+            if column not in arrays:
+                raise RequestError(f"unknown stat {column} (one of {', '.join(STAT_COLUMNS)})")
+            mask &= arrays[column] >= int(minimum)
+        limit = int(params.pop('limit', FILTER_LIMIT))
+        if params:
+            raise RequestError(f"unknown filter(s): {', '.join(params)}")
+        matched = ids[mask]
+        return {'count': int(len(matched)), 'ids': matched[:limit].tolist()}
+
+    def op_metrics(self):
+        return {
+            'db': os.path.abspath(self.path),
+            'loaded': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded)),
+            'reloads': self.reloads,
+            'uptime_s': round(time.time() - self.started, 1),
+            'connections': self.connections,
+            'requests': sum(m.count for m in self.metrics.values()),
+            'row_cache': {'hits': self.rows.hits, 'misses': self.rows.misses},
+            'stats_cache': {'hits': self.stats_cache.hits, 'misses': self.stats_cache.misses},
+            'ops': {op: m.to_dict() for op, m in sorted(self.metrics.items())},
+        }
+
+    def op_ping(self):
+        return 'pong'
+
+    def op_reload(self):
+        self.open()
+        return {'loaded': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded))}
+
+    def op_shutdown(self):
+        self.stopping = True
+        return 'stopping'
+
+    def handle(self, request):
+        """Request dict -> response dict (never raises)"""
+        start = time.perf_counter()
+        op = request.get('op') if isinstance(request, dict) else None
+        response = {'seq': request.get('seq')} if isinstance(request, dict) and 'seq' in request else {}
+        handler = getattr(self, f'op_{op}', None) if isinstance(op, str) else None
+        try:
+            if handler is None:
+                raise RequestError(f'unknown op {op!r}')
+            self.check_source()
+            params = {k: v for k, v in request.items() if k not in ('op', 'seq') and v is not None}
+            response.update(ok=True, result=handler(**params))
+        except (RequestError, TypeError, ValueError) as e:
+            response.update(ok=False, error=str(e))
+        except Exception as e:
+            response.update(ok=False, error=f'{type(e).__name__}: {e}')
+        metric = self.metrics.setdefault(op if handler else 'invalid', OpMetrics())
+        metric.add((time.perf_counter() - start) * 1000, response['ok'])
+        return response
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def _item_id(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise RequestError(f'bad item id {value!r}')
+    return int(value)
+
+# --- Server ----------------------------------------------------------------
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = b''
+        self.outbuf = bytearray()
+
+def serve(service, host=HOST, port=PORT):
+    """Serve until a shutdown request"""
+    selector = selectors.DefaultSelector()
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if os.name != 'nt':
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(64)
+    listener.setblocking(False)
+    selector.register(listener, selectors.EVENT_READ)
+    print(f"Serving {service.db_path} on {host}:{port}")
+
+    def drop(client):
+        selector.unregister(client.sock)
+        client.sock.close()
+
+    try:
+        while not service.stopping:
+            for key, events in selector.select(timeout=1.0):
+                if key.fileobj is listener:
+                    sock, _ = listener.accept()
+                    sock.setblocking(False)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    service.connections += 1
+                    selector.register(sock, selectors.EVENT_READ, _Client(sock))
+                    continue
+                client = key.data
+                if events & selectors.EVENT_READ:
+                    try:
+                        data = client.sock.recv(65536)
+                    except (BlockingIOError, InterruptedError):
+                        data = None
+                    except OSError:
+                        drop(client)
+                        continue
+                    if data == b'':
+                        drop(client)
+                        continue
+                    if data:
+                        client.inbuf += data
+                        *lines, client.inbuf = client.inbuf.split(b'\n')
+                        if len(client.inbuf) > MAX_LINE:
+                            client.outbuf += b'{"ok": false, "error": "request line too long"}\n'
+                            client.inbuf = b''
+                        # Every complete line is answered before the next read
+                        for line in lines:
+                            if not line.strip():
+                                continue
+                            try:
+                                request = json.loads(line)
+                            except ValueError as e:
+                                response = {'ok': False, 'error': f'bad JSON: {e}'}
+                            else:
+                                response = service.handle(request)
+                            client.outbuf += json.dumps(response, default=str).encode() + b'\n'
+                if client.outbuf:
+                    try:
+                        sent = client.sock.send(client.outbuf)
+                        del client.outbuf[:sent]
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    except OSError:
+                        drop(client)
+                        continue
+                selector.modify(client.sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outbuf else 0),
+                                client)
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+        service.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve item lookups from a warm MQ2LinkDB connection')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--snapshot', help='stat_snapshot.py file for the filter arrays (used while current)')
+    parser.add_argument('--no-warm', action='store_true', help='Skip reading the table at start-up')
+    args = parser.parse_args()
+
+    service = ItemService(args.db, args.snapshot)
+    if not args.no_warm:
+        count, seconds = service.warm()
+        print(f"Warmed {count} items in {seconds:.2f}s")
+    serve(service, args.host, args.port)
+    print("Stopped")
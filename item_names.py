@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Item name index: normalized name keys and an FTS5 trigram index
+
+query_item_name (lib/database.lua) compares raw names and retries with
+trailing 's' / 'es' removed, get_quest_characters_local lowercases and
+strips plurals on every comparison, and retry_match_with_custom_term falls
+back to LIKE '%term%' scans. This precomputes both sides once:
+
+    item_names(item_id, name, name_key, questitem)   B-tree on name and name_key
+    item_names_fts(name)                             FTS5 trigram, kept in sync by triggers
+
+name_key is the case-folded, whitespace-collapsed, singularized name, so
+"Silks", "silk" and "SILK " share one key. lib/database.lua has the same
+rules in name_key(); keep the two in sync.
+
+import_lucy.py builds the index after a full load and refreshes changed ids
+on incremental runs.
+
+Usage:
+    python item_names.py [--db PATH]            rebuild
+    python item_names.py --find "bark treant" [--quest]
+"""
+
+import time
+import sqlite3
+import argparse
+
+from linkdb import resolve_db_path
+
+DB_PATH = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
+
+NAMES_TABLE = 'item_names'
+FTS_TABLE = 'item_names_fts'
+
+# Shortest term the trigram tokenizer can match
+MIN_TRIGRAM = 3
+
+def name_key(name):
+    """Case-folded, singularized lookup key for an item name"""
+    if not name:
+        return ''
+    key = ' '.join(str(name).casefold().split())
+    if key.endswith('ies') and len(key) > 4:
+        return key[:-3] + 'y'                  # berries -> berry
+    if key.endswith(('ches', 'shes', 'sses', 'xes', 'zes')):
+        return key[:-2]                        # boxes -> box, glasses -> glass
+    if key.endswith('s') and not key.endswith(('ss', 'us', 'is')):
+        return key[:-1]                        # silks -> silk, bones -> bone
+    return key
+
+def register_functions(conn):
+    conn.create_function('name_key', 1, name_key, deterministic=True)
+
+def fts5_trigram_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._trigram_probe USING fts5(x, tokenize='trigram')")
+        conn.execute('DROP TABLE temp._trigram_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def _populate_sql(conn, where):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(raw_item_data)')}
+    questitem = 'COALESCE(CAST(questitem AS INTEGER), 0)' if 'questitem' in columns else '0'
+    return f'''
+        INSERT INTO {NAMES_TABLE} (item_id, name, name_key, questitem)
+        SELECT id, name, name_key(name), {questitem}
+        FROM raw_item_data
+        WHERE name IS NOT NULL AND name != '' AND {where}'''
+
+def build_name_index(conn):
+    """Rebuild item_names (and the FTS index when available); returns the row count"""
+    register_functions(conn)
+    conn.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    conn.execute(f'DROP TABLE IF EXISTS {NAMES_TABLE}')
+    conn.execute(f'''
+        CREATE TABLE {NAMES_TABLE} (
+            item_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            questitem INTEGER NOT NULL DEFAULT 0
+        )''')
+    conn.execute(_populate_sql(conn, '1'))
+    conn.execute(f'CREATE INDEX idx_{NAMES_TABLE}_name ON {NAMES_TABLE}(name)')
+    conn.execute(f'CREATE INDEX idx_{NAMES_TABLE}_key ON {NAMES_TABLE}(name_key, questitem)')
+
+    if fts5_trigram_available(conn):
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+                name, content='{NAMES_TABLE}', content_rowid='item_id', tokenize='trigram')''')
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        # External-content FTS only sees changes made through these triggers
+        conn.execute(f'''
+            CREATE TRIGGER {NAMES_TABLE}_ai AFTER INSERT ON {NAMES_TABLE} BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.item_id, new.name);
+            END''')
+        conn.execute(f'''
+            CREATE TRIGGER {NAMES_TABLE}_ad AFTER DELETE ON {NAMES_TABLE} BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.item_id, old.name);
+            END''')
+    else:
+        print("  FTS5 trigram tokenizer not available (SQLite 3.34+) - fuzzy lookups fall back to LIKE")
+
+    count = conn.execute(f'SELECT COUNT(*) FROM {NAMES_TABLE}').fetchone()[0]
+    conn.commit()
+    return count
+
+def index_exists(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (NAMES_TABLE,)).fetchone() is not None
+
+def fts_exists(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).fetchone() is not None
+
+def refresh_names(conn, item_ids, chunk_size=500, commit=True):
+    """Re-read the names of the given ids (changed or deleted items); commit=False leaves the caller's transaction open"""
+    register_functions(conn)
+    item_ids = list(item_ids)
+    for i in range(0, len(item_ids), chunk_size):
+        chunk = item_ids[i:i + chunk_size]
+        marks = ', '.join('?' * len(chunk))
+        conn.execute(f'DELETE FROM {NAMES_TABLE} WHERE item_id IN ({marks})', chunk)
+        conn.execute(_populate_sql(conn, f'id IN ({marks})'), chunk)
+    if commit:
+        conn.commit()
+
+# --- Lookups -------------------------------------------------------------
+
+def _quest_filter(quest_only, alias=''):
+    return f' AND {alias}questitem = 1' if quest_only else ''
+
+def lookup_exact(conn, name, quest_only=False, limit=10):
+    """[(item_id, name)] whose name is exactly name"""
+    return conn.execute(
+        f'SELECT item_id, name FROM {NAMES_TABLE} WHERE name = ?{_quest_filter(quest_only)} ORDER BY item_id LIMIT ?',
+        (name, limit)).fetchall()
+
+def lookup_singular(conn, name, quest_only=False, limit=10):
+    """[(item_id, name)] matching name ignoring case, spacing and plural endings"""
+    return conn.execute(
+        f'SELECT item_id, name FROM {NAMES_TABLE} WHERE name_key = ?{_quest_filter(quest_only)} '
+        f'ORDER BY item_id LIMIT ?',
+        (name_key(name), limit)).fetchall()
+
+def fts_query(term):
+    """FTS5 query requiring every (singularized) word of term as a substring
+
+    None if no word is long enough for the trigram index.
+    """
+    words = [name_key(w).replace('"', '""') for w in term.split()]
+    words = [w for w in words if len(w) >= MIN_TRIGRAM]
+    if not words:
+        return None
+    return ' AND '.join(f'"{w}"' for w in words)
+
+def lookup_fuzzy(conn, term, quest_only=False, limit=10):
+    """[(item_id, name, score)] containing every word of term, best first
+
+    Ranked by: same name key, name starts with the term, bm25, shorter name.
+    Lower score is better.
+    """
+    key = name_key(term)
+    query = fts_query(term) if fts_exists(conn) else None
+    if query is not None:
+        rows = conn.execute(f'''
+            SELECT n.item_id, n.name, bm25({FTS_TABLE}) AS score
+            FROM {FTS_TABLE} JOIN {NAMES_TABLE} AS n ON n.item_id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH ?{_quest_filter(quest_only, 'n.')}
+            ORDER BY n.name_key = ? DESC, n.name_key LIKE ? DESC, score, length(n.name), n.item_id
+            LIMIT ?''', (query, key, key + '%', limit))
+    else:
+        rows = conn.execute(f'''
+            SELECT item_id, name, 0.0 AS score FROM {NAMES_TABLE}
+            WHERE name_key LIKE ?{_quest_filter(quest_only)}
+            ORDER BY name_key = ? DESC, name_key LIKE ? DESC, length(name), item_id
+            LIMIT ?''', ('%' + key + '%', key, key + '%', limit))
+    return rows.fetchall()
+
+def resolve_name(conn, name, quest_only=False, limit=10):
+    """[(item_id, name, match)] trying exact, then singular, then fuzzy"""
+    rows = lookup_exact(conn, name, quest_only, limit)
+    if rows:
+        return [(item_id, found, 'exact') for item_id, found in rows]
+    rows = lookup_singular(conn, name, quest_only, limit)
+    if rows:
+        return [(item_id, found, 'singular') for item_id, found in rows]
+    return [(item_id, found, 'fuzzy') for item_id, found, _ in lookup_fuzzy(conn, name, quest_only, limit)]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the item name index')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--find', metavar='NAME', help='Resolve a name (exact, singular, fuzzy)')
+    parser.add_argument('--quest', action='store_true', help='Only quest items (questitem = 1)')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(resolve_db_path(args.db))
+    start = time.perf_counter()
+    if args.find:
+        matches = resolve_name(conn, args.find, args.quest, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(matches)} match(es) for '{args.find}' in {elapsed:.2f}ms")
+        for item_id, name, match in matches:
+            print(f"  {item_id:7d} {match:8s} {name}")
+    else:
+        count = build_name_index(conn)
+        print(f"Built {NAMES_TABLE}: {count} names in {time.perf_counter() - start:.2f}s")
+    conn.close()
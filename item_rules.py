@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Item rules shared by the Python analysis tools
+
+Python mirror of the tables and formulas in check_upgrades.lua (class
+weights, class bitmask, slot numbers, weapon categories, weapon
+efficiency). Keep the two in sync when the Lua side changes.
+"""
+
+# CLASS_WEIGHTS in check_upgrades.lua ('Shadow Knight' is the MQ2 spelling
+# of Shadowknight and shares its weights)
+CLASS_WEIGHTS = {
+    'Shadowknight': {'ac': 3, 'hp': 2, 'mana': 0.5, 'endurance': 1.5, 'resists': 1, 'attack': 0.5, 'regen': 0.5, 'manaregen': 0, 'heal': 0, 'clairvoyance': 0},
+    'Warrior': {'ac': 3, 'hp': 2, 'mana': 0, 'endurance': 1.5, 'resists': 1, 'attack': 1, 'regen': 0.5, 'manaregen': 0, 'heal': 0, 'clairvoyance': 0},
+    'Paladin': {'ac': 3, 'hp': 2, 'mana': 1, 'endurance': 1.5, 'resists': 1, 'attack': 0.5, 'regen': 0.5, 'manaregen': 0.5, 'heal': 1, 'clairvoyance': 0},
+    'Ranger': {'ac': 1.5, 'hp': 1.5, 'mana': 0, 'endurance': 2, 'resists': 0.5, 'attack': 2, 'regen': 0.5, 'manaregen': 0, 'heal': 0, 'clairvoyance': 0},
+    'Rogue': {'ac': 1.5, 'hp': 1.5, 'mana': 0, 'endurance': 2, 'resists': 0.5, 'attack': 2, 'regen': 0.5, 'manaregen': 0, 'heal': 0, 'clairvoyance': 0},
+    'Monk': {'ac': 1.5, 'hp': 1.5, 'mana': 0, 'endurance': 2, 'resists': 0.5, 'attack': 2, 'regen': 0.5, 'manaregen': 0, 'heal': 0, 'clairvoyance': 0},
+    'Berserker': {'ac': 1.5, 'hp': 1.5, 'mana': 0, 'endurance': 2, 'resists': 0.5, 'attack': 2, 'regen': 0.5, 'manaregen': 0, 'heal': 0, 'clairvoyance': 0},
+    'Bard': {'ac': 1, 'hp': 1.5, 'mana': 1.5, 'endurance': 1.5, 'resists': 0.5, 'attack': 1, 'regen': 0.5, 'manaregen': 0.5, 'heal': 0.5, 'clairvoyance': 1},
+    'Cleric': {'ac': 1, 'hp': 2, 'mana': 2, 'endurance': 0, 'resists': 1, 'attack': 0, 'regen': 1, 'manaregen': 1, 'heal': 2, 'clairvoyance': 0.5},
+    'Druid': {'ac': 0.5, 'hp': 1.5, 'mana': 2, 'endurance': 0, 'resists': 1, 'attack': 0, 'regen': 1, 'manaregen': 1, 'heal': 1.5, 'clairvoyance': 0.5},
+    'Wizard': {'ac': 1, 'hp': 1.5, 'mana': 3, 'endurance': 0, 'resists': 1.5, 'attack': 0, 'regen': 0.2, 'manaregen': 2, 'heal': 0, 'clairvoyance': 1},
+    'Enchanter': {'ac': 1, 'hp': 1.5, 'mana': 3, 'endurance': 0, 'resists': 1.5, 'attack': 0, 'regen': 0.2, 'manaregen': 2, 'heal': 0, 'clairvoyance': 1.5},
+    'Necromancer': {'ac': 1, 'hp': 1.5, 'mana': 3, 'endurance': 0, 'resists': 1.5, 'attack': 0, 'regen': 0.2, 'manaregen': 2, 'heal': 0.5, 'clairvoyance': 1},
+    'Magician': {'ac': 1, 'hp': 1.5, 'mana': 3, 'endurance': 0, 'resists': 1.5, 'attack': 0, 'regen': 0.2, 'manaregen': 2, 'heal': 0, 'clairvoyance': 0.5},
+    'Shaman': {'ac': 1, 'hp': 1.5, 'mana': 2.5, 'endurance': 0.5, 'resists': 1, 'attack': 0.5, 'regen': 0.5, 'manaregen': 1.5, 'heal': 1.5, 'clairvoyance': 0.5},
+    'Beastlord': {'ac': 1, 'hp': 1.5, 'mana': 1.5, 'endurance': 1.5, 'resists': 0.5, 'attack': 1.5, 'regen': 0.5, 'manaregen': 0.5, 'heal': 0.5, 'clairvoyance': 0},
+}
+
+DEFAULT_WEIGHTS = {'ac': 0.5, 'hp': 1.5, 'mana': 2, 'endurance': 0, 'resists': 1, 'attack': 0, 'regen': 0.5, 'manaregen': 1, 'heal': 1, 'clairvoyance': 0.5}
+
+# Order of the weight vector used by the vectorized tools
+WEIGHT_KEYS = ['ac', 'hp', 'mana', 'endurance', 'resists', 'attack', 'regen', 'manaregen', 'heal', 'clairvoyance']
+
+# Bit position of each class in the classes bitmask (can_equip_item)
+CLASS_BITS = {
+    'Warrior': 0, 'Cleric': 1, 'Paladin': 2, 'Ranger': 3, 'Shadowknight': 4,
+    'Druid': 5, 'Monk': 6, 'Bard': 7, 'Rogue': 8, 'Shaman': 9, 'Necromancer': 10,
+    'Wizard': 11, 'Magician': 12, 'Enchanter': 13, 'Beastlord': 14, 'Berserker': 15,
+}
+
+CLASS_NAMES = sorted(CLASS_BITS, key=CLASS_BITS.get)
+
+# Class.ShortName() as reported by the group window and DanNet
+CLASS_SHORT_NAMES = {
+    'WAR': 'Warrior', 'CLR': 'Cleric', 'PAL': 'Paladin', 'RNG': 'Ranger', 'SHD': 'Shadowknight',
+    'DRU': 'Druid', 'MNK': 'Monk', 'BRD': 'Bard', 'ROG': 'Rogue', 'SHM': 'Shaman', 'NEC': 'Necromancer',
+    'WIZ': 'Wizard', 'MAG': 'Magician', 'ENC': 'Enchanter', 'BST': 'Beastlord', 'BER': 'Berserker',
+}
+
+# get_character_role_priority in check_cross_character_upgrades.lua (lower goes first)
+ROLE_PRIORITY = {
+    'Warrior': 1, 'Paladin': 1, 'Shadowknight': 1,
+    'Rogue': 2, 'Berserker': 2, 'Monk': 2, 'Ranger': 2, 'Bard': 2,
+    'Beastlord': 3, 'Druid': 3,
+    'Cleric': 4, 'Shaman': 4,
+    'Magician': 5, 'Wizard': 5, 'Enchanter': 5, 'Necromancer': 5,
+}
+
+# Level 70 damage bonus from calculate_damage_bonus_at_level
+DAMAGE_BONUS = {
+    'Warrior': 20, 'Shadowknight': 20, 'Paladin': 18, 'Ranger': 22, 'Rogue': 25,
+    'Monk': 20, 'Berserker': 25, 'Bard': 15, 'Beastlord': 18, 'Cleric': 0, 'Druid': 0,
+    'Wizard': 0, 'Enchanter': 0, 'Necromancer': 0, 'Magician': 0, 'Shaman': 5,
+}
+
+# Classes that may use a shield in the off hand (can_equip_shield_in_offhand)
+TANK_CLASSES = {'Warrior', 'Paladin', 'Shadowknight'}
+CASTER_CLASSES = {'Cleric', 'Druid', 'Wizard', 'Enchanter', 'Necromancer', 'Magician', 'Shaman'}
+SHIELD_CLASSES = TANK_CLASSES | CASTER_CLASSES
+
+SLOT_NAMES = {
+    0: 'Charm', 1: 'Left Ear', 2: 'Head', 3: 'Face', 4: 'Right Ear', 5: 'Neck',
+    6: 'Shoulder', 7: 'Arms', 8: 'Back', 9: 'Left Wrist', 10: 'Right Wrist',
+    11: 'Ranged', 12: 'Hands', 13: 'Main Hand', 14: 'Off Hand', 15: 'Left Finger',
+    16: 'Right Finger', 17: 'Chest', 18: 'Legs', 19: 'Feet', 20: 'Waist',
+    21: 'Power Source', 22: 'Ammo',
+}
+SLOT_COUNT = 23
+MAIN_HAND = 13
+OFF_HAND = 14
+
+# Weapon categories from are_items_comparable's get_weapon_category
+SHIELD_ITEMTYPE = 8
+TWO_HANDED_ITEMTYPES = {1, 4}
+AUGMENT_ITEMTYPE = 54
+WEAPON_CATEGORIES = {2: '1h_weapon', 3: '1h_weapon', 1: '2h_weapon', 4: '2h_weapon', 5: 'ranged_weapon'}
+
+def normalize_class(char_class):
+    """MQ2 class name or short name -> key used in these tables"""
+    if char_class == 'Shadow Knight':
+        return 'Shadowknight'
+    return CLASS_SHORT_NAMES.get(char_class.upper(), char_class) if char_class else char_class
+
+def class_weights(char_class):
+    return CLASS_WEIGHTS.get(normalize_class(char_class), DEFAULT_WEIGHTS)
+
+def weapon_category(itemtype):
+    return WEAPON_CATEGORIES.get(itemtype, 'other')
+
+def slots_from_mask(slots_mask):
+    """get_slots_from_mask: slot numbers whose bit is set"""
+    return [slot for slot in range(SLOT_COUNT) if slots_mask & (1 << slot)]
+
+def can_class_use(classes_mask, char_class):
+    """classes = 0 means unrestricted"""
+    if not classes_mask:
+        return True
+    bit = CLASS_BITS.get(normalize_class(char_class))
+    return bit is not None and bool(classes_mask & (1 << bit))
+
+def mainhand_efficiency(damage, delay, backstabdmg, char_class):
+    """calculate_mainhand_efficiency"""
+    if not damage or not delay:
+        return 0
+    char_class = normalize_class(char_class)
+    effective_damage = damage * 2 + DAMAGE_BONUS.get(char_class, 0)
+    if char_class == 'Rogue' and (backstabdmg or 0) > 0:
+        effective_damage += backstabdmg * 0.5
+    return effective_damage / delay * 50
+
+def offhand_efficiency(damage, delay):
+    """calculate_offhand_efficiency"""
+    if not damage or not delay:
+        return 0
+    return damage * 2 / delay * 50 * 0.62
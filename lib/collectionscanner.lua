@@ -13,6 +13,8 @@ local collection_scanner = {}
 -- Database file path (shared across all characters)
 local db_path = mq.configDir .. "/YALM2/collection_needs.db"
 local db_handle = nil
+-- collection_progress / collection_summary exist and are trigger-maintained
+local summaries_available = false
 
 -- ======================================================================================================================
 -- Achievement Data - Master Scavenger achievements by expansion
@@ -114,6 +116,135 @@ local parentSuffixTable = {
 -- Database Functions
 -- ======================================================================================================================
 
+-- Progress summaries maintained by triggers, so the UI reads one row per
+-- collection shown instead of GROUP BY over all of collection_needs.
+-- collection_summary.py has the same SQL (and --verify / --bench); keep them in sync.
+-- ON CONFLICT DO UPDATE needs SQLite 3.24+.
+local summary_tables_sql = [[
+    CREATE TABLE IF NOT EXISTS collection_progress (
+        collection_name TEXT NOT NULL,
+        expansion TEXT NOT NULL,
+        character_name TEXT NOT NULL,
+        server_name TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        needed INTEGER NOT NULL DEFAULT 0,
+        collected INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (collection_name, expansion, character_name, server_name)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_collection_progress_character ON collection_progress (character_name, server_name, expansion);
+    CREATE INDEX IF NOT EXISTS idx_collection_progress_server ON collection_progress (server_name, expansion, collection_name, character_name);
+    CREATE TABLE IF NOT EXISTS collection_summary (
+        collection_name TEXT NOT NULL,
+        expansion TEXT NOT NULL,
+        server_name TEXT NOT NULL,
+        characters INTEGER NOT NULL DEFAULT 0,
+        complete_count INTEGER NOT NULL DEFAULT 0,
+        partial_count INTEGER NOT NULL DEFAULT 0,
+        needs_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (collection_name, expansion, server_name)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_collection_summary_server ON collection_summary (server_name, expansion, collection_name);
+]]
+
+-- Backfill from existing rows before the triggers exist
+local summary_populate_sql = [[
+    INSERT INTO collection_progress (collection_name, expansion, character_name, server_name, total, needed, collected)
+    SELECT collection_name, expansion, character_name, server_name,
+           COUNT(*), SUM(needed = 1), SUM(needed = 0)
+    FROM collection_needs
+    GROUP BY collection_name, expansion, character_name, server_name;
+    INSERT INTO collection_summary (collection_name, expansion, server_name, characters, complete_count, partial_count, needs_count)
+    SELECT collection_name, expansion, server_name,
+           COUNT(*), SUM(needed = 0), SUM(needed > 0 AND collected > 0), SUM(collected = 0)
+    FROM collection_progress
+    GROUP BY collection_name, expansion, server_name;
+]]
+
+local summary_triggers_sql = [[
+    CREATE TRIGGER IF NOT EXISTS collection_needs_ai AFTER INSERT ON collection_needs BEGIN
+        INSERT INTO collection_progress (collection_name, expansion, character_name, server_name, total, needed, collected)
+        VALUES (new.collection_name, new.expansion, new.character_name, new.server_name, 1, new.needed = 1, new.needed = 0)
+        ON CONFLICT (collection_name, expansion, character_name, server_name) DO UPDATE SET
+            total = total + 1, needed = needed + excluded.needed, collected = collected + excluded.collected;
+    END;
+    CREATE TRIGGER IF NOT EXISTS collection_needs_ad AFTER DELETE ON collection_needs BEGIN
+        UPDATE collection_progress SET total = total - 1, needed = needed - (old.needed = 1), collected = collected - (old.needed = 0)
+        WHERE collection_name = old.collection_name AND expansion = old.expansion AND character_name = old.character_name AND server_name = old.server_name;
+        DELETE FROM collection_progress WHERE collection_name = old.collection_name AND expansion = old.expansion AND character_name = old.character_name AND server_name = old.server_name AND total <= 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS collection_needs_au_needed AFTER UPDATE OF needed ON collection_needs
+    WHEN old.needed IS NOT new.needed
+     AND old.collection_name = new.collection_name AND old.expansion = new.expansion
+     AND old.character_name = new.character_name AND old.server_name = new.server_name BEGIN
+        UPDATE collection_progress
+        SET needed = needed - (old.needed = 1) + (new.needed = 1), collected = collected - (old.needed = 0) + (new.needed = 0)
+        WHERE collection_name = new.collection_name AND expansion = new.expansion AND character_name = new.character_name AND server_name = new.server_name;
+    END;
+    CREATE TRIGGER IF NOT EXISTS collection_needs_au_moved AFTER UPDATE OF collection_name, expansion, character_name, server_name ON collection_needs
+    WHEN old.collection_name != new.collection_name OR old.expansion != new.expansion
+      OR old.character_name != new.character_name OR old.server_name != new.server_name BEGIN
+        UPDATE collection_progress SET total = total - 1, needed = needed - (old.needed = 1), collected = collected - (old.needed = 0)
+        WHERE collection_name = old.collection_name AND expansion = old.expansion AND character_name = old.character_name AND server_name = old.server_name;
+        DELETE FROM collection_progress WHERE collection_name = old.collection_name AND expansion = old.expansion AND character_name = old.character_name AND server_name = old.server_name AND total <= 0;
+        INSERT INTO collection_progress (collection_name, expansion, character_name, server_name, total, needed, collected)
+        VALUES (new.collection_name, new.expansion, new.character_name, new.server_name, 1, new.needed = 1, new.needed = 0)
+        ON CONFLICT (collection_name, expansion, character_name, server_name) DO UPDATE SET
+            total = total + 1, needed = needed + excluded.needed, collected = collected + excluded.collected;
+    END;
+    CREATE TRIGGER IF NOT EXISTS collection_progress_ai AFTER INSERT ON collection_progress BEGIN
+        INSERT INTO collection_summary (collection_name, expansion, server_name, characters, complete_count, partial_count, needs_count)
+        VALUES (new.collection_name, new.expansion, new.server_name, 1,
+                new.needed = 0, new.needed > 0 AND new.collected > 0, new.collected = 0)
+        ON CONFLICT (collection_name, expansion, server_name) DO UPDATE SET
+            characters = characters + 1, complete_count = complete_count + excluded.complete_count,
+            partial_count = partial_count + excluded.partial_count, needs_count = needs_count + excluded.needs_count;
+    END;
+    CREATE TRIGGER IF NOT EXISTS collection_progress_ad AFTER DELETE ON collection_progress BEGIN
+        UPDATE collection_summary
+        SET characters = characters - 1, complete_count = complete_count - (old.needed = 0),
+            partial_count = partial_count - (old.needed > 0 AND old.collected > 0), needs_count = needs_count - (old.collected = 0)
+        WHERE collection_name = old.collection_name AND expansion = old.expansion AND server_name = old.server_name;
+        DELETE FROM collection_summary WHERE collection_name = old.collection_name AND expansion = old.expansion AND server_name = old.server_name AND characters <= 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS collection_progress_au AFTER UPDATE OF needed, collected ON collection_progress
+    WHEN (old.needed = 0) != (new.needed = 0) OR (old.collected = 0) != (new.collected = 0) BEGIN
+        UPDATE collection_summary
+        SET complete_count = complete_count - (old.needed = 0) + (new.needed = 0),
+            partial_count = partial_count - (old.needed > 0 AND old.collected > 0) + (new.needed > 0 AND new.collected > 0),
+            needs_count = needs_count - (old.collected = 0) + (new.collected = 0)
+        WHERE collection_name = new.collection_name AND expansion = new.expansion AND server_name = new.server_name;
+    END;
+]]
+
+--- Create collection_progress / collection_summary and their triggers on first open
+local function ensure_progress_summaries(db)
+    local stmt = db:prepare("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'collection_summary'")
+    local exists = stmt and stmt:step() == sql.ROW
+    if stmt then
+        stmt:finalize()
+    end
+    if exists then
+        return true
+    end
+    
+    db:exec("BEGIN TRANSACTION")
+    local result = db:exec(summary_tables_sql)
+    if result == sql.OK then
+        result = db:exec(summary_populate_sql)
+    end
+    if result == sql.OK then
+        result = db:exec(summary_triggers_sql)
+    end
+    if result ~= sql.OK then
+        Write.Error("[CollectionDB] Failed to create progress summaries: %s", db:errmsg())
+        Write.Error("[CollectionDB] Progress queries will aggregate collection_needs directly")
+        db:exec("ROLLBACK")
+        return false
+    end
+    db:exec("COMMIT")
+    return true
+end
+
 --- Get or create the database connection
 local function get_db()
     if db_handle then
@@ -161,6 +292,8 @@ local function get_db()
     -- Create index for fast item lookups during looting
     db:exec("CREATE INDEX IF NOT EXISTS idx_item_needed ON collection_needs (item_name, needed)")
     
+    summaries_available = ensure_progress_summaries(db)
+    
     db_handle = db
     return db_handle
 end
@@ -444,15 +577,28 @@ function collection_scanner.get_character_progress(character_name, server_name)
         by_expansion = {}
     }
     
-    local stmt = db:prepare([[
-        SELECT expansion, 
-               COUNT(*) as total,
-               SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as needed,
-               SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as collected
-        FROM collection_needs
-        WHERE character_name = ? AND server_name = ?
-        GROUP BY expansion
-    ]])
+    local stmt
+    if summaries_available then
+        stmt = db:prepare([[
+            SELECT expansion, 
+                   SUM(total) as total,
+                   SUM(needed) as needed,
+                   SUM(collected) as collected
+            FROM collection_progress
+            WHERE character_name = ? AND server_name = ?
+            GROUP BY expansion
+        ]])
+    else
+        stmt = db:prepare([[
+            SELECT expansion, 
+                   COUNT(*) as total,
+                   SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as needed,
+                   SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as collected
+            FROM collection_needs
+            WHERE character_name = ? AND server_name = ?
+            GROUP BY expansion
+        ]])
+    end
     
     if not stmt then
         return result
@@ -546,20 +692,33 @@ function collection_scanner.get_all_collections_progress(server_name)
     
     local results = {}
     
-    -- Query to get per-character, per-collection stats
-    local query = [[
-        SELECT collection_name, expansion, character_name, server_name,
-               COUNT(*) as total,
-               SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as needed,
-               SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as collected
-        FROM collection_needs
-    ]]
+    -- Per-character, per-collection stats (one collection_progress row each)
+    local query
+    if summaries_available then
+        query = [[
+            SELECT collection_name, expansion, character_name, server_name,
+                   total, needed, collected
+            FROM collection_progress
+        ]]
+    else
+        query = [[
+            SELECT collection_name, expansion, character_name, server_name,
+                   COUNT(*) as total,
+                   SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as needed,
+                   SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as collected
+            FROM collection_needs
+        ]]
+    end
     
     if server_name then
         query = query .. " WHERE server_name = ?"
     end
     
-    query = query .. " GROUP BY collection_name, character_name, server_name ORDER BY expansion, collection_name, character_name"
+    if summaries_available then
+        query = query .. " ORDER BY expansion, collection_name, character_name"
+    else
+        query = query .. " GROUP BY collection_name, character_name, server_name ORDER BY expansion, collection_name, character_name"
+    end
     
     local stmt = db:prepare(query)
     if not stmt then
@@ -630,38 +789,57 @@ function collection_scanner.get_all_collections_for_ui(server_name)
         return {}
     end
     
-    -- Query to aggregate per-collection stats across all characters
+    -- Per-collection counts across all characters, kept in collection_summary
+    -- (aggregated from collection_needs when the summaries are unavailable)
     -- A character is "complete" if they have 0 items needed
     -- A character is "partial" if they have some collected but not all
     -- A character "needs" the collection if they haven't collected any
-    local query = [[
-        SELECT 
-            collection_name,
-            expansion,
-            SUM(CASE WHEN needed_count = 0 THEN 1 ELSE 0 END) as complete_count,
-            SUM(CASE WHEN needed_count > 0 AND collected_count > 0 THEN 1 ELSE 0 END) as partial_count,
-            SUM(CASE WHEN collected_count = 0 THEN 1 ELSE 0 END) as needs_count
-        FROM (
+    local query
+    if not summaries_available then
+        query = [[
             SELECT 
                 collection_name,
                 expansion,
-                character_name,
-                SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as needed_count,
-                SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as collected_count
-            FROM collection_needs
-    ]]
-    
-    if server_name then
-        query = query .. " WHERE server_name = ?"
+                SUM(CASE WHEN needed_count = 0 THEN 1 ELSE 0 END) as complete_count,
+                SUM(CASE WHEN needed_count > 0 AND collected_count > 0 THEN 1 ELSE 0 END) as partial_count,
+                SUM(CASE WHEN collected_count = 0 THEN 1 ELSE 0 END) as needs_count
+            FROM (
+                SELECT 
+                    collection_name,
+                    expansion,
+                    character_name,
+                    SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as needed_count,
+                    SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as collected_count
+                FROM collection_needs
+        ]]
+        if server_name then
+            query = query .. " WHERE server_name = ?"
+        end
+        query = query .. [[
+                GROUP BY collection_name, character_name
+            ) as char_progress
+            GROUP BY collection_name, expansion
+            ORDER BY expansion, collection_name
+        ]]
+    elseif server_name then
+        query = [[
+            SELECT collection_name, expansion, complete_count, partial_count, needs_count
+            FROM collection_summary
+            WHERE server_name = ?
+            ORDER BY expansion, collection_name
+        ]]
+    else
+        query = [[
+            SELECT collection_name, expansion,
+                SUM(complete_count) as complete_count,
+                SUM(partial_count) as partial_count,
+                SUM(needs_count) as needs_count
+            FROM collection_summary
+            GROUP BY collection_name, expansion
+            ORDER BY expansion, collection_name
+        ]]
     end
     
-    query = query .. [[
-            GROUP BY collection_name, character_name
-        ) as char_progress
-        GROUP BY collection_name, expansion
-        ORDER BY expansion, collection_name
-    ]]
-    
     local stmt = db:prepare(query)
     if not stmt then
         return {}
@@ -755,15 +933,28 @@ function collection_scanner.get_collection_details(collection_name, server_name)
         return {}
     end
     
-    local query = [[
-        SELECT 
-            character_name,
-            SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as items_needed,
-            SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as items_collected,
-            COUNT(*) as total_items
-        FROM collection_needs
-        WHERE collection_name = ?
-    ]]
+    local query
+    if summaries_available then
+        query = [[
+            SELECT 
+                character_name,
+                SUM(needed) as items_needed,
+                SUM(collected) as items_collected,
+                SUM(total) as total_items
+            FROM collection_progress
+            WHERE collection_name = ?
+        ]]
+    else
+        query = [[
+            SELECT 
+                character_name,
+                SUM(CASE WHEN needed = 1 THEN 1 ELSE 0 END) as items_needed,
+                SUM(CASE WHEN needed = 0 THEN 1 ELSE 0 END) as items_collected,
+                COUNT(*) as total_items
+            FROM collection_needs
+            WHERE collection_name = ?
+        ]]
+    end
     
     if server_name then
         query = query .. " AND server_name = ?"
@@ -36,6 +36,14 @@
     1. Ensure MQ2LinkDB.db exists in <MQ2_ROOT>/resources/
     2. Check your MQ2 installation location
     3. The auto-detection looks for the 'lua' directory and works backward
+    
+    SHADOW REBUILDS:
+    ================
+    import_lucy.py --shadow builds a new database next to the live one and,
+    when the live file cannot be replaced (it is open), publishes it by
+    writing its file name to MQ2LinkDB.current. OpenDatabase() opens the
+    file the pointer names, and CheckPublished() reconnects once a newer
+    version has been published, so a rebuild never stalls lookups.
 ]]
 
 --- @type Mq
@@ -81,15 +89,35 @@ local function get_database_path()
 	return fallback_path
 end
 
+--[[
+    The file a new connection should open: the version named by
+    MQ2LinkDB.current (written by shadow_db.py) if it exists, else path.
+]]
+local function resolve_published(path)
+	local pointer = io.open((path:gsub("%.db$", "")) .. ".current", "r")
+	if not pointer then
+		return path
+	end
+	local name = pointer:read("*l")
+	pointer:close()
+	if not name or name == "" then
+		return path
+	end
+	local target = (path:match("^(.*[/\\])") or "") .. name:gsub("%s+$", "")
+	return utils.file_exists(target) and target or path
+end
+
 YALM2_Database = {
 	database = nil,
 	path = get_database_path(),
+	open_path = nil,
 	mq2_root = tostring(mq.TLO.MacroQuest.Path("lua")):gsub("/lua$", ""):gsub("\\lua$", ""),
 }
 
 YALM2_Database.OpenDatabase = function(path)
-	if not path then
-		path = YALM2_Database.path
+	local published = not path
+	if published then
+		path = resolve_published(YALM2_Database.path)
 	end
 	if not utils.file_exists(path) then
 		print("ERROR: Database file does not exist [" .. path .. "]")
@@ -104,6 +132,9 @@ YALM2_Database.OpenDatabase = function(path)
 		print("ERROR: Could not open database [" .. path .. "] (" .. ec .. "): " .. em)
 		return nil;
 	end
+	if published then
+		YALM2_Database.open_path = path
+	end
 	return db
 end
 
@@ -144,6 +175,21 @@ YALM2_Database.QueryDatabaseForItemId = function(item_id)
 	return item_db
 end
 
+-- Same rules as name_key() in item_names.py, which fills item_names.name_key
+local function name_key(name)
+	local key = name:lower():gsub("%s+", " "):gsub("^ ", ""):gsub(" $", "")
+	if key:match("ies$") and #key > 4 then
+		return key:sub(1, -4) .. "y"
+	end
+	if key:match("ches$") or key:match("shes$") or key:match("sses$") or key:match("xes$") or key:match("zes$") then
+		return key:sub(1, -3)
+	end
+	if key:match("s$") and not (key:match("ss$") or key:match("us$") or key:match("is$")) then
+		return key:sub(1, -2)
+	end
+	return key
+end
+
 local function query_item_name(item_name)
 	
 	local item_db = nil
@@ -182,6 +228,21 @@ local function query_item_name(item_name)
 		end
 	end
 	
+	-- Case/plural-insensitive match through the item_names index (built by import_lucy.py)
+	if not item_db then
+		local query = string.format(
+			"SELECT r.* FROM item_names AS n JOIN raw_item_data AS r ON r.id = n.item_id WHERE n.name_key = '%s' ORDER BY n.item_id LIMIT 1",
+			name_key(item_name):gsub("'", "''")
+		)
+		pcall(function()
+			for row in YALM2_Database.database:nrows(query) do
+				item_db = row
+				debug_logger.debug("DATABASE: Found item id=%d, name=%s by name key", row.id or 0, row.name or "nil")
+				break
+			end
+		end)
+	end
+	
 	if not item_db then
 		debug_logger.warn("DATABASE: Item '%s' not found in raw_item_data", item_name)
 	end
@@ -201,4 +262,24 @@ YALM2_Database.RefreshConnection = function()
 	return YALM2_Database.database
 end
 
+-- Reconnect if a shadow rebuild has published a new version since we opened
+YALM2_Database.CheckPublished = function()
+	if not YALM2_Database.database or not YALM2_Database.open_path then
+		return false
+	end
+	local published = resolve_published(YALM2_Database.path)
+	if published == YALM2_Database.open_path then
+		return false
+	end
+	debug_logger.info("DATABASE: New version published, reconnecting: %s", published)
+	-- Keep the current connection unless the new version opens
+	local db = YALM2_Database.OpenDatabase()
+	if not db then
+		return false
+	end
+	YALM2_Database.database:close()
+	YALM2_Database.database = db
+	return true
+end
+
 return YALM2_Database
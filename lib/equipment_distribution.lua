@@ -174,23 +174,49 @@ local function contains_string(item_name, search_string)
 end
 
 --[[
-    Get the tier of an armor item by its name
-    
-    Args:
-        item_name (string): Name of the item
-    
-    Returns:
-        (int or nil) Tier number (1=Fear Touched/Fear Stained, 2=Boreal/Distorted, 3+)
-        Returns nil if tier cannot be determined
+    Order-independent checksum of the rules the loops below use (progression
+    tiers, set pieces and remnant names). armor_index.py stores the same
+    checksum of the config it compiled from; a mismatch means the config has
+    changed since (e.g. renumber_tiers.py) and the index is stale.
 ]]
-local function get_armor_item_tier(item_name)
-    if not item_name or item_name == '' or not ARMOR_PROGRESSION then
-        debug_logger.info("TIER_CHECK: item_name=%s, ARMOR_PROGRESSION exists=%s", tostring(item_name), tostring(ARMOR_PROGRESSION ~= nil))
-        return nil
+local function armor_config_fingerprint()
+    local total = 0
+    local function add(line)
+        local h = 0
+        for i = 1, #line do
+            h = (h * 31 + line:byte(i)) % 4294967296
+        end
+        total = (total + h) % 4294967296
     end
+    local function tier_text(entry)
+        if type(entry) == 'table' and type(entry.tier) == 'number' then
+            return string.format('%d', entry.tier)
+        end
+        return ''
+    end
+    for name, info in pairs(ARMOR_PROGRESSION or {}) do
+        add('p\t' .. name .. '\t' .. tier_text(info))
+    end
+    for set_name, set_config in pairs(armor_sets or {}) do
+        if type(set_config) == 'table' and type(set_config.pieces) == 'table' then
+            for piece_type, piece_config in pairs(set_config.pieces) do
+                local remnant = type(piece_config) == 'table' and piece_config.remnant_name
+                add('s\t' .. set_name .. '\t' .. piece_type .. '\t' .. (type(remnant) == 'string' and remnant or ''))
+            end
+        end
+    end
+    return total
+end
+
+--[[
+    Match an item name against ARMOR_PROGRESSION (config loop)
     
+    Returns:
+        (int or nil) Tier of the first progression entry the name contains
+]]
+local function match_armor_tier(item_name)
     -- Check each progression entry to see if item name contains it
-    for progression_set_name, progression_info in pairs(ARMOR_PROGRESSION) do
+    for progression_set_name, progression_info in pairs(ARMOR_PROGRESSION or {}) do
         if item_name:lower():find(progression_set_name:lower(), 1, true) then
             debug_logger.info("TIER_CHECK: %s matched progression '%s' with tier=%s", item_name, progression_set_name, tostring(progression_info.tier))
             return progression_info.tier
@@ -202,20 +228,12 @@ local function get_armor_item_tier(item_name)
 end
 
 --[[
-    Identify if an item is part of a defined armor set
-    
-    Args:
-        item_name (string): Name of the item
+    Match an item name against armor_sets (config loops)
     
     Returns:
-        (string, string, int or nil) Armor set name, piece type, and tier (or nil if tier unknown)
-        Example: ('Recondite', 'Wrist', 1)
+        (string, string, int or nil) Armor set name, piece type and tier, or nil
 ]]
-local function identify_armor_item(item_name)
-    if not item_name or item_name == '' then
-        return nil, nil, nil
-    end
-    
+local function match_armor_item(item_name)
     for set_name, set_config in pairs(armor_sets) do
         if set_config.pieces then
             -- First check if item name contains the set name (e.g., "Crude Defiant Plate Helm" contains "Crude Defiant")
@@ -226,7 +244,7 @@ local function identify_armor_item(item_name)
                     -- We can't check slots directly from item_name, so we assume the set name match is sufficient
                     -- and return the first piece that could plausibly match
                     -- This is a simplification - in practice, we rely on the item name keywords
-                    local tier = get_armor_item_tier(item_name)
+                    local tier = match_armor_tier(item_name)
                     debug_logger.info("ARMOR_IDENTIFY: %s matched %s/%s, tier=%s", item_name, set_name, piece_type, tostring(tier))
                     
                     -- Try to identify piece type from item name keywords
@@ -258,7 +276,7 @@ local function identify_armor_item(item_name)
             -- If set name didn't match, check remnant names (for crafted armor)
             for piece_type, piece_config in pairs(set_config.pieces) do
                 if piece_config.remnant_name and contains_string(item_name, piece_config.remnant_name) then
-                    local tier = get_armor_item_tier(item_name)
+                    local tier = match_armor_tier(item_name)
                     debug_logger.info("ARMOR_IDENTIFY: %s matched %s/%s (remnant), tier=%s", item_name, set_name, piece_type, tostring(tier))
                     return set_name, piece_type, tier
                 end
@@ -271,6 +289,136 @@ local function identify_armor_item(item_name)
     return nil, nil, nil
 end
 
+--[[
+    Look up an item in the precompiled armor_item_index table
+    
+    armor_index.py matches every raw_item_data name against this config once
+    and stores (name, set_name, piece, tier) in MQ2LinkDB. When the table is
+    there and was compiled from this config, identification is one keyed
+    query per name. The index only knows the names raw_item_data held when
+    it was built, so a name it lacks (loot not in the LinkDB yet, items
+    imported since) is matched with the config loops instead; either way
+    the result is cached per name. Availability is re-checked whenever the
+    database connection changes (RefreshConnection / CheckPublished).
+    
+    Returns:
+        (table) { set_name, piece, tier } - fields are nil when not armor
+        (nil) no usable index - use the loops
+]]
+local armor_index_db = nil
+local armor_index_available = false
+local armor_index_cache = {}
+local armor_config_checksum = nil
+
+local function armor_index_usable(db)
+    if db == armor_index_db then
+        return armor_index_available
+    end
+    armor_index_db = db
+    armor_index_available = false
+    armor_index_cache = {}
+    
+    local stored = nil
+    local ok = pcall(function()
+        for row in db:nrows("SELECT value FROM armor_item_index_meta WHERE key = 'config_fingerprint'") do
+            stored = tonumber(row.value)
+        end
+    end)
+    if not ok or not stored then
+        debug_logger.info("ARMOR_INDEX: armor_item_index not available - using config loops")
+        return false
+    end
+    armor_config_checksum = armor_config_checksum or armor_config_fingerprint()
+    if stored ~= armor_config_checksum then
+        debug_logger.warn("ARMOR_INDEX: armor_item_index was built from a different armor_sets.lua - rerun armor_index.py")
+        return false
+    end
+    armor_index_available = true
+    return true
+end
+
+local function lookup_armor_index(item_name)
+    local db = _G.YALM2_Database and _G.YALM2_Database.database
+    if not db or not armor_index_usable(db) then
+        return nil
+    end
+    
+    local cached = armor_index_cache[item_name]
+    if cached ~= nil then
+        return cached
+    end
+    
+    local result = nil
+    local query = string.format(
+        "SELECT set_name, piece, tier FROM armor_item_index WHERE name = '%s' LIMIT 1",
+        (item_name:gsub("'", "''"))
+    )
+    local ok = pcall(function()
+        for row in db:nrows(query) do
+            result = { set_name = row.set_name, piece = row.piece, tier = row.tier }
+            break
+        end
+    end)
+    if not ok then
+        return nil
+    end
+    if not result then
+        local set_name, piece = match_armor_item(item_name)
+        result = { set_name = set_name, piece = piece, tier = match_armor_tier(item_name) }
+    end
+    
+    armor_index_cache[item_name] = result
+    return result
+end
+
+--[[
+    Get the tier of an armor item by its name
+    
+    Args:
+        item_name (string): Name of the item
+    
+    Returns:
+        (int or nil) Tier number (1=Fear Touched/Fear Stained, 2=Boreal/Distorted, 3+)
+        Returns nil if tier cannot be determined
+]]
+local function get_armor_item_tier(item_name)
+    if not item_name or item_name == '' or not ARMOR_PROGRESSION then
+        debug_logger.info("TIER_CHECK: item_name=%s, ARMOR_PROGRESSION exists=%s", tostring(item_name), tostring(ARMOR_PROGRESSION ~= nil))
+        return nil
+    end
+    
+    local indexed = lookup_armor_index(item_name)
+    if indexed then
+        return indexed.tier
+    end
+    return match_armor_tier(item_name)
+end
+
+--[[
+    Identify if an item is part of a defined armor set
+    
+    Args:
+        item_name (string): Name of the item
+    
+    Returns:
+        (string, string, int or nil) Armor set name, piece type, and tier (or nil if tier unknown)
+        Example: ('Recondite', 'Wrist', 1)
+]]
+local function identify_armor_item(item_name)
+    if not item_name or item_name == '' then
+        return nil, nil, nil
+    end
+    
+    local indexed = lookup_armor_index(item_name)
+    if indexed then
+        if not indexed.set_name then
+            return nil, nil, nil
+        end
+        return indexed.set_name, indexed.piece, indexed.tier
+    end
+    return match_armor_item(item_name)
+end
+
 -- ============================================================================
 -- Equipment Analysis
 -- ============================================================================
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Shared MQ2LinkDB access for the Python tools
+
+    db = LinkDB()                        # read-only, tuned connection per thread
+    rows = db.get_items([121564, 4654])  # {id: row dict}, one chunked IN query
+    stats = db.get_item_stats(121564)    # normalized like get_item_stats in check_upgrades.lua
+
+Connections are opened read-only through a file: URI with a large
+mmap_size and page cache. Every statement is a fixed string (IN lists are
+padded to a fixed chunk size), so sqlite3's per-connection statement cache
+reuses the prepared statements. Normalized stat records are kept in a
+bounded LRU cache shared by all threads.
+
+The database path defaults to YALM2_LINKDB from the environment, then the
+standard install location. When a shadow rebuild (shadow_db.py) has
+published a new version through the MQ2LinkDB.current pointer next to it,
+connect() opens the version the pointer names.
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+DB_PATH = os.environ.get('YALM2_LINKDB', r'C:\MQ2\lua\yalm2\MQ2LinkDB.db')
+
+POINTER_SUFFIX = '.current'
+
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 64 * 1024
+STATEMENT_CACHE = 256
+CHUNK_SIZE = 500
+STATS_CACHE_SIZE = 20000
+
+# QueryDatabaseForItemId's column list plus the weapon fields get_item_stats reads
+ITEM_COLUMNS = [
+    'id', 'name', 'ac', 'hp', 'mana', 'endur', 'mr', 'fr', 'cr', 'pr', 'dr', 'attack',
+    'regen', 'manaregen', 'healamt', 'clairvoyance', 'reqlevel', 'classes', 'slots',
+    'itemtype', 'questitem', 'nodrop', 'guildfavor', 'cost', 'tradeskills', 'stacksize',
+    'collectible', 'bagtype', 'damage', 'delay', 'backstabdmg',
+]
+
+# get_item_stats key -> raw_item_data column
+STAT_FIELDS = {
+    'ac': 'ac', 'hp': 'hp', 'mana': 'mana', 'endurance': 'endur',
+    'resists_magic': 'mr', 'resists_fire': 'fr', 'resists_cold': 'cr',
+    'resists_poison': 'pr', 'resists_disease': 'dr', 'attack': 'attack',
+    'hp_regen': 'regen', 'mana_regen': 'manaregen', 'heal_amount': 'healamt',
+    'clairvoyance': 'clairvoyance', 'required_level': 'reqlevel', 'classes': 'classes',
+    'slots': 'slots', 'itemtype': 'itemtype', 'damage': 'damage', 'delay': 'delay',
+    'backstabdmg': 'backstabdmg',
+}
+
+def to_number(value):
+    """tonumber(value) or 0"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return 0
+
+def normalize_stats(row):
+    """Row dict -> the stat record get_item_stats builds in Lua"""
+    return {key: to_number(row.get(column)) for key, column in STAT_FIELDS.items()}
+
+def pointer_path(db_path):
+    """MQ2LinkDB.db -> MQ2LinkDB.current (names the published version, if any)"""
+    return os.path.splitext(db_path)[0] + POINTER_SUFFIX
+
+def resolve_db_path(db_path=DB_PATH):
+    """The file a new connection should open: the pointer's target if it exists"""
+    try:
+        with open(pointer_path(db_path), encoding='utf-8') as f:
+            name = f.readline().strip()
+    except OSError:
+        return db_path
+    target = os.path.join(os.path.dirname(db_path), name)
+    return target if name and os.path.isfile(target) else db_path
+
+def connect(db_path=DB_PATH, readonly=True):
+    """Tuned connection to the published version; read-only unless asked otherwise"""
+    db_path = resolve_db_path(db_path)
+    if readonly:
+        uri = Path(db_path).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE, check_same_thread=False)
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+class StatsCache:
+    """Bounded, thread-safe LRU of item_id -> normalized stats"""
+
+    def __init__(self, max_size=STATS_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, item_id):
+        with self._lock:
+            stats = self._items.get(item_id)
+            if stats is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(item_id)
+            self.hits += 1
+            return stats
+
+    def put(self, item_id, stats):
+        with self._lock:
+            self._items[item_id] = stats
+            self._items.move_to_end(item_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+class LinkDB:
+    """MQ2LinkDB reader with per-thread connections and a stats cache"""
+
+    def __init__(self, db_path=DB_PATH, readonly=True, stats_cache_size=STATS_CACHE_SIZE):
+        self.db_path = db_path
+        self.readonly = readonly
+        self.stats_cache = StatsCache(stats_cache_size)
+        self._local = threading.local()
+        self._columns = None
+
+    @property
+    def conn(self):
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect(self.db_path, self.readonly)
+            self._local.conn = conn
+        return conn
+
+    def columns(self):
+        """Columns of raw_item_data"""
+        if self._columns is None:
+            self._columns = [row[1] for row in self.conn.execute('PRAGMA table_info(raw_item_data)')]
+        return self._columns
+
+    def item_columns(self, columns=None):
+        """Requested columns that exist in this database (id first)"""
+        existing = set(self.columns())
+        wanted = columns or ITEM_COLUMNS
+        return ['id'] + [c for c in wanted if c != 'id' and c in existing]
+
+    def get_items(self, item_ids, columns=None):
+        """{id: row dict} for the ids found, one IN query per CHUNK_SIZE ids"""
+        cols = self.item_columns(columns)
+        sql = f"SELECT {', '.join(cols)} FROM raw_item_data WHERE id IN ({', '.join('?' * CHUNK_SIZE)})"
+        item_ids = list(dict.fromkeys(item_ids))
+        found = {}
+        for i in range(0, len(item_ids), CHUNK_SIZE):
+            chunk = item_ids[i:i + CHUNK_SIZE]
+            # Pad to a fixed size so every chunk reuses the same prepared statement
+            chunk += [chunk[-1]] * (CHUNK_SIZE - len(chunk))
+            for row in self.conn.execute(sql, chunk):
+                found[row[0]] = dict(zip(cols, row))
+        return found
+
+    def get_item(self, item_id, columns=None):
+        """QueryDatabaseForItemId equivalent: row dict or None"""
+        cols = self.item_columns(columns)
+        row = self.conn.execute(f"SELECT {', '.join(cols)} FROM raw_item_data WHERE id = ?", (item_id,)).fetchone()
+        return dict(zip(cols, row)) if row else None
+
+    def get_item_stats(self, item_id):
+        """Normalized stats (check_upgrades.lua get_item_stats) or None"""
+        if not item_id:
+            return None
+        stats = self.stats_cache.get(item_id)
+        if stats is None:
+            row = self.get_item(item_id, list(STAT_FIELDS.values()))
+            if row is None:
+                return None
+            stats = normalize_stats(row)
+            self.stats_cache.put(item_id, stats)
+        return stats
+
+    def get_items_stats(self, item_ids):
+        """{id: normalized stats}; cache misses are fetched in one batch"""
+        result = {}
+        missing = []
+        for item_id in item_ids:
+            stats = self.stats_cache.get(item_id)
+            if stats is None:
+                missing.append(item_id)
+            else:
+                result[item_id] = stats
+        if missing:
+            for item_id, row in self.get_items(missing, list(STAT_FIELDS.values())).items():
+                stats = normalize_stats(row)
+                self.stats_cache.put(item_id, stats)
+                result[item_id] = stats
+        return result
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
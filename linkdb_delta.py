@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Row-hash changesets for raw_item_data between two MQ2LinkDB versions
+
+After a Lucy refresh the whole MQ2LinkDB.db is copied to every box, and
+raw_item_data_315 is kept next to raw_item_data only to compare versions.
+This hashes every raw_item_data row and ships only the difference:
+
+    diff     hash both versions (BLAKE2b over the row's non-NULL column
+             name/value pairs, so added all-NULL columns change nothing),
+             then read only the rows whose hash differs and write a
+             gzipped JSON changeset: inserts (whole rows), updates (changed
+             columns only), deletes (ids), new columns, the hash of every
+             inserted/updated row and the table checksum before and after
+    apply    in one BEGIN IMMEDIATE transaction: check the target is at the
+             changeset's base checksum, apply, refresh the derived lookup
+             tables (item_names and its FTS index, item_equip_index) for
+             the touched ids, re-hash the touched rows and check them and
+             the new table checksum; roll back on any mismatch
+    checksum print the table checksum (SHA-256 over id + row hash in id
+             order) to compare boxes without copying anything
+
+Usage:
+    python linkdb_delta.py diff OLD.db NEW.db -o refresh.ldelta [--old-table raw_item_data_315]
+    python linkdb_delta.py apply [--db MQ2LinkDB.db] refresh.ldelta [--dry-run]
+    python linkdb_delta.py checksum [--db MQ2LinkDB.db] [--table raw_item_data_315]
+"""
+
+import sys
+import gzip
+import json
+import time
+import base64
+import hashlib
+import sqlite3
+import argparse
+
+from linkdb import DB_PATH, CHUNK_SIZE, resolve_db_path
+from equip_index import index_exists as equip_index_exists, refresh_items
+from item_names import index_exists as name_index_exists, refresh_names
+
+TABLE = 'raw_item_data'
+FORMAT = 1
+FETCH_SIZE = 5000
+
+class ChangesetError(ValueError):
+    pass
+
+# --- Hashing -------------------------------------------------------------
+
+def encode_value(value):
+    """JSON-safe value; BLOBs become {"b64": ...}"""
+    if isinstance(value, bytes):
+        return {'b64': base64.b64encode(value).decode('ascii')}
+    return value
+
+def decode_value(value):
+    if isinstance(value, dict):
+        return base64.b64decode(value['b64'])
+    return value
+
+def row_hasher(columns):
+    """row -> 16-byte BLAKE2b of its non-NULL (column, type, value) triples in column-name order"""
+    order = sorted(range(len(columns)), key=lambda i: columns[i])
+    prefixes = [(i, columns[i].encode() + b'\x1f') for i in order]
+    blake2b = hashlib.blake2b
+
+    def row_hash(row):
+        h = blake2b(digest_size=16)
+        for i, prefix in prefixes:
+            value = row[i]
+            if value is None:
+                continue
+            if isinstance(value, bytes):
+                encoded = b'b' + value
+            elif isinstance(value, float):
+                encoded = b'f' + repr(value).encode()
+            else:
+                encoded = (b'i' if isinstance(value, int) else b's') + str(value).encode('utf-8', 'surrogatepass')
+            h.update(prefix + encoded + b'\x1e')
+        return h.digest()
+    return row_hash
+
+def table_columns(conn, table):
+    """[(name, declared type)] in table order"""
+    columns = [(row[1], row[2]) for row in conn.execute(f'PRAGMA table_info({table})')]
+    if not columns:
+        raise ChangesetError(f"No table {table}")
+    return columns
+
+def table_hashes(conn, table):
+    """{id: row hash} for every row"""
+    columns = [name for name, _ in table_columns(conn, table)]
+    row_hash = row_hasher(columns)
+    hashes = {}
+    cursor = conn.execute(f'SELECT {", ".join(columns)} FROM {table}')
+    key = columns.index('id')
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            hashes[row[key]] = row_hash(row)
+    return hashes
+
+def checksum(hashes):
+    """Table checksum: SHA-256 over (id, row hash) in id order"""
+    h = hashlib.sha256()
+    for item_id in sorted(hashes):
+        h.update(item_id.to_bytes(8, 'little', signed=True))
+        h.update(hashes[item_id])
+    return h.hexdigest()[:32]
+
+def fetch_rows(conn, table, columns, ids):
+    """{id: row tuple in `columns` order}, chunked like LinkDB.get_items"""
+    rows = {}
+    ids = sorted(ids)
+    select = ', '.join(columns)
+    key = columns.index('id')
+    for i in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[i:i + CHUNK_SIZE]
+        for row in conn.execute(f"SELECT {select} FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk):
+            rows[row[key]] = row
+    return rows
+
+# --- Diff ----------------------------------------------------------------
+
+def diff(old_conn, new_conn, old_table=TABLE, new_table=TABLE):
+    """Changeset dict taking old_table to new_table"""
+    old_columns = table_columns(old_conn, old_table)
+    new_columns = table_columns(new_conn, new_table)
+    old_names = [name for name, _ in old_columns]
+    names = [name for name, _ in new_columns]
+    # Columns only in the old version are compared as NULL and end up NULL
+    compare = names + [name for name in old_names if name not in names]
+
+    old_hashes = table_hashes(old_conn, old_table)
+    new_hashes = table_hashes(new_conn, new_table)
+    inserted = [i for i in new_hashes if i not in old_hashes]
+    deleted = sorted(i for i in old_hashes if i not in new_hashes)
+    changed = [i for i, h in new_hashes.items() if i in old_hashes and old_hashes[i] != h]
+
+    new_rows = fetch_rows(new_conn, new_table, names, inserted + changed)
+    old_rows = fetch_rows(old_conn, old_table, old_names, changed)
+    updates = []
+    for item_id in sorted(changed):
+        old = dict(zip(old_names, old_rows[item_id]))
+        new = dict(zip(names, new_rows[item_id]))
+        updates.append([item_id, {name: encode_value(new.get(name)) for name in compare
+                                  if new.get(name) != old.get(name) or type(new.get(name)) is not type(old.get(name))}])
+
+    return {
+        'format': FORMAT,
+        'table': TABLE,
+        'created': int(time.time()),
+        'base': {'rows': len(old_hashes), 'checksum': checksum(old_hashes)},
+        'target': {'rows': len(new_hashes), 'checksum': checksum(new_hashes)},
+        'add_columns': [[name, decl] for name, decl in new_columns if name not in old_names],
+        'columns': names,
+        'inserts': [[encode_value(v) for v in new_rows[i]] for i in sorted(inserted)],
+        'updates': updates,
+        'deletes': deleted,
+        'hashes': {str(i): new_hashes[i].hex() for i in sorted(inserted + changed)},
+    }
+
+def write_changeset(path, changeset):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(changeset, f, ensure_ascii=False, separators=(',', ':'))
+
+def read_changeset(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        changeset = json.load(f)
+    if changeset.get('format') != FORMAT:
+        raise ChangesetError(f"{path} is not a version {FORMAT} changeset")
+    return changeset
+
+# --- Apply ---------------------------------------------------------------
+
+def apply_changeset(conn, changeset, dry_run=False):
+    """Apply in one transaction, verifying base and result checksums -> summary dict
+
+    conn must be in autocommit mode (isolation_level=None).
+    """
+    table = changeset['table']
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        hashes = table_hashes(conn, table)
+        current = checksum(hashes)
+        if current == changeset['target']['checksum']:
+            conn.execute('ROLLBACK')
+            return {'status': 'up to date', 'checksum': current}
+        if current != changeset['base']['checksum']:
+            raise ChangesetError(f"Database is not at the changeset's base version "
+                                 f"(checksum {current}, expected {changeset['base']['checksum']})")
+
+        existing = {name for name, _ in table_columns(conn, table)}
+        for name, decl in changeset['add_columns']:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+
+        columns = changeset['columns']
+        conn.executemany(f'DELETE FROM {table} WHERE id = ?', [(i,) for i in changeset['deletes']])
+        conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                         [[decode_value(v) for v in row] for row in changeset['inserts']])
+        # One statement per distinct set of changed columns
+        by_columns = {}
+        for item_id, values in changeset['updates']:
+            names = tuple(sorted(values))
+            by_columns.setdefault(names, []).append([decode_value(values[name]) for name in names] + [item_id])
+        for names, params in by_columns.items():
+            conn.executemany(f"UPDATE {table} SET {', '.join(f'{name} = ?' for name in names)} WHERE id = ?", params)
+
+        # Keep the lookup tables derived from raw_item_data in step, as import_lucy --incremental does
+        touched = [int(i) for i in changeset['hashes']]
+        if table == TABLE:
+            if name_index_exists(conn):
+                refresh_names(conn, touched + changeset['deletes'], commit=False)
+            if equip_index_exists(conn):
+                refresh_items(conn, touched + changeset['deletes'], commit=False)
+
+        # Re-hash what was written and check it against the source rows
+        all_columns = [name for name, _ in table_columns(conn, table)]
+        rows = fetch_rows(conn, table, all_columns, touched)
+        row_hash = row_hasher(all_columns)
+        for item_id in touched:
+            if item_id not in rows or row_hash(rows[item_id]).hex() != changeset['hashes'][str(item_id)]:
+                raise ChangesetError(f"Row {item_id} does not match the source after applying")
+            hashes[item_id] = row_hash(rows[item_id])
+        for item_id in changeset['deletes']:
+            hashes.pop(item_id, None)
+        result = checksum(hashes)
+        if result != changeset['target']['checksum'] or len(hashes) != changeset['target']['rows']:
+            raise ChangesetError(f"Checksum after applying is {result}, expected {changeset['target']['checksum']}")
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+    conn.execute('ROLLBACK' if dry_run else 'COMMIT')
+    return {'status': 'verified (rolled back)' if dry_run else 'applied', 'checksum': result}
+
+def describe(changeset):
+    return (f"{len(changeset['inserts'])} inserts, {len(changeset['updates'])} updates "
+            f"({sum(len(values) for _, values in changeset['updates'])} columns), "
+            f"{len(changeset['deletes'])} deletes, {len(changeset['add_columns'])} new columns")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Row-hash changesets for raw_item_data')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('diff', help='Write the changeset taking OLD to NEW')
+    p.add_argument('old', help='Previous MQ2LinkDB.db (the version the boxes have)')
+    p.add_argument('new', help='Refreshed MQ2LinkDB.db')
+    p.add_argument('-o', '--out', required=True, help='Changeset file to write')
+    p.add_argument('--old-table', default=TABLE, help='Table holding the old version (e.g. raw_item_data_315)')
+    p = sub.add_parser('apply', help='Apply a changeset to a box')
+    p.add_argument('changeset')
+    p.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    p.add_argument('--dry-run', action='store_true', help='Apply and verify, then roll back')
+    p = sub.add_parser('checksum', help='Print the raw_item_data checksum')
+    p.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    p.add_argument('--table', default=TABLE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'diff':
+            old_conn = sqlite3.connect(args.old)
+            new_conn = old_conn if args.new == args.old else sqlite3.connect(args.new)
+            changeset = diff(old_conn, new_conn, args.old_table)
+            write_changeset(args.out, changeset)
+            print(f"{describe(changeset)}")
+            print(f"Base {changeset['base']['checksum']} ({changeset['base']['rows']} rows) -> "
+                  f"target {changeset['target']['checksum']} ({changeset['target']['rows']} rows)")
+            print(f"Wrote {args.out} in {time.perf_counter() - start:.2f}s")
+
+        elif args.command == 'apply':
+            changeset = read_changeset(args.changeset)
+            print(describe(changeset))
+            conn = sqlite3.connect(resolve_db_path(args.db), isolation_level=None)
+            result = apply_changeset(conn, changeset, args.dry_run)
+            conn.close()
+            print(f"{result['status'].capitalize()}: checksum {result['checksum']} "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+        else:
+            conn = sqlite3.connect(resolve_db_path(args.db))
+            hashes = table_hashes(conn, args.table)
+            print(f"{args.table}: {len(hashes)} rows, checksum {checksum(hashes)} "
+                  f"({time.perf_counter() - start:.2f}s)")
+    except ChangesetError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Packed single-file Lucy archive with id-indexed random access
+
+The Lucy scrape is ~120k tiny lucy_item_<id>.json files; opening them one
+by one is slow, especially on the D: share. pack turns the directory into
+one .lpak file:
+
+    header   magic, version, record count, index offset
+    records  zlib-compressed JSON, one per item, in id order
+    index    little-endian column arrays sorted by id: id (u32),
+             offset (u64), compressed length (u32), original file size
+             (u32), original file mtime_ns (i64)
+
+Readers memory-map the archive and binary-search the id column in place.
+open_lucy() returns the same reader API for an archive or a loose
+directory, so every tool can be pointed at either.
+
+Usage:
+    python lucy_archive.py pack D:\\Lucy D:\\Lucy.lpak
+    python lucy_archive.py info D:\\Lucy.lpak
+    python lucy_archive.py get D:\\Lucy.lpak 121564
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import zlib
+import struct
+import bisect
+from array import array
+
+MAGIC = b'LUCYPAK1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQ')
+
+# Index columns in file order: (typecode, itemsize)
+INDEX_COLUMNS = [('I', 4), ('Q', 8), ('I', 4), ('I', 4), ('q', 8)]
+
+LUCY_FILE_RE = re.compile(r'^lucy_item_(\d+)\.json$')
+
+def scan_lucy_dir(lucy_dir):
+    """Single directory listing -> {item_id: (path, size, mtime_ns)}"""
+    files = {}
+    with os.scandir(lucy_dir) as entries:
+        for entry in entries:
+            match = LUCY_FILE_RE.match(entry.name)
+            if not match:
+                continue
+            st = entry.stat()
+            files[int(match.group(1))] = (entry.path, st.st_size, st.st_mtime_ns)
+    return files
+
+class LucyDirectory:
+    """Reader over a loose directory of lucy_item_*.json files
+
+    The directory is listed once up front; contains() never touches the disk.
+    With scan=False only get()/get_raw() are usable (parse workers).
+    """
+
+    def __init__(self, path, scan=True):
+        self.path = path
+        self._files = scan_lucy_dir(path) if scan else None
+        self._ids = sorted(self._files) if scan else None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._files
+
+    def contains(self, item_id):
+        return item_id in self._files
+
+    def ids(self):
+        return self._ids
+
+    def stat(self, item_id):
+        """(size, mtime_ns) of the item's source file"""
+        _, size, mtime_ns = self._files[item_id]
+        return size, mtime_ns
+
+    def stats(self):
+        return {item_id: (size, mtime_ns) for item_id, (_, size, mtime_ns) in self._files.items()}
+
+    def get_raw(self, item_id):
+        """JSON bytes of an item, None if it is not in the corpus"""
+        if self._files is None:
+            path = os.path.join(self.path, f'lucy_item_{item_id}.json')
+            if not os.path.exists(path):
+                return None
+        else:
+            entry = self._files.get(item_id)
+            if entry is None:
+                return None
+            path = entry[0]
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def get(self, item_id):
+        raw = self.get_raw(item_id)
+        return json.loads(raw) if raw is not None else None
+
+    def iter_items(self, item_ids=None):
+        """Stream (item_id, data) in id order"""
+        for item_id in (self._ids if item_ids is None else item_ids):
+            data = self.get(item_id)
+            if data is not None:
+                yield item_id, data
+
+    __iter__ = iter_items
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class LucyArchive(LucyDirectory):
+    """Memory-mapped reader over a packed .lpak archive"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a Lucy archive (version {VERSION})")
+        self._count = count
+        view = memoryview(self._mm)
+        columns = []
+        pos = index_offset
+        for typecode, itemsize in INDEX_COLUMNS:
+            raw = view[pos:pos + count * itemsize]
+            if sys.byteorder == 'big':
+                # The index is little-endian on disk: swap into a private copy
+                column = array(typecode)
+                column.frombytes(raw)
+                column.byteswap()
+                raw.release()
+            else:
+                column = raw.cast(typecode)
+            columns.append(column)
+            pos += count * itemsize
+        self._ids, self._offsets, self._lengths, self._sizes, self._mtimes = columns
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, item_id):
+        i = bisect.bisect_left(self._ids, item_id)
+        if i < self._count and self._ids[i] == item_id:
+            return i
+        return -1
+
+    def __contains__(self, item_id):
+        return self._find(item_id) >= 0
+
+    def contains(self, item_id):
+        return self._find(item_id) >= 0
+
+    def ids(self):
+        return self._ids
+
+    def stat(self, item_id):
+        i = self._find(item_id)
+        if i < 0:
+            raise KeyError(item_id)
+        return self._sizes[i], self._mtimes[i]
+
+    def stats(self):
+        return {self._ids[i]: (self._sizes[i], self._mtimes[i]) for i in range(self._count)}
+
+    def _record(self, i):
+        offset = self._offsets[i]
+        return zlib.decompress(self._mm[offset:offset + self._lengths[i]])
+
+    def get_raw(self, item_id):
+        i = self._find(item_id)
+        return self._record(i) if i >= 0 else None
+
+    def iter_items(self, item_ids=None):
+        """Stream (item_id, data); the whole archive is read sequentially"""
+        if item_ids is not None:
+            yield from super().iter_items(item_ids)
+            return
+        for i in range(self._count):
+            yield self._ids[i], json.loads(self._record(i))
+
+    __iter__ = iter_items
+
+    def close(self):
+        # Views into the map have to be released before it can be closed
+        for name in ('_ids', '_offsets', '_lengths', '_sizes', '_mtimes'):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, '_mm', None) is not None:
+            self._mm.close()
+            self._mm = None
+        if getattr(self, '_file', None) is not None:
+            self._file.close()
+            self._file = None
+
+def open_lucy(path, scan=True):
+    """Open a Lucy corpus: a packed archive file or a loose directory"""
+    if os.path.isdir(path):
+        return LucyDirectory(path, scan)
+    return LucyArchive(path)
+
+def pack_lucy_dir(lucy_dir, archive_path, level=6):
+    """Pack a Lucy directory into archive_path; returns the record count
+
+    Written to a temp file and renamed into place, so readers never see a
+    half-written archive.
+    """
+    files = scan_lucy_dir(lucy_dir)
+    columns = [array(typecode) for typecode, _ in INDEX_COLUMNS]
+    ids, offsets, lengths, sizes, mtimes = columns
+    tmp_path = archive_path + '.tmp'
+
+    with open(tmp_path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        for n, item_id in enumerate(sorted(files)):
+            path, size, mtime_ns = files[item_id]
+            with open(path, 'rb') as f:
+                record = zlib.compress(f.read(), level)
+            ids.append(item_id)
+            offsets.append(out.tell())
+            lengths.append(len(record))
+            sizes.append(size)
+            mtimes.append(mtime_ns)
+            out.write(record)
+            if (n + 1) % 10000 == 0:
+                print(f"  Packed {n + 1}/{len(files)}")
+
+        index_offset = out.tell()
+        for column in columns:
+            if sys.byteorder == 'big':
+                column.byteswap()
+            out.write(column.tobytes())
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, len(ids), index_offset))
+
+    os.replace(tmp_path, archive_path)
+    return len(ids)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('pack', 'info', 'get'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'pack':
+        lucy_dir, archive_path = sys.argv[2], sys.argv[3]
+        print(f"Packing {lucy_dir} -> {archive_path}")
+        count = pack_lucy_dir(lucy_dir, archive_path)
+        print(f"Packed {count} items ({os.path.getsize(archive_path) / 1048576:.1f} MB)")
+    elif command == 'info':
+        with open_lucy(sys.argv[2]) as lucy:
+            ids = lucy.ids()
+            print(f"{sys.argv[2]}: {len(lucy)} items")
+            if len(lucy):
+                print(f"  Id range: {ids[0]} - {ids[len(ids) - 1]}")
+    else:
+        with open_lucy(sys.argv[2]) as lucy:
+            data = lucy.get(int(sys.argv[3]))
+            print(json.dumps(data, indent=2) if data is not None else "Not found")
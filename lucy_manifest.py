@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Lucy file manifest stored next to MQ2LinkDB.db
+
+Records id, size, mtime and content hash of every Lucy file that has been
+imported, so import_lucy.py --incremental only touches new, changed and
+deleted items. Rows are written after each committed import batch, which
+makes the manifest double as the resume checkpoint for interrupted runs.
+"""
+
+import os
+import sqlite3
+import hashlib
+
+MANIFEST_NAME = 'lucy_manifest.db'
+
+def manifest_path_for(db_path):
+    """Manifest lives in the same directory as the database"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), MANIFEST_NAME)
+
+def content_hash(raw):
+    """Hash of a Lucy file's bytes"""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+class LucyManifest:
+    """id -> (size, mtime_ns, hash) for every imported Lucy file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS lucy_files (
+                id INTEGER PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            )''')
+        self.conn.commit()
+
+    def load(self):
+        rows = self.conn.execute('SELECT id, size, mtime_ns, hash FROM lucy_files')
+        return {item_id: (size, mtime_ns, digest) for item_id, size, mtime_ns, digest in rows}
+
+    def record(self, entries):
+        """entries: iterable of (id, size, mtime_ns, hash)"""
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO lucy_files (id, size, mtime_ns, hash) VALUES (?, ?, ?, ?)', entries)
+        self.conn.commit()
+
+    def remove(self, item_ids):
+        self.conn.executemany('DELETE FROM lucy_files WHERE id = ?', ((i,) for i in item_ids))
+        self.conn.commit()
+
+    def clear(self):
+        self.conn.execute('DELETE FROM lucy_files')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def plan_changes(stats, manifest):
+    """Compare the corpus {id: (size, mtime_ns)} with the manifest
+
+    Returns (candidates, deleted): ids whose size or mtime differ from the
+    manifest (or are not in it yet), and manifest ids with no file anymore.
+    Candidates still get their hash checked before being re-imported.
+    """
+    candidates = [item_id for item_id, stat in stats.items()
+                  if manifest.get(item_id, (None, None))[:2] != stat]
+    deleted = [item_id for item_id in manifest if item_id not in stats]
+    return sorted(candidates), sorted(deleted)
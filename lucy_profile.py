@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Full-corpus Lucy schema profiler
+
+get_fields_from_sample() and analyze_lucy_fields.py only ever looked at a
+handful of files, so fields that appear in rare items were dropped. This
+scans every Lucy item once (in a process pool) and records per field:
+
+    count     items that have the field
+    types     how many values look INTEGER / REAL / TEXT / EMPTY
+    default   how many values are 0 / False
+    min, max  numeric range
+    distinct  distinct values (exact up to DISTINCT_CAP)
+
+The result is cached as JSON under a fingerprint of the corpus (every
+item's size and mtime), so it is only recomputed when the corpus changes.
+import_lucy.py uses it to pick column types and a hot-column layout.
+
+Usage:
+    python lucy_profile.py [LUCY] [--cache FILE] [--force] [--workers N]
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+from multiprocessing import Pool
+
+from lucy_archive import open_lucy
+
+LUCY_DIR = r'D:\Lucy'
+CACHE_PATH = r'C:\MQ2\lua\yalm2\lucy_profile_cache.json'
+
+CHUNK_SIZE = 2000
+DISTINCT_CAP = 1000
+
+INTEGER_RE = re.compile(r'^-?\d+$')
+REAL_RE = re.compile(r'^-?(\d+\.\d*|\.\d+)([eE][-+]?\d+)?$')
+
+# Columns the Lua runtime reads on every lookup (QueryDatabaseForItemId,
+# get_item_stats); they go first in the row so SQLite reaches them without
+# walking past hundreds of cold columns or into overflow pages
+HOT_COLUMNS = [
+    'name', 'ac', 'hp', 'mana', 'endur', 'mr', 'fr', 'cr', 'pr', 'dr', 'attack',
+    'regen', 'manaregen', 'healamt', 'clairvoyance', 'reqlevel', 'classes', 'slots',
+    'itemtype', 'damage', 'delay', 'backstabdmg', 'questitem', 'nodrop', 'lore',
+    'guildfavor', 'cost', 'tradeskills', 'stacksize', 'collectible', 'bagtype',
+]
+# Hot columns the runtime reads as numbers: INTEGER even when the corpus has
+# no non-empty value for them, instead of TEXT holding '' in every row
+NUMERIC_HOT_COLUMNS = [c for c in HOT_COLUMNS if c not in ('name', 'lore')]
+
+def safe_column(field):
+    """Lucy field name -> SQL column name"""
+    return ''.join(c if c.isalnum() or c == '_' else '_' for c in field)
+
+def value_type(value):
+    """SQL type a single Lucy value fits in, None for empty values"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (bool, int)):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    if isinstance(value, str):
+        if INTEGER_RE.match(value):
+            return 'INTEGER'
+        if REAL_RE.match(value):
+            return 'REAL'
+    return 'TEXT'
+
+def merge_types(current, new):
+    """Widen a column type: INTEGER < REAL < TEXT"""
+    if current is None or current == new:
+        return new if new is not None else current
+    if new is None:
+        return current
+    if {current, new} == {'INTEGER', 'REAL'}:
+        return 'REAL'
+    return 'TEXT'
+
+# --- Profiling -----------------------------------------------------------
+
+_worker_lucy = None
+
+def _init_worker(lucy_path):
+    global _worker_lucy
+    _worker_lucy = open_lucy(lucy_path, scan=False)
+
+def new_field_stats():
+    return {'count': 0, 'types': {}, 'default': 0, 'min': None, 'max': None, 'values': set(), 'capped': False}
+
+def add_value(stats, value):
+    stats['count'] += 1
+    kind = value_type(value) or 'EMPTY'
+    stats['types'][kind] = stats['types'].get(kind, 0) + 1
+    if kind in ('INTEGER', 'REAL'):
+        number = float(value)
+        if number == 0:
+            stats['default'] += 1
+        if stats['min'] is None or number < stats['min']:
+            stats['min'] = number
+        if stats['max'] is None or number > stats['max']:
+            stats['max'] = number
+    elif value in ('False', 'false'):
+        stats['default'] += 1
+    if not stats['capped']:
+        stats['values'].add(str(value))
+        if len(stats['values']) > DISTINCT_CAP:
+            stats['capped'] = True
+
+def merge_field_stats(into, other):
+    into['count'] += other['count']
+    into['default'] += other['default']
+    for kind, n in other['types'].items():
+        into['types'][kind] = into['types'].get(kind, 0) + n
+    for bound, pick in (('min', min), ('max', max)):
+        if other[bound] is not None:
+            into[bound] = other[bound] if into[bound] is None else pick(into[bound], other[bound])
+    into['capped'] = into['capped'] or other['capped']
+    if not into['capped']:
+        into['values'] |= other['values']
+        into['capped'] = len(into['values']) > DISTINCT_CAP
+
+def _profile_chunk(item_ids):
+    fields = {}
+    items = 0
+    for item_id in item_ids:
+        raw = _worker_lucy.get_raw(item_id)
+        if raw is None:
+            continue
+        items += 1
+        for field, value in json.loads(raw).items():
+            if field not in fields:
+                fields[field] = new_field_stats()
+            add_value(fields[field], value)
+    return items, fields
+
+def profile_corpus(lucy, workers=1):
+    """Scan every item of an open Lucy corpus -> profile dict"""
+    item_ids = list(lucy.ids())
+    chunks = [item_ids[i:i + CHUNK_SIZE] for i in range(0, len(item_ids), CHUNK_SIZE)]
+    total_items = 0
+    fields = {}
+
+    if workers <= 1:
+        global _worker_lucy
+        _worker_lucy = lucy
+        results = map(_profile_chunk, chunks)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=(lucy.path,))
+        results = pool.imap_unordered(_profile_chunk, chunks)
+
+    try:
+        for items, partial in results:
+            total_items += items
+            for field, stats in partial.items():
+                if field in fields:
+                    merge_field_stats(fields[field], stats)
+                else:
+                    fields[field] = stats
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    profile = {}
+    for field, stats in sorted(fields.items()):
+        values = stats.pop('values')
+        capped = stats.pop('capped')
+        stats['distinct'] = DISTINCT_CAP if capped else len(values)
+        stats['distinct_capped'] = capped
+        stats['null_rate'] = (total_items - stats['count'] + stats['types'].get('EMPTY', 0)) / total_items if total_items else 0.0
+        stats['default_rate'] = stats['default'] / total_items if total_items else 0.0
+        stats['type'] = column_type(stats)
+        profile[field] = stats
+    return {'items': total_items, 'fields': profile}
+
+def column_type(stats):
+    """Narrowest SQL type that holds every non-empty value seen"""
+    col_type = None
+    for kind in stats['types']:
+        if kind != 'EMPTY':
+            col_type = merge_types(col_type, kind)
+    return col_type or 'TEXT'
+
+# --- Cache ---------------------------------------------------------------
+
+def corpus_fingerprint(lucy):
+    """Hash of every item's (id, size, mtime); changes when any file does"""
+    digest = hashlib.blake2b(digest_size=16)
+    for item_id, (size, mtime_ns) in sorted(lucy.stats().items()):
+        digest.update(f'{item_id}:{size}:{mtime_ns};'.encode())
+    return digest.hexdigest()
+
+def load_profile(lucy, cache_path=CACHE_PATH, workers=1, force=False):
+    """Cached profile for the corpus, recomputed only when it changed
+
+    Returns (profile, from_cache).
+    """
+    fingerprint = corpus_fingerprint(lucy)
+    if not force and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('fingerprint') == fingerprint:
+                return cached['profile'], True
+        except (OSError, ValueError):
+            pass
+
+    profile = profile_corpus(lucy, workers)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': fingerprint, 'profile': profile}, f)
+    os.replace(tmp_path, cache_path)
+    return profile, False
+
+# --- Schema decisions ----------------------------------------------------
+
+def column_layout(profile):
+    """{column: type} in storage order: hot columns, then by how often set"""
+    columns = {}
+    for field, stats in profile['fields'].items():
+        column = safe_column(field)
+        if column != 'id':
+            col_type = stats['type']
+            if column in NUMERIC_HOT_COLUMNS and set(stats['types']) <= {'EMPTY'}:
+                col_type = 'INTEGER'
+            columns[column] = (merge_types(columns[column][0], col_type) if column in columns else col_type,
+                               stats['null_rate'] + stats['default_rate'])
+
+    def sort_key(column):
+        if column in HOT_COLUMNS:
+            return (0, HOT_COLUMNS.index(column), column)
+        return (1, columns[column][1], column)
+
+    return {column: columns[column][0] for column in sorted(columns, key=sort_key)}
+
+def print_profile(profile):
+    print(f"Items profiled: {profile['items']}")
+    print(f"Fields: {len(profile['fields'])}")
+    print()
+    print(f"  {'field':28s} {'type':8s} {'present':>8s} {'null%':>6s} {'dflt%':>6s} {'distinct':>9s}  range")
+    for field, stats in profile['fields'].items():
+        distinct = f"{'>=' if stats['distinct_capped'] else ''}{stats['distinct']}"
+        rng = f"{stats['min']:g} .. {stats['max']:g}" if stats['min'] is not None else ''
+        print(f"  {field[:28]:28s} {stats['type']:8s} {stats['count']:8d} {stats['null_rate'] * 100:6.1f} "
+              f"{stats['default_rate'] * 100:6.1f} {distinct:>9s}  {rng}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile every field of the Lucy corpus')
+    parser.add_argument('lucy', nargs='?', default=LUCY_DIR, help='Lucy directory or .lpak archive')
+    parser.add_argument('--cache', default=CACHE_PATH, help='Profile cache file')
+    parser.add_argument('--force', action='store_true', help='Ignore the cache and rescan')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open_lucy(args.lucy) as lucy:
+        profile, cached = load_profile(lucy, args.cache, max(1, args.workers), args.force)
+    print(f"=== Lucy Profile ({'cached' if cached else 'scanned'} in {time.perf_counter() - start:.1f}s) ===")
+    print_profile(profile)
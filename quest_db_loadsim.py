@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""Concurrent load simulator for quest_tasks.db (lib/quest_database.lua)
+
+Every box in the group opens quest_tasks.db with journal_mode = DELETE and
+lsqlite3's default busy timeout of 0, so a write that collides with another
+box fails with "database is locked" and the Lua code backs off with
+mq.delay(500). This recreates the quest_tasks / quest_objectives schema and
+runs one process per character against it:
+
+    refresh     store_character_tasks: BEGIN, DELETE the character's rows,
+                one freshly prepared INSERT per objective, COMMIT
+    loot        increment_quantity_received: SELECT status, UPDATE "x/y" -> "x+1/y" / "Done"
+    read        get_characters_needing_item (the master looter, before each loot)
+    ml_refresh  store_quest_items_from_refresh on the master looter (character 0):
+                DELETE + INSERT OR REPLACE per item, then PRAGMA synchronous = FULL
+                and PRAGMA optimize
+
+Two writer strategies are compared, each under DELETE and WAL journaling:
+
+    direct      every process writes itself, exactly like the Lua code
+                (busy timeout 0, sleep --retry-delay and retry the whole transaction)
+    batched     processes queue their writes to a single writer process which
+                coalesces them (a refresh supersedes queued loot updates for the
+                same character, repeated increments are summed) and commits each
+                batch in one BEGIN IMMEDIATE transaction with reused statements
+
+Per scenario and operation it reports count, throughput, p50/p99/max
+latency, lock waits (busy events and seconds spent waiting) and writes that
+gave up, plus how the total lock wait splits across operations - which is
+where the refresh stalls come from.
+
+Usage:
+    python quest_db_loadsim.py [--characters 6] [--duration 20] [--journal delete wal]
+                               [--writer direct batched] [--retry-delay 0.5] [--json FILE]
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS quest_tasks (
+        character TEXT NOT NULL,
+        task_name TEXT NOT NULL,
+        objective TEXT NOT NULL,
+        status TEXT NOT NULL,
+        item_name TEXT,
+        updated_at INTEGER,
+        PRIMARY KEY (character, task_name, objective)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS quest_objectives (
+        objective TEXT PRIMARY KEY,
+        task_name TEXT NOT NULL,
+        item_name TEXT,
+        matched_at INTEGER,
+        created_at INTEGER
+    )''',
+]
+
+JOURNAL_MODES = ['delete', 'wal']
+WRITERS = ['direct', 'batched']
+OPERATIONS = ['refresh', 'loot', 'read', 'ml_refresh']
+WRITE_OPERATIONS = {'refresh', 'loot', 'ml_refresh'}
+
+# Workload shape: tasks shared across the group, so boxes need the same items
+TASK_COUNT = 12
+TASKS_PER_CHARACTER = 8
+OBJECTIVES_PER_TASK = 3
+ITEM_NEEDED = (1, 5)
+
+# Per-character operation mix (fractions of one think-time tick)
+REFRESH_SHARE = 0.15
+LOOT_SHARE = 0.55
+ML_REFRESH_SHARE = 0.05
+
+# Batched writer: gather up to this many ops or this long before committing
+BATCH_WINDOW = 0.05
+BATCH_MAX = 500
+WRITER_BUSY_TIMEOUT = 5.0
+OPTIMIZE_EVERY = 200
+
+def now_ms():
+    """mq.gettime() stand-in"""
+    return int(time.time() * 1000)
+
+def is_locked(error):
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+# --- Workload ------------------------------------------------------------
+
+def character_name(index):
+    return f'Char{index + 1:02d}'
+
+def build_tasks(rng, index):
+    """[(task_name, objective, item_name, needed)] for one character"""
+    tasks = []
+    for task in sorted(rng.sample(range(TASK_COUNT), TASKS_PER_CHARACTER)):
+        for obj in range(OBJECTIVES_PER_TASK):
+            item = f'Quest Item {task:02d}-{obj}'
+            tasks.append((f'Task {task:02d}', f'Loot {item} from the simulated camp', item,
+                          rng.randint(*ITEM_NEEDED)))
+    return tasks
+
+class CharacterState:
+    """In-game view of one character's objectives (what a refresh would write)"""
+
+    def __init__(self, rng, index):
+        self.name = character_name(index)
+        self.tasks = build_tasks(rng, index)
+        self.received = {item: 0 for _, _, item, _ in self.tasks}
+
+    def status(self, item, needed):
+        received = self.received[item]
+        return 'Done' if received >= needed else f'{received}/{needed}'
+
+    def rows(self, timestamp):
+        return [(self.name, task, objective, self.status(item, needed), item, timestamp)
+                for task, objective, item, needed in self.tasks]
+
+    def open_items(self):
+        return [item for _, _, item, needed in self.tasks if self.received[item] < needed]
+
+def next_status(status, count=1):
+    """increment_quantity_received status arithmetic; None if status is not "x/y" """
+    if not status or status == 'Done' or '/' not in status:
+        return None
+    received, _, needed = status.partition('/')
+    if not (received.isdigit() and needed.isdigit()):
+        return None
+    received = int(received) + count
+    return 'Done' if received >= int(needed) else f'{received}/{needed}'
+
+def ml_refresh_items(states):
+    """store_quest_items_from_refresh input: {item: [(character, task, objective, status)]}"""
+    items = {}
+    for state in states:
+        for task, objective, item, needed in state.tasks:
+            status = state.status(item, needed)
+            if status != 'Done':
+                items.setdefault(item, []).append((state.name, task, objective, status))
+    return items
+
+# --- Lua write paths -----------------------------------------------------
+
+def open_db(db_path, busy_timeout=0.0, statement_cache=0):
+    """Connection like get_db(): autocommit, explicit transactions
+
+    statement_cache=0 re-prepares every statement, as the Lua code does with
+    db:prepare() / stmt:finalize() per row.
+    """
+    conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None,
+                           cached_statements=statement_cache)
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA cache_size = 10000')
+    return conn
+
+def store_character_tasks(conn, name, rows):
+    conn.execute('BEGIN TRANSACTION')
+    conn.execute('DELETE FROM quest_tasks WHERE character = ?', (name,))
+    for row in rows:
+        conn.execute('INSERT INTO quest_tasks (character, task_name, objective, status, item_name, updated_at) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', row)
+    conn.execute('COMMIT')
+
+def increment_quantity_received(conn, name, item):
+    row = conn.execute('SELECT status FROM quest_tasks WHERE character = ? AND item_name = ? LIMIT 1',
+                       (name, item)).fetchone()
+    status = next_status(row[0] if row else '')
+    if status is None:
+        return
+    conn.execute('UPDATE quest_tasks SET status = ?, updated_at = ? WHERE character = ? AND item_name = ?',
+                 (status, now_ms(), name, item))
+
+def store_quest_items_from_refresh(conn, quest_items):
+    timestamp = now_ms()
+    conn.execute('BEGIN TRANSACTION')
+    for item in quest_items:
+        conn.execute("DELETE FROM quest_tasks WHERE item_name = ? AND status != 'Done'", (item,))
+    for item, characters in quest_items.items():
+        for name, task, objective, status in characters:
+            conn.execute('INSERT OR REPLACE INTO quest_tasks (character, task_name, objective, status, item_name, '
+                         'updated_at) VALUES (?, ?, ?, ?, ?, ?)', (name, task, objective, status, item, timestamp))
+    conn.execute('COMMIT')
+    conn.execute('PRAGMA synchronous = FULL')
+    conn.execute('PRAGMA optimize')
+
+def get_characters_needing_item(conn, item):
+    return conn.execute("SELECT character, status, task_name, objective FROM quest_tasks "
+                        "WHERE item_name = ? AND status NOT LIKE 'Done' ORDER BY character", (item,)).fetchall()
+
+def with_retries(conn, func, retries, delay):
+    """Run func(conn), sleeping delay and retrying on a locked database
+
+    Returns (busy events, seconds waited, gave up).
+    """
+    busy = 0
+    waited = 0.0
+    while True:
+        try:
+            func(conn)
+            return busy, waited, False
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            busy += 1
+            if busy > retries:
+                return busy, waited, True
+            start = time.monotonic()
+            time.sleep(delay)
+            waited += time.monotonic() - start
+
+# --- Processes -----------------------------------------------------------
+
+def character_process(index, config, results, writes):
+    """One box: refreshes, loot updates and (character 0) master-looter traffic
+
+    writes is None for direct writes, else the batched writer's queue.
+    """
+    rng = random.Random(config['seed'] * 1000 + index)
+    states = [CharacterState(random.Random(config['seed'] * 1000 + i), i) for i in range(config['characters'])]
+    state = states[index]
+    conn = open_db(config['db'], config['busy_timeout'])
+    records = []
+
+    def direct(op, func):
+        start = time.monotonic()
+        busy, waited, failed = with_retries(conn, func, config['retries'], config['retry_delay'])
+        records.append((op, time.monotonic() - start, busy, waited, failed))
+
+    def write(op, func, payload):
+        if writes is None:
+            direct(op, func)
+        else:
+            writes.put((op, state.name, payload, time.monotonic()))
+
+    while time.time() < config['start_at']:
+        time.sleep(0.001)
+    deadline = time.monotonic() + config['duration']
+    while time.monotonic() < deadline:
+        roll = rng.random()
+        if index == 0 and roll < ML_REFRESH_SHARE:
+            for other in states[1:]:
+                for item in other.open_items()[:1]:
+                    other.received[item] += rng.random() < 0.5
+            items = ml_refresh_items(states)
+            write('ml_refresh', lambda c: store_quest_items_from_refresh(c, items), items)
+        elif roll < REFRESH_SHARE:
+            rows = state.rows(now_ms())
+            write('refresh', lambda c: store_character_tasks(c, state.name, rows), rows)
+        elif roll < REFRESH_SHARE + LOOT_SHARE:
+            open_items = state.open_items()
+            if open_items:
+                item = rng.choice(open_items)
+                direct('read', lambda c: get_characters_needing_item(c, item))
+                state.received[item] += 1
+                write('loot', lambda c: increment_quantity_received(c, state.name, item), item)
+        time.sleep(rng.expovariate(1.0 / config['think_time']))
+
+    conn.close()
+    if writes is not None:
+        writes.put(None)
+    results.put(records)
+
+def coalesce(batch):
+    """Drop superseded writes from one batch, preserving order
+
+    A refresh replaces every row of its character, so earlier refreshes and
+    loot updates of that character are dropped; only the last ml_refresh is
+    kept; loot updates of the same (character, item) are summed into the
+    last one. Returns [(op, character, payload, count)] and the number of
+    writes absorbed.
+    """
+    kept = []
+    refreshed = set()
+    ml_seen = False
+    loot_counts = {}
+    for op, name, payload, _ in reversed(batch):
+        if op == 'ml_refresh':
+            if not ml_seen:
+                kept.append((op, name, payload, 1))
+            ml_seen = True
+        elif name in refreshed:
+            continue
+        elif op == 'refresh':
+            refreshed.add(name)
+            kept.append((op, name, payload, 1))
+        else:
+            key = (name, payload)
+            if key not in loot_counts:
+                loot_counts[key] = 0
+                kept.append((op, name, payload, None))
+            loot_counts[key] += 1
+    kept = [(op, name, payload, count if count is not None else loot_counts[(name, payload)])
+            for op, name, payload, count in reversed(kept)]
+    return kept, len(batch) - len(kept)
+
+def apply_batch(conn, ops):
+    """Commit coalesced writes in one transaction; statements are prepared once per connection"""
+    timestamp = now_ms()
+    for op, name, payload, count in ops:
+        if op == 'refresh':
+            conn.execute('DELETE FROM quest_tasks WHERE character = ?', (name,))
+            conn.executemany('INSERT INTO quest_tasks (character, task_name, objective, status, item_name, '
+                             'updated_at) VALUES (?, ?, ?, ?, ?, ?)', payload)
+        elif op == 'loot':
+            row = conn.execute('SELECT status FROM quest_tasks WHERE character = ? AND item_name = ? LIMIT 1',
+                               (name, payload)).fetchone()
+            status = next_status(row[0] if row else '', count)
+            if status is not None:
+                conn.execute('UPDATE quest_tasks SET status = ?, updated_at = ? '
+                             'WHERE character = ? AND item_name = ?', (status, timestamp, name, payload))
+        else:
+            conn.executemany("DELETE FROM quest_tasks WHERE item_name = ? AND status != 'Done'",
+                             [(item,) for item in payload])
+            conn.executemany('INSERT OR REPLACE INTO quest_tasks (character, task_name, objective, status, '
+                             'item_name, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                             [(n, task, objective, status, item, timestamp)
+                              for item, characters in payload.items()
+                              for n, task, objective, status in characters])
+
+def writer_process(config, writes, results):
+    """Single writer: drain the queue, coalesce, one BEGIN IMMEDIATE per batch"""
+    conn = open_db(config['db'], WRITER_BUSY_TIMEOUT, statement_cache=64)
+    records = []
+    batches = 0
+    absorbed = 0
+    remaining = config['characters']
+    while remaining:
+        try:
+            first = writes.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        batch = []
+        deadline = time.monotonic() + BATCH_WINDOW
+        item = first
+        while True:
+            if item is None:
+                remaining -= 1
+            else:
+                batch.append(item)
+            if not remaining or len(batch) >= BATCH_MAX:
+                break
+            try:
+                item = writes.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        if not batch:
+            continue
+
+        ops, dropped = coalesce(batch)
+        start = time.monotonic()
+        conn.execute('BEGIN IMMEDIATE')
+        waited = time.monotonic() - start
+        apply_batch(conn, ops)
+        conn.execute('COMMIT')
+        committed = time.monotonic()
+        batches += 1
+        absorbed += dropped
+        if batches % OPTIMIZE_EVERY == 0:
+            conn.execute('PRAGMA optimize')
+        busy = 1 if waited > 0.001 else 0
+        for op, _, _, submitted in batch:
+            records.append((op, committed - submitted, busy, waited, False))
+    conn.close()
+    results.put(records)
+    results.put({'batches': batches, 'coalesced': absorbed})
+
+# --- Scenario driver -----------------------------------------------------
+
+def create_db(db_path, journal_mode, states):
+    for suffix in ('', '-journal', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute('BEGIN')
+    for state in states:
+        conn.executemany('INSERT INTO quest_tasks VALUES (?, ?, ?, ?, ?, ?)', state.rows(now_ms()))
+        conn.executemany('INSERT OR REPLACE INTO quest_objectives VALUES (?, ?, ?, ?, ?)',
+                         [(objective, task, item, now_ms(), now_ms()) for task, objective, item, _ in state.tasks])
+    conn.execute('COMMIT')
+    conn.close()
+
+def summarize(records, seconds):
+    """{op: stats} plus an 'all_writes' rollup"""
+    by_op = {}
+    for op, latency, busy, waited, failed in records:
+        by_op.setdefault(op, []).append((latency, busy, waited, failed))
+    by_op['all_writes'] = [r for op in WRITE_OPERATIONS for r in by_op.get(op, [])]
+    total_waited = sum(r[2] for r in by_op['all_writes']) + sum(r[2] for r in by_op.get('read', []))
+
+    summary = {}
+    for op in OPERATIONS + ['all_writes']:
+        rows = by_op.get(op)
+        if not rows:
+            continue
+        latencies = sorted(r[0] for r in rows)
+        waited = sum(r[2] for r in rows)
+        summary[op] = {
+            'count': len(rows),
+            'ops_per_sec': round(len(rows) / seconds, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+            'busy_events': sum(r[1] for r in rows),
+            'lock_wait_s': round(waited, 3),
+            'lock_wait_share': round(waited / total_waited, 3) if total_waited and op != 'all_writes' else None,
+            'failed': sum(1 for r in rows if r[3]),
+        }
+    return summary
+
+def run_scenario(work, journal_mode, writer, args):
+    db_path = os.path.join(work, f'quest_tasks_{journal_mode}_{writer}.db')
+    states = [CharacterState(random.Random(args.seed * 1000 + i), i) for i in range(args.characters)]
+    create_db(db_path, journal_mode, states)
+    config = {
+        'db': db_path,
+        'characters': args.characters,
+        'duration': args.duration,
+        'think_time': args.think_time,
+        'retries': args.retries,
+        'retry_delay': args.retry_delay,
+        'busy_timeout': args.busy_timeout,
+        'seed': args.seed,
+        'start_at': time.time() + 1.0,
+    }
+
+    results = multiprocessing.Queue()
+    writes = multiprocessing.Queue() if writer == 'batched' else None
+    processes = [multiprocessing.Process(target=character_process, args=(i, config, results, writes))
+                 for i in range(args.characters)]
+    if writes is not None:
+        processes.append(multiprocessing.Process(target=writer_process, args=(config, writes, results)))
+    for process in processes:
+        process.start()
+
+    records = []
+    extra = {}
+    expected = len(processes) + (1 if writes is not None else 0)
+    for _ in range(expected):
+        message = results.get()
+        if isinstance(message, dict):
+            extra.update(message)
+        else:
+            records.extend(message)
+    for process in processes:
+        process.join()
+
+    return {'journal_mode': journal_mode, 'writer': writer, 'seconds': args.duration,
+            'operations': summarize(records, args.duration), **extra}
+
+def print_scenario(scenario):
+    extra = ''
+    if 'batches' in scenario:
+        extra = f" - {scenario['batches']} batches, {scenario['coalesced']} writes coalesced"
+    print(f"\n=== journal_mode={scenario['journal_mode'].upper()} writer={scenario['writer']}{extra} ===")
+    print(f"  {'operation':11s} {'count':>7s} {'ops/s':>8s} {'p50 ms':>9s} {'p99 ms':>9s} {'max ms':>9s} "
+          f"{'busy':>6s} {'wait s':>8s} {'share':>6s} {'failed':>6s}")
+    for op, s in scenario['operations'].items():
+        share = f"{s['lock_wait_share'] * 100:.0f}%" if s['lock_wait_share'] is not None else ''
+        print(f"  {op:11s} {s['count']:7d} {s['ops_per_sec']:8.1f} {s['p50_ms']:9.2f} {s['p99_ms']:9.2f} "
+              f"{s['max_ms']:9.2f} {s['busy_events']:6d} {s['lock_wait_s']:8.2f} {share:>6s} {s['failed']:6d}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate concurrent quest_tasks.db traffic from a group of boxes')
+    parser.add_argument('--characters', type=int, default=6, help='Boxes writing concurrently (character 0 is the ML)')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per scenario')
+    parser.add_argument('--think-time', type=float, default=0.05, help='Mean seconds between operations per box')
+    parser.add_argument('--journal', nargs='+', choices=JOURNAL_MODES, default=JOURNAL_MODES)
+    parser.add_argument('--writer', nargs='+', choices=WRITERS, default=WRITERS)
+    parser.add_argument('--retry-delay', type=float, default=0.5, help='Sleep after "database is locked" (mq.delay(500))')
+    parser.add_argument('--retries', type=int, default=5, help='Retries before a direct write gives up')
+    parser.add_argument('--busy-timeout', type=float, default=0.0,
+                        help='SQLite busy timeout for direct connections in seconds (lsqlite3 default: 0)')
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--work', help='Directory for the scenario databases (default: temporary)')
+    parser.add_argument('--json', help='Write the full report as JSON')
+    args = parser.parse_args()
+
+    work = args.work or tempfile.mkdtemp(prefix='quest_db_loadsim_')
+    os.makedirs(work, exist_ok=True)
+    print(f"{args.characters} characters, {args.duration:.0f}s per scenario, think time {args.think_time * 1000:.0f}ms, "
+          f"retry delay {args.retry_delay * 1000:.0f}ms, busy timeout {args.busy_timeout * 1000:.0f}ms")
+    scenarios = []
+    try:
+        for journal_mode in args.journal:
+            for writer in args.writer:
+                scenario = run_scenario(work, journal_mode, writer, args)
+                print_scenario(scenario)
+                scenarios.append(scenario)
+    finally:
+        if not args.work:
+            shutil.rmtree(work, ignore_errors=True)
+
+    if args.json:
+        report = {'run_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'sqlite': sqlite3.sqlite_version,
+                  'config': {k: v for k, v in vars(args).items() if k not in ('json', 'work')},
+                  'scenarios': scenarios}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Shadow rebuilds of MQ2LinkDB: build a copy, verify it, publish it atomically
+
+Rebuilding raw_item_data in place drops the table that every running YALM2
+instance is reading, so QueryDatabaseForItemId sees a missing table or a
+locked file until the import finishes. A shadow rebuild never touches the
+published file:
+
+    prepare   copy the published database (SQLite backup API, so readers
+              are not blocked) and the import manifest into shadow_build/
+              next to it; for a full rebuild the tables the import
+              recreates are dropped from the copy first
+    build     import_lucy.py --shadow runs its usual full or incremental
+              import against the copy, then recomputes the derived tables
+              the copy carries (best_in_slot, weapon_ladder,
+              armor_item_index) from the new raw_item_data, or drops one
+              when its tool cannot run here (numpy missing, no armor
+              config), so none describes the previous items
+    verify    integrity_check, every table and index of the published
+              database still present (derived tables excepted), row count within MAX_SHRINK of the
+              published one (and of the Lucy corpus), and sample
+              QueryDatabaseForItemId and name lookups
+    publish   the copy is moved next to the live file as
+              MQ2LinkDB.<YYYYmmdd_HHMMSS>.db and os.replace()d over
+              MQ2LinkDB.db. Windows refuses that while MQ2 or a Lua script
+              has the file open, so the fallback is a version pointer:
+              MQ2LinkDB.current holds the new file's name and is itself
+              replaced atomically. lib/database.lua, linkdb.connect() and
+              item_daemon.py open what the pointer names on their next
+              connection, and the tools that write derived tables
+              (equip_index.py, item_names.py, armor_index.py, ...) write
+              to it through linkdb.resolve_db_path(); connections already
+              open keep reading the version they opened.
+    prune     old versions beyond the published one and the KEEP_VERSIONS
+              newest are deleted; files still open are retried next time
+
+Usage:
+    python import_lucy.py --shadow [--incremental]     (prepare, build, verify, publish)
+    python shadow_db.py status [--db PATH]
+    python shadow_db.py verify FILE [--db PATH] [--lucy DIR] [--quick]
+    python shadow_db.py publish FILE [--db PATH] [--pointer] [--force]
+    python shadow_db.py prune [--db PATH] [--keep N]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+from pathlib import Path
+
+from linkdb import ITEM_COLUMNS, pointer_path, resolve_db_path
+from lucy_manifest import MANIFEST_NAME
+
+DB_PATH = r'C:\MQ2\resources\MQ2LinkDB.db'
+
+STAGING_DIR = 'shadow_build'
+# Import state kept next to the database, staged and published with it
+STAGED_FILES = [MANIFEST_NAME, 'lucy_profile_cache.json']
+BACKUP_PAGES = 4096
+
+KEEP_VERSIONS = 2
+# Largest row-count drop (and share of sampled ids missing) that still publishes
+MAX_SHRINK = 0.05
+SAMPLE_LOOKUPS = 200
+
+# A reader may have the pointer open for a moment (Windows refuses the replace then)
+POINTER_RETRIES = 20
+POINTER_RETRY_S = 0.05
+
+def staging_path(db_path=DB_PATH):
+    folder, name = os.path.split(os.path.abspath(db_path))
+    return os.path.join(folder, STAGING_DIR, name)
+
+def version_pattern(db_path):
+    base, ext = os.path.splitext(os.path.basename(db_path))
+    return re.compile(rf'{re.escape(base)}\.(\d{{8}}_\d{{6}}){re.escape(ext)}$')
+
+def versions(db_path=DB_PATH):
+    """Published version files next to the database, oldest first"""
+    folder = os.path.dirname(os.path.abspath(db_path))
+    pattern = version_pattern(db_path)
+    return sorted((name for name in os.listdir(folder) if pattern.match(name)),
+                  key=lambda name: pattern.match(name).group(1))
+
+def _open_ro(path):
+    return sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+
+def _tables(conn):
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+# --- Prepare ---------------------------------------------------------------
+
+def prepare(db_path=DB_PATH, drop=()):
+    """Fresh staging copy of the published database (minus the drop tables) -> its path"""
+    shadow = staging_path(db_path)
+    staging = os.path.dirname(shadow)
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)       # left over from a failed or unpublished build
+    os.makedirs(staging)
+
+    live = resolve_db_path(db_path)
+    if os.path.isfile(live):
+        src = _open_ro(live)
+        dst = sqlite3.connect(shadow)
+        src.backup(dst, pages=BACKUP_PAGES)
+        src.close()
+        dropped = [table for table in drop if table in _tables(dst)]
+        for table in dropped:
+            dst.execute(f'DROP TABLE IF EXISTS {table}')
+        dst.commit()
+        if dropped:
+            dst.execute('VACUUM')
+        dst.close()
+        print(f"Shadow copy of {live}: {shadow}")
+    else:
+        print(f"No published database yet; building {shadow} from scratch")
+
+    folder = os.path.dirname(os.path.abspath(db_path))
+    for name in STAGED_FILES:
+        if os.path.isfile(os.path.join(folder, name)):
+            shutil.copy2(os.path.join(folder, name), os.path.join(staging, name))
+    return shadow
+
+# --- Derived tables --------------------------------------------------------
+
+def _build_best_in_slot(conn):
+    from upgrade_scoring import load_stat_arrays, compute_best_in_slot, write_best_in_slot
+    ids, stats = load_stat_arrays(conn)
+    write_best_in_slot(conn, compute_best_in_slot(ids, stats))
+
+def _build_weapon_ladder(conn):
+    from upgrade_scoring import load_stat_arrays
+    from weapon_ladder import build
+    build(conn, *load_stat_arrays(conn, 'CAST(damage AS INTEGER) > 0 AND CAST(delay AS INTEGER) > 0'))
+
+def _build_armor_index(conn):
+    from armor_config import ArmorConfig, CONFIG_PATH
+    from armor_index import ArmorClassifier, load_rules, compile_index, write_index, config_fingerprint
+    progressions, sets = load_rules(ArmorConfig(CONFIG_PATH))
+    rows, _ = compile_index(conn, ArmorClassifier(progressions, sets))
+    write_index(conn, rows, config_fingerprint(progressions, sets))
+
+# Tables other tools compute from raw_item_data: (table, companion tables, builder)
+DERIVED_TABLES = [
+    ('best_in_slot', [], _build_best_in_slot),
+    ('weapon_ladder', [], _build_weapon_ladder),
+    ('armor_item_index', ['armor_item_index_meta'], _build_armor_index),
+]
+
+def derived_table_names():
+    return {name for table, companions, _ in DERIVED_TABLES for name in [table] + companions}
+
+def rebuild_derived(shadow):
+    """Recompute the derived tables the copy carries -> [(table, 'rebuilt' or why it was dropped)]"""
+    results = []
+    conn = sqlite3.connect(shadow)
+    try:
+        present = _tables(conn)
+        for table, companions, builder in DERIVED_TABLES:
+            if table not in present:
+                continue
+            try:
+                builder(conn)
+                results.append((table, 'rebuilt'))
+            except (ImportError, OSError, ValueError, sqlite3.Error) as e:
+                conn.rollback()
+                for name in [table] + companions:
+                    conn.execute(f'DROP TABLE IF EXISTS {name}')
+                conn.commit()
+                results.append((table, f'dropped ({type(e).__name__}: {e})'))
+    finally:
+        conn.close()
+    return results
+
+# --- Verify ----------------------------------------------------------------
+
+def _schema(conn):
+    return {(kind, name) for kind, name in conn.execute(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_%'")}
+
+def _sample_ids(conn, samples):
+    ids = [row[0] for row in conn.execute('SELECT id FROM raw_item_data')]
+    return random.sample(ids, min(samples, len(ids)))
+
+def _lookups(conn, live_columns, item_ids, lucy_ids):
+    """Sample lookups the way the Lua layer makes them -> (ok, detail)"""
+    existing = [row[1] for row in conn.execute('PRAGMA table_info(raw_item_data)')]
+    missing_columns = [c for c in ITEM_COLUMNS if c in live_columns and c not in existing]
+    if missing_columns:
+        return False, f"QueryDatabaseForItemId columns missing: {', '.join(missing_columns)}"
+    columns = [c for c in ITEM_COLUMNS if c in existing]
+    item_sql = f"SELECT {', '.join(columns)} FROM raw_item_data WHERE id = ?"
+
+    expected = [i for i in item_ids if lucy_ids is None or i in lucy_ids]
+    start = time.perf_counter()
+    missing, names = 0, []
+    for item_id in expected:
+        row = conn.execute(item_sql, (item_id,)).fetchone()
+        if row is None:
+            missing += 1
+        elif 'name' in columns and row[columns.index('name')]:
+            names.append(row[columns.index('name')])
+    unresolved = sum(conn.execute('SELECT 1 FROM raw_item_data WHERE name = ? LIMIT 1', (name,)).fetchone() is None
+                     for name in names)
+    if 'item_names' in _tables(conn):
+        from item_names import register_functions, resolve_name
+        register_functions(conn)
+        unresolved += sum(not any(match == 'exact' for _, _, match in resolve_name(conn, name, limit=1))
+                          for name in names)
+    ms = (time.perf_counter() - start) * 1000 / max(1, len(expected) + len(names))
+    if missing > MAX_SHRINK * len(expected) or unresolved:
+        return False, f"{missing}/{len(expected)} sampled ids missing, {unresolved} name lookups failed"
+    return True, f"{len(expected) - missing}/{len(expected)} sampled ids found, {len(names)} names resolved, {ms:.2f} ms/lookup"
+
+def verify(shadow, db_path=DB_PATH, lucy_ids=None, samples=SAMPLE_LOOKUPS, quick=False):
+    """Check a rebuilt database before it is published -> [(check, ok, detail)]"""
+    checks = []
+    conn = _open_ro(shadow)
+    live_path = resolve_db_path(db_path)
+    live = _open_ro(live_path) if os.path.isfile(live_path) and os.path.abspath(live_path) != os.path.abspath(shadow) else None
+    try:
+        result = [row[0] for row in conn.execute(f"PRAGMA {'quick_check' if quick else 'integrity_check'}")]
+        checks.append(('integrity', result == ['ok'], '; '.join(result[:5])))
+
+        if 'raw_item_data' not in _tables(conn):
+            checks.append(('tables', False, 'raw_item_data is missing'))
+            return checks
+        if live is not None:
+            # Derived tables may have been dropped (rebuild_derived); their tools recreate them
+            derived = derived_table_names()
+            optional = {name for name, table in live.execute('SELECT name, tbl_name FROM sqlite_master')
+                        if table in derived}
+            missing = sorted(name for _, name in _schema(live) - _schema(conn) if name not in optional)
+            checks.append(('tables', not missing, f"missing: {', '.join(missing)}" if missing
+                           else f"{len(_schema(conn))} tables and indexes"))
+
+        count = conn.execute('SELECT COUNT(*) FROM raw_item_data').fetchone()[0]
+        floors = []
+        if live is not None and 'raw_item_data' in _tables(live):
+            floors.append(('published', live.execute('SELECT COUNT(*) FROM raw_item_data').fetchone()[0]))
+        if lucy_ids is not None:
+            floors.append(('Lucy', len(lucy_ids)))
+        short = [f"{label} {n}" for label, n in floors if count < (1 - MAX_SHRINK) * n]
+        checks.append(('row_count', count > 0 and not short,
+                       f"{count} rows" + (f" (vs {', '.join(f'{label} {n}' for label, n in floors)})" if floors else '')))
+
+        sample_conn = live if live is not None and 'raw_item_data' in _tables(live) else conn
+        live_columns = {row[1] for row in sample_conn.execute('PRAGMA table_info(raw_item_data)')}
+        checks.append(('lookups',) + _lookups(conn, live_columns, _sample_ids(sample_conn, samples), lucy_ids))
+    finally:
+        conn.close()
+        if live is not None:
+            live.close()
+    return checks
+
+def print_checks(checks):
+    for name, ok, detail in checks:
+        print(f"  {'ok  ' if ok else 'FAIL'} {name:10s} {detail}")
+    return all(ok for _, ok, _ in checks)
+
+# --- Publish ---------------------------------------------------------------
+
+def write_pointer(db_path, name):
+    """Atomically point readers at the version file `name`"""
+    pointer = pointer_path(db_path)
+    tmp = pointer + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(name + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    for attempt in range(POINTER_RETRIES):
+        try:
+            os.replace(tmp, pointer)
+            return
+        except PermissionError:
+            if attempt == POINTER_RETRIES - 1:
+                raise
+            time.sleep(POINTER_RETRY_S)
+
+def publish(shadow, db_path=DB_PATH, use_pointer=False):
+    """Make `shadow` the database new connections open -> (mode, path)
+
+    mode is 'replaced' when the file was renamed over db_path, else 'pointer'.
+    """
+    for suffix in ('-journal', '-wal'):
+        if os.path.exists(shadow + suffix):
+            raise RuntimeError(f"{shadow} has an open {suffix[1:]}; close its writer first")
+
+    folder = os.path.dirname(os.path.abspath(db_path))
+    base, ext = os.path.splitext(os.path.basename(db_path))
+    version = os.path.join(folder, f"{base}.{time.strftime('%Y%m%d_%H%M%S')}{ext}")
+    if os.path.exists(version):
+        raise FileExistsError(f"{version} already exists")
+    os.replace(shadow, version)
+
+    mode, path = 'pointer', version
+    if not use_pointer:
+        try:
+            os.replace(version, db_path)
+            mode, path = 'replaced', db_path
+        except PermissionError:
+            pass     # open by a reader (Windows)
+    if mode == 'replaced':
+        try:
+            os.remove(pointer_path(db_path))
+        except FileNotFoundError:
+            pass
+    else:
+        write_pointer(db_path, os.path.basename(version))
+
+    staging = os.path.dirname(os.path.abspath(shadow))
+    if os.path.basename(staging) == STAGING_DIR:
+        for name in STAGED_FILES:
+            if os.path.isfile(os.path.join(staging, name)):
+                os.replace(os.path.join(staging, name), os.path.join(folder, name))
+        shutil.rmtree(staging, ignore_errors=True)
+    return mode, path
+
+def prune(db_path=DB_PATH, keep=KEEP_VERSIONS):
+    """Delete old version files -> (removed, still open)"""
+    folder = os.path.dirname(os.path.abspath(db_path))
+    current = os.path.basename(resolve_db_path(db_path))
+    names = [name for name in versions(db_path) if name != current]
+    removed, busy = [], []
+    for name in names[:-keep] if keep else names:
+        try:
+            os.remove(os.path.join(folder, name))
+            removed.append(name)
+        except PermissionError:
+            busy.append(name)
+    return removed, busy
+
+def status(db_path=DB_PATH):
+    folder = os.path.dirname(os.path.abspath(db_path))
+    current = resolve_db_path(db_path)
+    print(f"Database:  {db_path}")
+    print(f"Published: {current}" + (' (via ' + pointer_path(db_path) + ')' if current != db_path else ''))
+    for name in versions(db_path):
+        size = os.path.getsize(os.path.join(folder, name)) / 2 ** 20
+        print(f"  {'*' if name == os.path.basename(current) else ' '} {name}  {size:,.1f} MB")
+    if os.path.isdir(os.path.join(folder, STAGING_DIR)):
+        print(f"Unpublished shadow build: {os.path.join(folder, STAGING_DIR)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Verify, publish and prune shadow-built MQ2LinkDB versions')
+    parser.add_argument('command', choices=['status', 'verify', 'publish', 'prune'])
+    parser.add_argument('file', nargs='?', help='Rebuilt database (verify/publish; default the staged shadow)')
+    parser.add_argument('--db', default=DB_PATH, help='Live MQ2LinkDB.db path')
+    parser.add_argument('--lucy', help='Lucy directory or archive to check row counts and ids against')
+    parser.add_argument('--quick', action='store_true', help='quick_check instead of integrity_check')
+    parser.add_argument('--pointer', action='store_true', help='Publish through the version pointer only')
+    parser.add_argument('--force', action='store_true', help='Publish even if verification fails')
+    parser.add_argument('--keep', type=int, default=KEEP_VERSIONS, help='Old versions to keep when pruning')
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        status(args.db)
+        sys.exit(0)
+    if args.command == 'prune':
+        removed, busy = prune(args.db, args.keep)
+        print(f"Removed {len(removed)} old version(s)" + (f"; still open: {', '.join(busy)}" if busy else ''))
+        sys.exit(0)
+
+    shadow = args.file or staging_path(args.db)
+    if not os.path.isfile(shadow):
+        print(f"Error: {shadow} does not exist")
+        sys.exit(1)
+    lucy_ids = None
+    if args.lucy:
+        from lucy_archive import open_lucy
+        lucy = open_lucy(args.lucy)
+        lucy_ids = set(lucy.ids())
+        lucy.close()
+
+    print(f"Verifying {shadow}...")
+    ok = print_checks(verify(shadow, args.db, lucy_ids, quick=args.quick))
+    if args.command == 'verify':
+        sys.exit(0 if ok else 1)
+    if not ok and not args.force:
+        print("Not published (verification failed; --force to publish anyway)")
+        sys.exit(1)
+    mode, path = publish(shadow, args.db, args.pointer)
+    print(f"Published {path} ({'renamed over the live file' if mode == 'replaced' else 'version pointer'})")
+    removed, busy = prune(args.db, args.keep)
+    if removed or busy:
+        print(f"Pruned {len(removed)} old version(s)" + (f"; still open: {', '.join(busy)}" if busy else ''))
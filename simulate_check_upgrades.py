@@ -1,46 +1,17 @@
 #!/usr/bin/env python3
 """Simulate what check_upgrades.lua should do for a Rogue"""
 
-import sqlite3
+from linkdb import LinkDB, DB_PATH
 
-DB_PATH = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
-
-def get_item_stats(cur, item_id):
-    """Query database for item stats"""
-    if not item_id:
-        return None
-    
-    cur.execute('SELECT * FROM raw_item_data WHERE id = ?', (item_id,))
-    row = cur.fetchone()
-    if not row:
-        return None
-    
-    # Convert to dict with column names
-    columns = [desc[0] for desc in cur.description]
-    data = dict(zip(columns, row))
-    
-    # Convert to numbers
-    stats = {
-        'ac': int(data.get('ac', 0) or 0) if data.get('ac') else 0,
-        'hp': int(data.get('hp', 0) or 0) if data.get('hp') else 0,
-        'mana': int(data.get('mana', 0) or 0) if data.get('mana') else 0,
-        'endurance': int(data.get('endur', 0) or 0) if data.get('endur') else 0,
-        'itemtype': int(data.get('itemtype', 0) or 0) if data.get('itemtype') else 0,
-        'slots': int(data.get('slots', 0) or 0) if data.get('slots') else 0,
-        'classes': int(data.get('classes', 0) or 0) if data.get('classes') else 0,
-        'reqlevel': int(data.get('reqlevel', 0) or 0) if data.get('reqlevel') else 0,
-    }
-    return stats
-
-def can_equip_item(cur, item_id, char_level, char_class):
+def can_equip_item(db, item_id, char_level, char_class):
     """Check if character can equip item"""
-    stats = get_item_stats(cur, item_id)
+    stats = db.get_item_stats(item_id)
     if not stats:
         return False
     
     # Check level
-    if stats['reqlevel'] > char_level:
-        print(f"  ❌ Too high level (req {stats['reqlevel']}, char level {char_level})")
+    if stats['required_level'] > char_level:
+        print(f"  ❌ Too high level (req {stats['required_level']}, char level {char_level})")
         return False
     
     # Check classes
@@ -85,8 +56,7 @@ def are_items_comparable(stats1, stats2):
     return True
 
 def simulate_rogue_check():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    db = LinkDB(DB_PATH)
     
     print("=== Simulating Check Upgrades for Rogue ===\n")
     
@@ -97,7 +67,7 @@ def simulate_rogue_check():
     char_class = 'Rogue'
     char_level = 90
     
-    equipped_stats = get_item_stats(cur, equipped_id)
+    equipped_stats = db.get_item_stats(equipped_id)
     if not equipped_stats:
         print(f"❌ Item {equipped_id} not found\n")
         return
@@ -108,13 +78,13 @@ def simulate_rogue_check():
     
     # Step 1: Can equip?
     print("  Step 1: Can equip?")
-    if not can_equip_item(cur, inventory_id, char_level, char_class):
+    if not can_equip_item(db, inventory_id, char_level, char_class):
         print(f"  ❌ Cannot equip item {inventory_id}")
         return
     print("  ✓ Can equip")
     
     # Step 2: Get stats
-    inv_stats = get_item_stats(cur, inventory_id)
+    inv_stats = db.get_item_stats(inventory_id)
     if not inv_stats:
         print(f"  ❌ Item {inventory_id} not found")
         return
@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""Static query-plan audit of the SQL in the Lua data layer
+
+The runtime builds its SQL in lib/database.lua, lib/quest_database.lua,
+lib/collectionscanner.lua and collection_distribute.lua. This pulls the
+statements out of the Lua sources without running them:
+
+    strings   every string literal (quoted or [[long]]) that starts a
+              statement; multi-statement strings are split
+    formats   string.format arguments become representative values
+              (%d -> 1, '%s' -> 'x')
+    appends   `query = query .. " AND ..."` are folded into the statement;
+              appends inside an if block give one variant per combination
+    binds     each ? gets 1 or 'x' by the type of the column it is
+              compared with
+
+The CREATE statements found in the sources plus the schema and
+sqlite_stat1 of the real databases (when present; a small synthetic LinkDB
+otherwise) are loaded into an in-memory database, and each statement's
+EXPLAIN QUERY PLAN is checked for:
+
+    full-scan      SCAN of a table without an index
+    index-scan     SCAN of a whole index (no usable constraint)
+    temp-btree     USE TEMP B-TREE FOR ORDER BY / GROUP BY / DISTINCT
+    auto-index     AUTOMATIC INDEX built for a join on every run
+    not-covering   SEARCH through an index that then reads the table for a
+                   handful of columns (not for SELECT * or alias.*)
+
+For each finding an index is suggested (equality columns, then a range or
+the ORDER/GROUP BY columns, then the remaining referenced columns to cover
+the query), created inside a savepoint and kept only if the plan improves.
+
+The report is plain text keyed by file :: function [n], without line
+numbers, so two runs can be diffed; --baseline FILE compares against a
+saved report and exits 1 when a statement gained a finding.
+
+Usage:
+    python sql_audit.py [--db PATH ...] [--out FILE] [--baseline FILE] [--json] [--lines]
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import difflib
+import argparse
+import tempfile
+from itertools import product
+from collections import Counter
+
+from linkdb import DB_PATH, resolve_db_path
+from instrument import query_plan
+
+QUEST_DB = r'C:\MQ2\config\YALM2\quest_tasks.db'
+COLLECTION_DB = r'C:\MQ2\config\YALM2\collection_needs.db'
+
+LUA_FILES = ['lib/database.lua', 'lib/quest_database.lua', 'lib/collectionscanner.lua', 'collection_distribute.lua']
+
+SQL_START = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH|CREATE)\b', re.I)
+FORMAT_SPEC = re.compile(r'%[-+ #0]*\d*(?:\.\d+)?([%dicsqfgx])')
+# Conditional appends beyond this many are always applied (2 ** n variants)
+MAX_CONDITIONAL = 3
+# Covering suggestions only when the query touches this few columns of the table
+MAX_COVERING = 6
+
+KINDS = ['full-scan', 'index-scan', 'temp-btree', 'auto-index', 'not-covering']
+
+# --- Lua extraction --------------------------------------------------------
+
+_LONG_OPEN = re.compile(r'\[(=*)\[')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v',
+            '\\': '\\', '"': '"', "'": "'", '\n': '\n'}
+_BLOCK_OPEN = {'function', 'if', 'do', 'repeat'}
+_BLOCK_CLOSE = {'end', 'until'}
+
+def lua_tokens(text):
+    """(kind, value, line) for names, strings, numbers and operators; comments dropped"""
+    i, line, n = 0, 1, len(text)
+    while i < n:
+        c = text[i]
+        if c == '\n':
+            line += 1
+            i += 1
+        elif c in ' \t\r':
+            i += 1
+        elif text.startswith('--', i):
+            m = _LONG_OPEN.match(text, i + 2)
+            if m:
+                end = text.find(']' + m.group(1) + ']', m.end())
+                end = n if end < 0 else end + len(m.group(0))
+            else:
+                end = text.find('\n', i)
+                end = n if end < 0 else end
+            line += text.count('\n', i, end)
+            i = end
+        elif _LONG_OPEN.match(text, i):
+            m = _LONG_OPEN.match(text, i)
+            close = ']' + m.group(1) + ']'
+            end = text.find(close, m.end())
+            end = n if end < 0 else end
+            body = text[m.end():end]
+            yield 'str', body[1:] if body.startswith('\n') else body, line
+            line += text.count('\n', i, end)
+            i = end + len(close)
+        elif c in '"\'':
+            start_line = line
+            chars = []
+            i += 1
+            while i < n and text[i] != c:
+                if text[i] == '\\' and i + 1 < n:
+                    e = text[i + 1]
+                    if e.isdigit():
+                        m = re.match(r'\d{1,3}', text[i + 1:])
+                        chars.append(chr(int(m.group(0))))
+                        i += 1 + len(m.group(0))
+                        continue
+                    if e == 'z':
+                        i += 2
+                        while i < n and text[i].isspace():
+                            line += text[i] == '\n'
+                            i += 1
+                        continue
+                    line += e == '\n'
+                    chars.append(_ESCAPES.get(e, e))
+                    i += 2
+                else:
+                    chars.append(text[i])
+                    i += 1
+            i += 1
+            yield 'str', ''.join(chars), start_line
+        elif c.isalpha() or c == '_':
+            m = re.compile(r'\w+').match(text, i)
+            yield 'name', m.group(0), line
+            i = m.end()
+        elif c.isdigit():
+            m = re.compile(r'0[xX][0-9a-fA-F.]+|\d*\.?\d+(?:[eE][-+]?\d+)?').match(text, i)
+            yield 'num', m.group(0), line
+            i = m.end() if m.end() > i else i + 1
+        else:
+            for op in ('...', '..', '==', '~=', '<=', '>=', '::', '//'):
+                if text.startswith(op, i):
+                    break
+            else:
+                op = c
+            yield 'op', op, line
+            i += len(op)
+
+def split_statements(sql):
+    """Split on ; where the text so far is a complete statement (keeps trigger bodies whole)"""
+    statements, current = [], ''
+    for part in sql.split(';'):
+        current += part + ';'
+        if sqlite3.complete_statement(current):
+            if current.strip(' \t\r\n;'):
+                statements.append(current.strip().rstrip(';').strip())
+            current = ''
+    if current.strip(' \t\r\n;'):
+        statements.append(current.strip().rstrip(';').strip())
+    return statements
+
+def substitute_format(sql):
+    """string.format placeholders -> representative literals"""
+    def value(m):
+        return {'%': '%', 'd': '1', 'i': '1', 'c': 'x', 's': 'x', 'q': "'x'", 'f': '1.0', 'g': '1', 'x': '1'}[m.group(1)]
+    return FORMAT_SPEC.sub(value, sql)
+
+class LuaQuery:
+    def __init__(self, path, function, line, sql, depth, var=None):
+        self.path = path
+        self.function = function
+        self.line = line
+        self.sql = sql
+        self.depth = depth
+        self.var = var
+        self.appends = []        # (sql, conditional)
+
+    def variants(self):
+        """[(label, sql)] for every combination of the conditional appends"""
+        conditional = [i for i, (_, cond) in enumerate(self.appends) if cond][:MAX_CONDITIONAL]
+        result = []
+        for choice in product([False, True], repeat=len(conditional)):
+            chosen = {i for i, on in zip(conditional, choice) if on}
+            sql = self.sql + ''.join(text for i, (text, cond) in enumerate(self.appends)
+                                     if not cond or i in chosen or i not in conditional)
+            label = ' +'.join(' '.join(self.appends[i][0].split())[:40] for i in sorted(chosen))
+            result.append((f'+{label}' if label else '', sql))
+        return result
+
+def extract_queries(path, text):
+    """[LuaQuery] for every SQL string literal in a Lua source"""
+    tokens = list(lua_tokens(text))
+    queries = []
+    functions = []           # (name, depth)
+    variables = {}           # (function, var) -> LuaQuery
+    depth = 0
+
+    def tok(k):
+        return tokens[k] if 0 <= k < len(tokens) else ('', '', 0)
+
+    for k, (kind, value, line) in enumerate(tokens):
+        if kind == 'name' and value in _BLOCK_OPEN:
+            depth += 1
+            if value == 'function':
+                name_parts = []
+                j = k + 1
+                while tok(j)[0] == 'name' or tok(j)[1] in ('.', ':'):
+                    name_parts.append(tok(j)[1])
+                    j += 1
+                name = ''.join(name_parts)
+                if not name and tok(k - 1)[1] == '=' and tok(k - 2)[0] == 'name':
+                    # name = function(...) / a.b.name = function(...)
+                    j = k - 2
+                    while tok(j - 1)[1] in ('.', ':') and tok(j - 2)[0] == 'name':
+                        j -= 2
+                    name = ''.join(t[1] for t in tokens[j:k - 1])
+                if not name:
+                    name = (functions[-1][0] if functions else '<main>') + '/<anon>'
+                functions.append((name, depth))
+            continue
+        if kind == 'name' and value in _BLOCK_CLOSE:
+            if functions and functions[-1][1] == depth:
+                functions.pop()
+            depth -= 1
+            continue
+        if kind != 'str':
+            continue
+
+        function = functions[-1][0] if functions else '<main>'
+        # query = query .. "text"
+        if (tok(k - 1)[1] == '..' and tok(k - 2)[0] == 'name' and tok(k - 3)[1] == '='
+                and tok(k - 4)[1] == tok(k - 2)[1]):
+            base = variables.get((function, tok(k - 2)[1]))
+            if base is not None:
+                base.appends.append((value, depth > base.depth))
+            continue
+        if not SQL_START.match(value):
+            continue
+
+        formatted = tok(k - 1)[1] == '(' and [t[1] for t in tokens[k - 4:k - 1]] == ['string', '.', 'format']
+        sql = substitute_format(value) if formatted else value
+        assign = k - 5 if formatted else k - 1
+        var = tok(assign - 1)[1] if tok(assign)[1] == '=' and tok(assign - 1)[0] == 'name' else None
+        query = LuaQuery(path, function, line, sql, depth, var)
+        queries.append(query)
+        if var:
+            variables[(function, var)] = query
+    return queries
+
+# --- Audit database --------------------------------------------------------
+
+def copy_schema(conn, source_path):
+    """Create source_path's tables/indexes/views/triggers in conn and copy its sqlite_stat1"""
+    src = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+    try:
+        objects = src.execute("SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL "
+                              "AND name NOT LIKE 'sqlite_%' ORDER BY CASE type WHEN 'table' THEN 0 "
+                              "WHEN 'index' THEN 1 WHEN 'view' THEN 2 ELSE 3 END, name").fetchall()
+        stats = []
+        if src.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            stats = src.execute('SELECT tbl, idx, stat FROM sqlite_stat1').fetchall()
+    finally:
+        src.close()
+    created = 0
+    for _, name, sql in objects:
+        try:
+            conn.execute(sql)
+            created += 1
+        except sqlite3.OperationalError:
+            pass    # already created from another source
+    if stats:
+        conn.execute('ANALYZE sqlite_master')   # creates sqlite_stat1
+        conn.executemany('INSERT INTO sqlite_stat1 VALUES (?, ?, ?)', stats)
+        conn.execute('ANALYZE sqlite_master')   # reloads the statistics
+    return created, len(stats)
+
+def apply_ddl(conn, statements):
+    """Run CREATE statements from the Lua sources, retrying ones that depend on later tables"""
+    pending = list(statements)
+    while pending:
+        failed = []
+        for sql in pending:
+            try:
+                conn.execute(sql)
+            except sqlite3.OperationalError as e:
+                if 'already exists' not in str(e):
+                    failed.append(sql)
+        if len(failed) == len(pending):
+            return failed
+        pending = failed
+    return []
+
+def build_audit_db(db_paths, ddl, notes):
+    conn = sqlite3.connect(':memory:')
+    for path in db_paths:
+        path = resolve_db_path(path)
+        if os.path.exists(path):
+            created, stats = copy_schema(conn, path)
+            notes.append(f"schema from {os.path.basename(path)}: {created} objects, {stats} stat rows")
+        else:
+            notes.append(f"{os.path.basename(path)} not found")
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'raw_item_data'").fetchone():
+        from benchmarks.synthetic import build_linkdb
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'MQ2LinkDB.db')
+            build_linkdb(path, 5000)
+            analyze = sqlite3.connect(path)
+            analyze.execute('ANALYZE')
+            analyze.close()
+            created, stats = copy_schema(conn, path)
+        notes.append(f"schema from synthetic LinkDB: {created} objects, {stats} stat rows")
+    failed = apply_ddl(conn, ddl)
+    notes.append(f"{len(ddl) - len(failed)} CREATE statements from the Lua sources")
+    for sql in failed:
+        notes.append(f"could not create: {' '.join(sql.split())[:80]}")
+    return conn
+
+# --- Plan analysis ---------------------------------------------------------
+
+_SQL_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.I)
+_NOT_ALIAS = {'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'NATURAL', 'ON', 'USING', 'SET',
+              'GROUP', 'ORDER', 'LIMIT', 'VALUES', 'SELECT', 'UNION', 'EXCEPT', 'INTERSECT', 'HAVING',
+              'DEFAULT', 'AS', 'WINDOW', 'RETURNING', 'INDEXED', 'NOT'}
+_COLUMN = r'(?:(\w+)\.)?(\w+)'
+_EQUALITY = re.compile(_COLUMN + r'\s*(?:==?|\bIN\b|\bIS\b(?!\s+NOT))', re.I)
+_EQUALITY_RIGHT = re.compile(r'(?<![<>!])=\s*' + _COLUMN + r'\b(?!\s*\()', re.I)
+_RANGE = re.compile(_COLUMN + r'\s*(?:<=|>=|<(?!>)|>|\bBETWEEN\b)', re.I)
+_ORDERING = re.compile(r'\b(GROUP|ORDER)\s+BY\s+(.+?)(?=\bHAVING\b|\bORDER\b|\bLIMIT\b|\)|;|$)', re.I | re.S)
+_PLAN_TABLE = re.compile(r'^(SCAN|SEARCH) (\w+)(?: AS (\w+))?(.*)$')
+_STAR = re.compile(r'(?:^|[\s,])(?:(\w+)\.)?\*(?=\s*(?:,|\bFROM\b))', re.I)
+
+def column_types(conn):
+    """{table: {column: declared type}}"""
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                         "AND name NOT LIKE 'sqlite_%'")]
+    return {t: {r[1]: (r[2] or '').upper() for r in conn.execute(f'PRAGMA table_info({t})')} for t in tables}
+
+def bind_params(sql, types):
+    """Representative values for the ? placeholders"""
+    integer_columns = {c for cols in types.values() for c, decl in cols.items() if 'INT' in decl}
+    stripped = _SQL_STRINGS.sub(lambda m: ' ' * len(m.group(0)), sql)
+    params = []
+    for m in re.finditer(r'\?', stripped):
+        before = re.search(r'(\w+)\s*(?:==?|!=|<>|<=|>=|<|>|\bLIKE|\bIS)\s*$', stripped[:m.start()], re.I)
+        params.append(1 if before and before.group(1) in integer_columns else 'x')
+    return params
+
+def table_aliases(sql, types):
+    """{alias or table name: table} for the real tables a statement reads"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        if table in types:
+            aliases[table] = table
+            if alias and alias.upper() not in _NOT_ALIAS:
+                aliases[alias] = table
+    return aliases
+
+def star_aliases(sql, aliases):
+    """Aliases whose every column is selected (SELECT * or alias.*)"""
+    stripped = _SQL_STRINGS.sub("''", sql)
+    star = set()
+    for qualifier in _STAR.findall(stripped):
+        if not qualifier:
+            return set(aliases)
+        star.update(a for a, t in aliases.items() if qualifier in (a, t))
+    return star
+
+def referenced_columns(sql, table, aliases, types):
+    """Columns of table named anywhere in the statement, in order of appearance"""
+    columns = types[table]
+    single = len(set(aliases.values())) == 1
+    found = []
+    for qualifier, name in re.findall(_COLUMN, sql):
+        if name not in columns or name in found:
+            continue
+        if qualifier:
+            if aliases.get(qualifier) == table:
+                found.append(name)
+        elif single or not any(name in types[t] for t in set(aliases.values()) if t != table):
+            found.append(name)
+    return found
+
+def suggest_index(sql, table, alias, aliases, types, covering):
+    """Column list for an index that should serve the statement on table"""
+    stripped = _SQL_STRINGS.sub("''", sql)
+    columns = types[table]
+    names = {alias, table}
+
+    def own(matches):
+        cols = []
+        for qualifier, name in matches:
+            if name in columns and (qualifier in names or (not qualifier and (
+                    len(set(aliases.values())) == 1 or
+                    not any(name in types[t] for t in set(aliases.values()) if t != table)))):
+                if name not in cols:
+                    cols.append(name)
+        return cols
+
+    where = re.split(r'\bWHERE\b|\bON\b', stripped, flags=re.I)
+    conditions = ' '.join(where[1:]) if len(where) > 1 else ''
+    equality = own(_EQUALITY.findall(conditions))
+    if aliases and len(set(aliases.values())) > 1:
+        equality += [c for c in own(_EQUALITY_RIGHT.findall(conditions)) if c not in equality]
+    ranges = [c for c in own(_RANGE.findall(conditions)) if c not in equality]
+
+    ordering = []
+    for _, clause in _ORDERING.findall(stripped):
+        terms = [re.sub(r'\s+(ASC|DESC|COLLATE\s+\w+)\b.*$', '', t.strip(), flags=re.I) for t in clause.split(',')]
+        refs = [re.fullmatch(_COLUMN, t) for t in terms]
+        if refs and all(refs):
+            cols = own([r.groups(default='') for r in refs])
+            if len(cols) == len(refs):
+                ordering = [c for c in cols if c not in equality]
+                break
+
+    cols = equality + (ranges[:1] if ranges else ordering)
+    if not cols:
+        return None
+    if covering:
+        extra = [c for c in referenced_columns(sql, table, aliases, types) if c not in cols]
+        if len(cols) + len(extra) <= MAX_COVERING:
+            cols += extra
+    return cols
+
+def plan_findings(plan, aliases, is_select, referenced, star=()):
+    """[(kind, table alias, plan line)]; no covering check for the star aliases"""
+    findings = []
+    for line in plan:
+        detail = line.strip()
+        if detail.startswith('USE TEMP B-TREE'):
+            findings.append(('temp-btree', None, detail))
+            continue
+        if 'AUTOMATIC' in detail and 'INDEX' in detail:
+            m = re.search(r'INDEX ON (\w+)', detail)
+            findings.append(('auto-index', m.group(1) if m else None, detail))
+            continue
+        m = _PLAN_TABLE.match(detail)
+        if not m:
+            continue
+        op, name, alias, rest = m.groups()
+        alias = alias or name
+        if aliases.get(alias) is None and aliases.get(name) is None:
+            continue    # CTE, subquery or view
+        if op == 'SCAN':
+            findings.append(('index-scan' if 'INDEX' in rest else 'full-scan', alias, detail))
+        elif (is_select and 'USING INDEX' in rest and 'COVERING' not in rest
+              and alias not in star and len(referenced.get(alias, [])) <= MAX_COVERING):
+            findings.append(('not-covering', alias, detail))
+    return findings
+
+def explain(conn, sql, params):
+    try:
+        return query_plan(conn, sql, params), None
+    except sqlite3.Error as e:
+        return [], str(e)
+
+def audit_statement(conn, sql, types):
+    """{'plan', 'error', 'findings': [{kind, detail, table}], 'suggestions': [...]}"""
+    params = bind_params(sql, types)
+    plan, error = explain(conn, sql, params)
+    result = {'plan': plan, 'error': error, 'findings': [], 'suggestions': []}
+    if error:
+        return result
+    aliases = table_aliases(sql, types)
+    is_select = sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+    referenced = {alias: referenced_columns(sql, table, aliases, types) for alias, table in aliases.items()}
+    star = star_aliases(sql, aliases) if is_select else set()
+    findings = plan_findings(plan, aliases, is_select, referenced, star)
+    result['findings'] = [{'kind': kind, 'table': aliases.get(alias, alias) if alias else None, 'detail': detail}
+                          for kind, alias, detail in findings]
+
+    # One suggestion per table with findings; temp B-trees go to the main table
+    targets = []
+    for kind, alias, _ in findings:
+        if alias is None and kind == 'temp-btree':
+            alias = next((a for a, t in aliases.items() if a != t), None) or next(iter(aliases), None)
+        if alias in aliases and alias not in [a for a, _ in targets]:
+            targets.append((alias, kind))
+    score = len([f for f in findings if f[0] != 'not-covering'])
+    for alias, kind in targets:
+        table = aliases[alias]
+        for covering in ([True] if kind == 'not-covering' else [False] if alias in star else [False, True]):
+            cols = suggest_index(sql, table, alias, aliases, types, covering)
+            if not cols:
+                continue
+            name = f"idx_{table}_{'_'.join(cols[:3])}"
+            ddl = f"CREATE INDEX {name} ON {table} ({', '.join(cols)})"
+            conn.execute('SAVEPOINT audit')
+            try:
+                conn.execute(ddl)
+                after, error = explain(conn, sql, params)
+            except sqlite3.Error:
+                after, error = [], 'exists'
+            finally:
+                conn.execute('ROLLBACK TO audit')
+                conn.execute('RELEASE audit')
+            if error:
+                continue
+            after_findings = plan_findings(after, aliases, is_select, referenced, star)
+            after_score = len([f for f in after_findings if f[0] != 'not-covering'])
+            if after_score < score or len(after_findings) < len(findings):
+                before_kinds = Counter(f[0] for f in findings)
+                before_kinds.subtract(f[0] for f in after_findings)
+                fixed = [kind for kind in KINDS if before_kinds[kind] > 0]
+                result['suggestions'].append({'sql': ddl, 'fixes': fixed, 'plan': after})
+                break
+    return result
+
+# --- Report ----------------------------------------------------------------
+
+def audit(paths, db_paths, root='.'):
+    """(entries, notes) for every statement in the Lua files"""
+    notes = []
+    queries = []
+    for path in paths:
+        with open(os.path.join(root, path), encoding='utf-8', errors='replace') as f:
+            queries.extend(extract_queries(path, f.read().replace('\r\n', '\n')))
+
+    ddl = [s for q in queries for s in split_statements(q.sql) if s.upper().startswith('CREATE')]
+    conn = build_audit_db(db_paths, ddl, notes)
+    types = column_types(conn)
+
+    entries = []
+    ordinal = {}
+    for query in queries:
+        for label, sql in query.variants():
+            for statement in split_statements(sql):
+                if statement.upper().startswith('CREATE'):
+                    continue
+                key = (query.path, query.function)
+                ordinal[key] = ordinal.get(key, 0) + 1
+                entry = {'file': query.path, 'function': query.function, 'n': ordinal[key],
+                         'line': query.line, 'variant': label, 'sql': ' '.join(statement.split())}
+                entry.update(audit_statement(conn, statement, types))
+                entries.append(entry)
+    conn.close()
+    return entries, notes
+
+def entry_key(entry):
+    return f"{entry['file']} :: {entry['function']} [{entry['n']}]"
+
+def format_report(entries, notes, lines=False):
+    flagged = [e for e in entries if e['findings'] or e['error']]
+    counts = {kind: sum(1 for e in entries for f in e['findings'] if f['kind'] == kind) for kind in KINDS}
+    out = [f"# SQL plan audit: {len(entries)} statements, {len(flagged)} with findings",
+           '# ' + ', '.join(f'{kind} {n}' for kind, n in counts.items())]
+    out += [f'# {note}' for note in notes]
+    for entry in entries:
+        out.append('')
+        where = f" (line {entry['line']})" if lines else ''
+        out.append(f"## {entry_key(entry)}{' ' + entry['variant'] if entry['variant'] else ''}{where}")
+        out.append(entry['sql'])
+        if entry['error']:
+            out.append(f"  ERROR {entry['error']}")
+        out += [f"  | {line}" for line in entry['plan']]
+        for finding in entry['findings']:
+            out.append(f"  ! {finding['kind']}: {finding['detail']}")
+        for suggestion in entry['suggestions']:
+            out.append(f"  + {suggestion['sql']}  -- fixes {', '.join(suggestion['fixes'])}")
+            out += [f"  +   | {line}" for line in suggestion['plan']]
+    return '\n'.join(out) + '\n'
+
+def finding_counts(report):
+    """{statement header: number of ! lines} from a text report"""
+    counts, current = {}, None
+    for line in report.splitlines():
+        if line.startswith('## '):
+            current = re.sub(r' \(line \d+\)$', '', line[3:])
+            counts[current] = 0
+        elif current and (line.startswith('  ! ') or line.startswith('  ERROR')):
+            counts[current] += 1
+    return counts
+
+def compare(baseline, report):
+    """(unified diff lines, [statements with more findings than the baseline])"""
+    diff = list(difflib.unified_diff(baseline.splitlines(), report.splitlines(), 'baseline', 'current', lineterm=''))
+    old, new = finding_counts(baseline), finding_counts(report)
+    regressions = [key for key, n in new.items() if n > old.get(key, 0)]
+    return diff, regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Audit the query plans of the SQL in the Lua sources')
+    parser.add_argument('--db', action='append', help='Database whose schema and statistics to use '
+                        '(repeatable; default the LinkDB, quest_tasks.db and collection_needs.db)')
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)), help='Repository root')
+    parser.add_argument('--files', nargs='+', default=LUA_FILES, help='Lua sources relative to --root')
+    parser.add_argument('--out', help='Write the report here instead of stdout')
+    parser.add_argument('--baseline', help='Previous report: print the diff, exit 1 on new findings')
+    parser.add_argument('--json', action='store_true', help='JSON instead of the text report')
+    parser.add_argument('--lines', action='store_true', help='Include Lua line numbers (noisier diffs)')
+    args = parser.parse_args()
+
+    entries, notes = audit(args.files, args.db or [DB_PATH, QUEST_DB, COLLECTION_DB], args.root)
+    if args.json:
+        report = json.dumps({'notes': notes, 'statements': entries}, indent=2) + '\n'
+    else:
+        report = format_report(entries, notes, args.lines)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(report)
+        flagged = sum(1 for e in entries if e['findings'] or e['error'])
+        print(f"Audited {len(entries)} statements, {flagged} with findings -> {args.out}")
+    elif not args.baseline:
+        sys.stdout.write(report)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            diff, regressions = compare(f.read(), format_report(entries, notes, args.lines))
+        for line in diff:
+            print(line)
+        if regressions:
+            print(f"\n{len(regressions)} statement(s) with new findings:")
+            for key in regressions:
+                print(f"  {key}")
+            sys.exit(1)
+        print('No new findings' if diff else 'Plans unchanged')
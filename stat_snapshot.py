@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Memory-mapped fixed-width item stat snapshot
+
+Analysis tools SELECT * from raw_item_data and convert every value with
+int(x or 0) (get_item_stats in linkdb.py / simulate_check_upgrades.py,
+load_stat_arrays in upgrade_scoring.py) on every run. This exports the
+get_item_stats fields once into a flat binary file:
+
+    'YALMSTAT' + uint32 header length + JSON header, padded to 64 bytes
+    records   one little-endian int32 record per item, sorted by id:
+              id, then upgrade_scoring.STAT_COLUMNS
+    index     int32 row number per id from index_base (-1 = no item),
+              omitted when ids are too sparse (searchsorted is used then)
+
+StatSnapshot memory-maps the file; columns come back as zero-copy NumPy
+views, so opening it costs a header read however many items there are.
+stat_arrays() returns (ids, {column: array}) like load_stat_arrays, so the
+upgrade_scoring functions work on it unchanged.
+
+The header records the source database's path, size and mtime (after
+following a shadow_db.py version pointer); is_current() tells a tool when
+to re-export.
+
+Usage:
+    python stat_snapshot.py export [--db PATH] [--out FILE]
+    python stat_snapshot.py info [--out FILE] [--id 121564 ...]
+    python stat_snapshot.py bench [--db PATH] [--out FILE]
+"""
+
+import os
+import json
+import time
+import struct
+import sqlite3
+import argparse
+
+import numpy as np
+
+from linkdb import DB_PATH, STAT_FIELDS, resolve_db_path
+from upgrade_scoring import STAT_COLUMNS, load_stat_arrays
+
+SNAPSHOT_PATH = r'C:\MQ2\lua\yalm2\item_stats.ystat'
+
+MAGIC = b'YALMSTAT'
+VERSION = 1
+ALIGN = 64
+FIELDS = ['id'] + STAT_COLUMNS
+RECORD_DTYPE = np.dtype([(name, '<i4') for name in FIELDS])
+# Dense id -> row index only while it stays within this many slots per item
+MAX_INDEX_SPREAD = 64
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def source_info(db_path):
+    db_path = resolve_db_path(db_path)
+    st = os.stat(db_path)
+    return {'path': os.path.abspath(db_path), 'size': st.st_size, 'mtime': int(st.st_mtime)}
+
+def export(conn, path, source=None):
+    """Write every raw_item_data row's stats to path -> record count"""
+    ids, stats = load_stat_arrays(conn, '1')
+    records = np.zeros(len(ids), dtype=RECORD_DTYPE)
+    for name, values in [('id', ids)] + [(c, stats[c]) for c in STAT_COLUMNS]:
+        if len(values) and (values.min() < INT32_MIN or values.max() > INT32_MAX):
+            raise ValueError(f"{name} does not fit in int32 ({values.min()} .. {values.max()})")
+        records[name] = values
+
+    index = np.empty(0, dtype='<i4')
+    index_base = 0
+    if len(ids) and ids[-1] - ids[0] + 1 <= MAX_INDEX_SPREAD * len(ids):
+        index_base = int(ids[0])
+        index = np.full(int(ids[-1]) - index_base + 1, -1, dtype='<i4')
+        index[ids - index_base] = np.arange(len(ids), dtype='<i4')
+
+    header = {'version': VERSION, 'count': len(records), 'fields': FIELDS, 'dtype': '<i4',
+              'record_size': RECORD_DTYPE.itemsize, 'index_base': index_base, 'index_length': len(index),
+              'created': int(time.time()), 'source': source}
+    # Offsets depend on the header length, which depends on the offsets: size with placeholders first
+    header['records_offset'] = header['index_offset'] = 0
+    header_len = len(json.dumps(header).encode()) + 64
+    header['records_offset'] = _align(len(MAGIC) + 4 + header_len)
+    header['index_offset'] = _align(header['records_offset'] + records.nbytes)
+    encoded = json.dumps(header).encode().ljust(header_len)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', header_len) + encoded)
+        f.write(b'\0' * (header['records_offset'] - f.tell()))
+        f.write(records.tobytes())
+        f.write(b'\0' * (header['index_offset'] - f.tell()))
+        f.write(index.tobytes())
+    os.replace(tmp, path)
+    return len(records)
+
+class StatSnapshot:
+    """Read-only view of an exported snapshot"""
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an item stat snapshot")
+            header_len, = struct.unpack('<I', f.read(4))
+            self.header = json.loads(f.read(header_len))
+        if self.header['version'] != VERSION or self.header['fields'] != FIELDS:
+            raise ValueError(f"{path} was written by another version (re-export it)")
+        count = self.header['count']
+        self.records = (np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=self.header['records_offset'], shape=(count,))
+                        if count else np.zeros(0, dtype=RECORD_DTYPE))
+        length = self.header['index_length']
+        self.index = (np.memmap(path, dtype='<i4', mode='r', offset=self.header['index_offset'], shape=(length,))
+                      if length else None)
+        self.ids = self.records['id']
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, item_id):
+        return self.rows([item_id])[0] >= 0
+
+    def column(self, name):
+        """Zero-copy int32 view of one field for every item"""
+        return self.records[name]
+
+    def stat_arrays(self):
+        """(ids, {column: view}) in the shape load_stat_arrays returns"""
+        return self.ids, {c: self.records[c] for c in STAT_COLUMNS}
+
+    def rows(self, item_ids):
+        """Row number per id, -1 where the snapshot has no such item"""
+        item_ids = np.asarray(item_ids, dtype=np.int64).ravel()
+        result = np.full(len(item_ids), -1, dtype=np.int64)
+        if self.index is not None:
+            pos = item_ids - self.header['index_base']
+            ok = (pos >= 0) & (pos < len(self.index))
+            result[ok] = self.index[pos[ok]]
+        elif len(self.ids):
+            pos = np.minimum(np.searchsorted(self.ids, item_ids), len(self.ids) - 1)
+            found = self.ids[pos] == item_ids
+            result[found] = pos[found]
+        return result
+
+    def get_item_stats(self, item_id):
+        """Stat record keyed like LinkDB.get_item_stats, or None"""
+        row = self.rows([item_id])[0]
+        if row < 0:
+            return None
+        record = self.records[row]
+        return {key: int(record[column]) for key, column in STAT_FIELDS.items()}
+
+    def is_current(self, db_path=DB_PATH):
+        source = self.header.get('source')
+        if not source or not os.path.exists(resolve_db_path(db_path)):
+            return False
+        current = source_info(db_path)
+        return all(current[key] == source[key] for key in ('path', 'size', 'mtime'))
+
+    def close(self):
+        # Drop the maps so the file can be replaced (Windows keeps mapped files locked)
+        self.records = self.index = self.ids = None
+
+def bench(db_path, path):
+    conn = sqlite3.connect(resolve_db_path(db_path))
+    start = time.perf_counter()
+    ids, stats = load_stat_arrays(conn, '1')
+    sql_s = time.perf_counter() - start
+    conn.close()
+
+    start = time.perf_counter()
+    snap = StatSnapshot(path)
+    snap_ids, snap_stats = snap.stat_arrays()
+    open_s = time.perf_counter() - start
+    start = time.perf_counter()
+    total = sum(int(snap_stats[c].sum()) for c in STAT_COLUMNS)
+    scan_s = time.perf_counter() - start
+
+    same = np.array_equal(ids, snap_ids) and all(np.array_equal(stats[c], snap_stats[c]) for c in STAT_COLUMNS)
+    print(f"{len(ids)} items, {len(STAT_COLUMNS)} columns")
+    print(f"  SQLite load_stat_arrays    {sql_s * 1000:9.1f} ms")
+    print(f"  snapshot open              {open_s * 1000:9.1f} ms")
+    print(f"  snapshot scan all columns  {scan_s * 1000:9.1f} ms (checksum {total})")
+    print(f"  contents {'match' if same else 'DIFFER'}")
+    return same
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export or inspect the memory-mapped item stat snapshot')
+    parser.add_argument('command', choices=['export', 'info', 'bench'])
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--out', default=SNAPSHOT_PATH, help='Snapshot file')
+    parser.add_argument('--id', type=int, nargs='+', default=[], help='Item ids to print (info)')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        start = time.perf_counter()
+        conn = sqlite3.connect(resolve_db_path(args.db))
+        count = export(conn, args.out, source_info(args.db))
+        conn.close()
+        print(f"Exported {count} items ({os.path.getsize(args.out) / 1024:.0f} KB) to {args.out} "
+              f"in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'info':
+        snap = StatSnapshot(args.out)
+        header = snap.header
+        print(f"{args.out}: {len(snap)} items, {header['record_size']}-byte records, "
+              f"{'dense index' if snap.index is not None else 'binary search'}, "
+              f"exported {time.strftime('%Y-%m-%d %H:%M', time.localtime(header['created']))}")
+        print(f"  source {header['source']['path'] if header['source'] else '?'}: "
+              f"{'current' if snap.is_current(args.db) else 'changed since export'}")
+        for item_id in args.id:
+            print(f"  {item_id}: {snap.get_item_stats(item_id)}")
+    else:
+        bench(args.db, args.out)
@@ -2,16 +2,25 @@
 """
 Update MQ2LinkDB.db raw_item_data table with complete item data from Lucy JSON files
 This will fill in missing slots, ac, hp, mana, endur, attack, and other stats
+
+--bulk loads the Lucy values for every candidate into a staging table and
+applies them with one set-based UPDATE ... FROM in a single transaction
+(needs SQLite 3.33+) instead of one UPDATE per item.
+
+Each run writes a JSON report (phase timings, rows/sec, peak RSS, slow
+statements with their query plans) through instrument.py.
 """
 
 import sqlite3
-import json
-import os
-from pathlib import Path
-from datetime import datetime
+import time
+import argparse
+
+import instrument
+from linkdb import resolve_db_path
+from lucy_archive import open_lucy
 
 db_path = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
-lucy_dir = r'D:\lucy'
+lucy_dir = r'D:\lucy'  # Lucy directory or packed .lpak archive
 
 # Fields to update from Lucy JSON
 LUCY_FIELDS = [
@@ -20,134 +29,213 @@ LUCY_FIELDS = [
     'reqlevel', 'classes', 'itemtype', 'wearslot', 'lore', 'nodrop'
 ]
 
-conn = sqlite3.connect(db_path)
-cur = conn.cursor()
-
-# Find items that need updating (have AC but slots=0 or NULL)
-print("=" * 70)
-print("MQ2LinkDB Update from Lucy JSON Files")
-print("=" * 70)
-print()
-
-print("Finding items with AC but missing slots...")
-rows = cur.execute(
-    "SELECT id FROM raw_item_data WHERE ac > 0 AND (slots IS NULL OR slots = 0) ORDER BY id"
-).fetchall()
-
-items_to_update = [row[0] for row in rows]
-print(f"Found {len(items_to_update)} items that need slots data from Lucy")
-print()
-
-# Check how many Lucy files we can actually find
-print("Checking Lucy JSON file availability...")
-found_lucy = []
-missing_lucy = []
-
-for item_id in items_to_update:
-    lucy_file = os.path.join(lucy_dir, f'lucy_item_{item_id}.json')
-    if os.path.exists(lucy_file):
-        found_lucy.append(item_id)
-    else:
-        missing_lucy.append(item_id)
-
-print(f"  Found in Lucy directory: {len(found_lucy)}")
-print(f"  Missing from Lucy directory: {len(missing_lucy)}")
-print()
-
-if len(found_lucy) == 0:
-    print("ERROR: No Lucy files found for items needing update!")
-    exit(1)
-
-# Show coverage
-coverage = (len(found_lucy) / len(items_to_update)) * 100
-print(f"Coverage: {coverage:.1f}% of items can be updated from Lucy")
-print()
-
-# Now do the actual update
-print("Starting database update...")
-print()
-
-updated_count = 0
-error_count = 0
-skipped_count = 0
-
-for idx, item_id in enumerate(found_lucy):
-    lucy_file = os.path.join(lucy_dir, f'lucy_item_{item_id}.json')
-    
-    try:
-        # Read Lucy JSON
-        with open(lucy_file, 'r') as f:
-            lucy_data = json.load(f)
-        
-        # Build update SQL - only update fields that exist in Lucy
-        update_fields = []
-        update_values = []
-        
-        for field in LUCY_FIELDS:
-            if field in lucy_data:
-                value = lucy_data[field]
-                # Skip empty strings and null-like values
-                if value != '' and value is not None:
+def lucy_update_values(lucy_data):
+    """LUCY_FIELDS values to apply, None where the existing value is kept"""
+    values = []
+    for field in LUCY_FIELDS:
+        value = lucy_data.get(field)
+        # Skip empty strings and null-like values
+        values.append(value if value != '' and value is not None else None)
+    return values
+
+def bulk_update(conn, lucy, item_ids):
+    """Apply Lucy values to item_ids with one set-based UPDATE
+
+    Returns (updated, errors, skipped) like the per-row loop.
+    """
+    cur = conn.cursor()
+    existing = {row[1] for row in cur.execute('PRAGMA table_info(raw_item_data)')}
+    fields = [f for f in LUCY_FIELDS if f in existing]
+    missing = [f for f in LUCY_FIELDS if f not in existing]
+    if missing:
+        print(f"  Columns not in raw_item_data (ignored): {', '.join(missing)}")
+    if not fields:
+        print("  No Lucy fields to apply")
+        return 0, 0, len(item_ids)
+
+    positions = [LUCY_FIELDS.index(f) for f in fields]
+    stage_rows = []
+    errors = 0
+    skipped = 0
+    for item_id in item_ids:
+        try:
+            values = lucy_update_values(lucy.get(item_id))
+        except Exception as e:
+            print(f"Error processing item {item_id}: {e}")
+            errors += 1
+            continue
+        row = [values[p] for p in positions]
+        if all(v is None for v in row):
+            skipped += 1
+            continue
+        stage_rows.append([item_id] + row)
+
+    start = time.perf_counter()
+    with conn:
+        cur.execute('DROP TABLE IF EXISTS temp.lucy_stage')
+        cur.execute(f"CREATE TEMP TABLE lucy_stage (id INTEGER PRIMARY KEY, {', '.join(fields)})")
+        cur.executemany(
+            f"INSERT INTO lucy_stage (id, {', '.join(fields)}) VALUES ({', '.join('?' * (len(fields) + 1))})",
+            stage_rows)
+        assignments = ', '.join(f'{f} = COALESCE(s.{f}, raw_item_data.{f})' for f in fields)
+        update_sql = f"UPDATE raw_item_data SET {assignments} FROM lucy_stage AS s WHERE raw_item_data.id = s.id"
+        instrument.explain(conn, update_sql, label='bulk update')
+        cur.execute(update_sql)
+        updated = cur.rowcount
+        instrument.count(updated)
+        cur.execute('DROP TABLE temp.lucy_stage')
+    print(f"  Staged {len(stage_rows)} rows, applied in {time.perf_counter() - start:.2f}s")
+    return updated, errors, skipped
+
+def row_update(cur, lucy, item_ids):
+    """Apply Lucy values with one UPDATE per item"""
+    updated_count = 0
+    error_count = 0
+    skipped_count = 0
+
+    for idx, item_id in enumerate(item_ids):
+        try:
+            # Read Lucy JSON
+            lucy_data = lucy.get(item_id)
+
+            # Build update SQL - only update fields that exist in Lucy
+            update_fields = []
+            update_values = []
+
+            for field, value in zip(LUCY_FIELDS, lucy_update_values(lucy_data)):
+                if value is not None:
                     update_fields.append(f'{field} = ?')
                     update_values.append(value)
-        
-        if update_fields:
-            sql = f"UPDATE raw_item_data SET {', '.join(update_fields)} WHERE id = ?"
-            update_values.append(item_id)
-            
-            cur.execute(sql, update_values)
-            updated_count += 1
+
+            if update_fields:
+                sql = f"UPDATE raw_item_data SET {', '.join(update_fields)} WHERE id = ?"
+                update_values.append(item_id)
+
+                cur.execute(sql, update_values)
+                updated_count += 1
+                instrument.count()
+            else:
+                skipped_count += 1
+
+        except Exception as e:
+            print(f"Error processing item {item_id}: {e}")
+            error_count += 1
+
+        # Progress update
+        if (idx + 1) % 1000 == 0:
+            percent = ((idx + 1) / len(item_ids)) * 100
+            print(f"  Progress: {idx + 1}/{len(item_ids)} ({percent:.1f}%) - Updated: {updated_count}, Errors: {error_count}, Skipped: {skipped_count}")
+
+    return updated_count, error_count, skipped_count
+
+parser = argparse.ArgumentParser(description='Fill missing raw_item_data stats from Lucy')
+parser.add_argument('--bulk', action='store_true', help='Staging table + one set-based UPDATE')
+args = parser.parse_args()
+
+if args.bulk and sqlite3.sqlite_version_info < (3, 33, 0):
+    print(f"ERROR: --bulk needs SQLite 3.33+ for UPDATE ... FROM (have {sqlite3.sqlite_version})")
+    exit(1)
+
+with instrument.run('update_linkdb_from_lucy', db_path=db_path, args=vars(args)):
+    conn = instrument.watch(sqlite3.connect(resolve_db_path(db_path)))
+    cur = conn.cursor()
+    lucy = open_lucy(lucy_dir)
+
+    # Find items that need updating (have AC but slots=0 or NULL)
+    print("=" * 70)
+    print("MQ2LinkDB Update from Lucy JSON Files")
+    print("=" * 70)
+    print()
+
+    print("Finding items with AC but missing slots...")
+    find_sql = "SELECT id FROM raw_item_data WHERE ac > 0 AND (slots IS NULL OR slots = 0) ORDER BY id"
+    instrument.explain(conn, find_sql, label='find candidates')
+    with instrument.phase('find'):
+        rows = cur.execute(find_sql).fetchall()
+
+    items_to_update = [row[0] for row in rows]
+    print(f"Found {len(items_to_update)} items that need slots data from Lucy")
+    print()
+
+    # Check how many Lucy files we can actually find
+    print("Checking Lucy JSON file availability...")
+    found_lucy = []
+    missing_lucy = []
+
+    with instrument.phase('coverage'):
+        for item_id in items_to_update:
+            if lucy.contains(item_id):
+                found_lucy.append(item_id)
+            else:
+                missing_lucy.append(item_id)
+
+    print(f"  Found in Lucy directory: {len(found_lucy)}")
+    print(f"  Missing from Lucy directory: {len(missing_lucy)}")
+    print()
+
+    if len(found_lucy) == 0:
+        print("ERROR: No Lucy files found for items needing update!")
+        exit(1)
+
+    # Show coverage
+    coverage = (len(found_lucy) / len(items_to_update)) * 100
+    print(f"Coverage: {coverage:.1f}% of items can be updated from Lucy")
+    print()
+
+    # Now do the actual update
+    print(f"Starting database update ({'bulk' if args.bulk else 'per-row'})...")
+    print()
+
+    update_start = time.perf_counter()
+    with instrument.phase('update'):
+        if args.bulk:
+            updated_count, error_count, skipped_count = bulk_update(conn, lucy, found_lucy)
         else:
-            skipped_count += 1
-    
-    except Exception as e:
-        print(f"Error processing item {item_id}: {e}")
-        error_count += 1
-    
-    # Progress update
-    if (idx + 1) % 1000 == 0:
-        percent = ((idx + 1) / len(found_lucy)) * 100
-        print(f"  Progress: {idx + 1}/{len(found_lucy)} ({percent:.1f}%) - Updated: {updated_count}, Errors: {error_count}, Skipped: {skipped_count}")
-
-print()
-print("=" * 70)
-print("Update Statistics:")
-print("=" * 70)
-print(f"Items processed: {len(found_lucy)}")
-print(f"Successfully updated: {updated_count}")
-print(f"Errors: {error_count}")
-print(f"Skipped: {skipped_count}")
-print()
-
-# Commit changes
-print("Committing changes to database...")
-conn.commit()
-
-# Verify results
-print()
-print("Verification:")
-print("-" * 70)
-
-# Check how many items now have slots
-still_missing = cur.execute(
-    "SELECT COUNT(*) FROM raw_item_data WHERE ac > 0 AND (slots IS NULL OR slots = 0)"
-).fetchone()[0]
-
-fixed = len(items_to_update) - still_missing
-print(f"Items with AC and slots=0 before: {len(items_to_update)}")
-print(f"Items with AC and slots=0 after: {still_missing}")
-print(f"Items fixed: {fixed}")
-print()
-
-if still_missing > 0:
-    print(f"Remaining items missing slots data:")
-    remaining = cur.execute(
-        "SELECT id, name, ac FROM raw_item_data WHERE ac > 0 AND (slots IS NULL OR slots = 0) LIMIT 10"
-    ).fetchall()
-    for item_id, name, ac in remaining:
-        lucy_exists = os.path.exists(os.path.join(lucy_dir, f'lucy_item_{item_id}.json'))
-        print(f"  Item {item_id}: {name} AC={ac} (Lucy file: {'exists' if lucy_exists else 'MISSING'})")
-
-conn.close()
-print()
-print("Update complete!")
+            updated_count, error_count, skipped_count = row_update(cur, lucy, found_lucy)
+
+    print()
+    print("=" * 70)
+    print("Update Statistics:")
+    print("=" * 70)
+    print(f"Items processed: {len(found_lucy)}")
+    print(f"Successfully updated: {updated_count}")
+    print(f"Errors: {error_count}")
+    print(f"Skipped: {skipped_count}")
+    print()
+
+    # Commit changes
+    print("Committing changes to database...")
+    with instrument.phase('commit'):
+        conn.commit()
+    print(f"Update time: {time.perf_counter() - update_start:.2f}s")
+
+    # Verify results
+    print()
+    print("Verification:")
+    print("-" * 70)
+
+    # Check how many items now have slots
+    with instrument.phase('verify'):
+        still_missing = cur.execute(
+            "SELECT COUNT(*) FROM raw_item_data WHERE ac > 0 AND (slots IS NULL OR slots = 0)"
+        ).fetchone()[0]
+
+    fixed = len(items_to_update) - still_missing
+    print(f"Items with AC and slots=0 before: {len(items_to_update)}")
+    print(f"Items with AC and slots=0 after: {still_missing}")
+    print(f"Items fixed: {fixed}")
+    print()
+
+    if still_missing > 0:
+        print(f"Remaining items missing slots data:")
+        remaining = cur.execute(
+            "SELECT id, name, ac FROM raw_item_data WHERE ac > 0 AND (slots IS NULL OR slots = 0) LIMIT 10"
+        ).fetchall()
+        for item_id, name, ac in remaining:
+            lucy_exists = lucy.contains(item_id)
+            print(f"  Item {item_id}: {name} AC={ac} (Lucy file: {'exists' if lucy_exists else 'MISSING'})")
+
+    lucy.close()
+    conn.close()
+    print()
+    print("Update complete!")
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""Offline cross-character upgrade assignment from equipment snapshots
+
+check_cross_character_upgrades.lua asks every DanNet peer for its equipped
+item slot by slot (mq.delay(250) per query) and hands items out greedily
+in role-priority order. This plans the same trades offline:
+
+    snapshots   write_equipped_items_ini.lua  <luaDir>/YALM2/equipped/<name>.ini
+                ([Character] Class/Level, [Equipped] Slot_N=id|name,
+                [Tradeable] Item_N=id|name), or the equipped_items table
+                written by write_equipped_items.lua (class and level then
+                come from --character)
+    scoring     upgrade_scoring.slot_scores for every (item, character, slot)
+                in one numpy pass; delta = new score - score of what is worn
+    rules       class bitmask, reqlevel, shields only for SHIELD_CLASSES,
+                a 2H weapon in the main hand also gives up the off hand,
+                nothing goes in the off hand behind a worn 2H weapon;
+                left/right ear, wrist and finger are separate slots
+    solve       maximum-weight assignment of item copies to (character,
+                slot) (scipy linear_sum_assignment), branching on the rare
+                plans that put a 2H weapon and an off-hand item on one
+                character (bounded by MAX_SOLVES / GAP_TOLERANCE); role
+                priority only breaks ties
+
+The plan is printed (giver -> receiver, slot, replaced item, delta) next to
+the greedy result for comparison, and optionally written as JSON. A 2H
+weapon planned for the main hand adds an 'unequip' row for the receiver's
+off-hand item (its score is already charged to the weapon's delta).
+
+Usage:
+    python upgrade_plan.py [--equipped DIR] [--db PATH] [--json FILE]
+    python upgrade_plan.py --snapshots quest_tasks.db --character Bob WAR 120 ... --items 12345 23456
+    python upgrade_plan.py --bench [--characters 6 54] [--items-per-character 20]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from linkdb import LinkDB, DB_PATH
+from equipment_store import read_ini, parse_item
+from item_rules import (CLASS_NAMES, ROLE_PRIORITY, SHIELD_CLASSES, SHIELD_ITEMTYPE, TWO_HANDED_ITEMTYPES,
+                        AUGMENT_ITEMTYPE, SLOT_COUNT, SLOT_NAMES, MAIN_HAND, OFF_HAND, normalize_class)
+from upgrade_scoring import load_stat_arrays, base_scores, slot_scores, class_eligibility
+
+EQUIPPED_DIR = r'C:\MQ2\lua\YALM2\equipped'
+SNAPSHOT_DB = r'C:\MQ2\config\YALM2\quest_tasks.db'
+
+# Deltas at or below this are not worth a trade
+MIN_DELTA = 0.5
+# Tie-break towards tanks, then melee, ... without changing which total is optimal
+PRIORITY_EPSILON = 1e-6
+# Branch and bound limits for 2H / off-hand conflicts
+MAX_SOLVES = 40
+GAP_TOLERANCE = 0.001
+
+# --- Snapshots -----------------------------------------------------------
+
+class Character:
+    def __init__(self, name, char_class, level, equipped=None):
+        self.name = name
+        self.char_class = normalize_class(char_class)
+        self.level = int(level)
+        self.equipped = equipped or {}    # slot -> (item_id, item_name)
+
+    @property
+    def priority(self):
+        return ROLE_PRIORITY.get(self.char_class, 5)
+
+def load_ini_snapshots(directory):
+    """(characters, tradeable) from write_equipped_items_ini.lua files
+
+    tradeable: [(owner, item_id, item_name)]
+    """
+    characters, tradeable = [], []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith('.ini'):
+            continue
+        data = read_ini(os.path.join(directory, filename))
+        info = data.get('Character', {})
+        name = info.get('Name') or filename[:-4]
+        if 'Class' not in info or 'Level' not in info:
+            print(f"  Skipping {filename}: no [Character] Class/Level (re-run write_equipped_items_ini)")
+            continue
+        equipped = {int(key.split('_')[1]): parse_item(value)
+                    for key, value in data.get('Equipped', {}).items() if key.startswith('Slot_')}
+        characters.append(Character(name, info['Class'], info['Level'], equipped))
+        tradeable.extend((name, *parse_item(value)) for value in data.get('Tradeable', {}).values())
+    return characters, tradeable
+
+def load_db_snapshots(db_path, roster):
+    """Characters from the equipped_items table; roster is [(name, class, level)]"""
+    conn = sqlite3.connect(db_path)
+    characters = []
+    for name, char_class, level in roster:
+        equipped = {slot: (item_id, item_name) for slot, item_id, item_name in conn.execute(
+            'SELECT slot_number, item_id, item_name FROM equipped_items WHERE character_name = ? AND item_id > 0',
+            (name,))}
+        characters.append(Character(name, char_class, level, equipped))
+    conn.close()
+    return characters
+
+# --- Scoring -------------------------------------------------------------
+
+class UpgradeProblem:
+    """Score deltas for every (candidate copy, character, slot)"""
+
+    def __init__(self, conn, characters, candidates):
+        self.characters = characters
+        self.candidates = candidates          # [(owner, item_id, item_name)]
+        ids = {item_id for _, item_id, _ in candidates}
+        for char in characters:
+            ids.update(item_id for item_id, _ in char.equipped.values())
+        ids = sorted(ids)
+        self.ids, self.stats = load_stat_arrays(conn, f"id IN ({', '.join(map(str, ids))})" if ids else '0')
+        self.row = {int(item_id): i for i, item_id in enumerate(self.ids)}
+        self.deltas, self.valid = self._score()
+
+    def _score(self):
+        stats = self.stats
+        n_chars, n_cands = len(self.characters), len(self.candidates)
+        empty = np.zeros((n_cands, n_chars, SLOT_COUNT)), np.zeros((n_cands, n_chars, SLOT_COUNT), dtype=bool)
+        if not len(self.ids) or not n_cands:
+            return empty
+
+        # slots x items x classes
+        base = base_scores(stats)
+        scores = np.stack([slot_scores(stats, slot, base) for slot in range(SLOT_COUNT)])
+        char_class = np.array([CLASS_NAMES.index(c.char_class) for c in self.characters])
+        level = np.array([c.level for c in self.characters])
+
+        # What each character wears: row index per slot, -1 for empty or unknown
+        worn = np.full((n_chars, SLOT_COUNT), -1)
+        for ci, char in enumerate(self.characters):
+            for slot, (item_id, _) in char.equipped.items():
+                worn[ci, slot] = self.row.get(item_id, -1)
+        slot_index = np.arange(SLOT_COUNT)[None, :]
+        current = np.where(worn >= 0, scores[slot_index, np.maximum(worn, 0), char_class[:, None]], 0.0)
+
+        known = np.array([item_id in self.row for _, item_id, _ in self.candidates])
+        cand = np.array([self.row.get(item_id, 0) for _, item_id, _ in self.candidates])
+        new = scores.transpose(1, 2, 0)[cand][:, char_class, :]           # cands x chars x slots
+        deltas = new - current[None, :, :]
+
+        itemtype = stats['itemtype'][cand]
+        two_handed = np.isin(itemtype, list(TWO_HANDED_ITEMTYPES))
+        deltas[:, :, MAIN_HAND] -= np.where(two_handed[:, None], current[None, :, OFF_HAND], 0.0)
+
+        fits = ((stats['slots'][cand][:, None] >> np.arange(SLOT_COUNT)[None, :]) & 1).astype(bool)
+        usable = class_eligibility(stats)[cand][:, char_class] & (stats['reqlevel'][cand][:, None] <= level[None, :])
+        valid = (known & (itemtype != AUGMENT_ITEMTYPE))[:, None, None] & fits[:, None, :] & usable[:, :, None]
+
+        shield_ok = np.array([c.char_class in SHIELD_CLASSES for c in self.characters])
+        valid[:, :, OFF_HAND] &= ~((itemtype == SHIELD_ITEMTYPE)[:, None] & ~shield_ok[None, :])
+        worn_main = worn[:, MAIN_HAND]
+        wearing_2h = (worn_main >= 0) & np.isin(stats['itemtype'][np.maximum(worn_main, 0)], list(TWO_HANDED_ITEMTYPES))
+        valid[:, wearing_2h, OFF_HAND] = False
+        return deltas, valid & (deltas > MIN_DELTA)
+
+    def is_two_handed(self, k):
+        return int(self.stats['itemtype'][self.row[self.candidates[k][1]]]) in TWO_HANDED_ITEMTYPES
+
+# --- Solvers -------------------------------------------------------------
+
+def _assign(weights):
+    """[(candidate, position)] with positive weight from a max-weight assignment"""
+    rows, cols = linear_sum_assignment(weights, maximize=True)
+    keep = weights[rows, cols] > 0
+    return list(zip(rows[keep].tolist(), cols[keep].tolist()))
+
+def _conflicts(problem, pairs):
+    """{character index: (2H main pair, off-hand pair)} for characters given both"""
+    main_2h, off = {}, {}
+    for k, position in pairs:
+        ci, slot = divmod(position, SLOT_COUNT)
+        if slot == MAIN_HAND and problem.is_two_handed(k):
+            main_2h[ci] = (k, position)
+        elif slot == OFF_HAND:
+            off[ci] = (k, position)
+    return {ci: (main_2h[ci], off[ci]) for ci in sorted(main_2h.keys() & off.keys())}
+
+def solve_optimal(problem):
+    """[(candidate, character index, slot, delta)] maximizing the total delta
+
+    The unconstrained assignment is an upper bound. Characters given both a
+    2H weapon and an off-hand item are settled on whichever of "no 2H main"
+    or "no off hand" loses less and the assignment is re-solved, until no
+    conflicts remain, the bound is within GAP_TOLERANCE, or MAX_SOLVES is
+    spent; anything left is repaired by dropping the cheaper side.
+    """
+    n_cands, n_chars = len(problem.candidates), len(problem.characters)
+    if not n_cands or not n_chars:
+        return []
+    priority = np.array([c.priority for c in problem.characters], dtype=np.float64)
+    tie_break = (6 - priority)[None, :, None] * PRIORITY_EPSILON
+    weights = np.where(problem.valid, problem.deltas + tie_break, 0.0).reshape(n_cands, n_chars * SLOT_COUNT)
+
+    # Only candidates and (character, slot) positions with some upgrade take part
+    rows = np.flatnonzero(weights.any(axis=1))
+    cols = np.flatnonzero(weights.any(axis=0))
+    if not len(rows):
+        return []
+    weights = weights[np.ix_(rows, cols)]
+    col_of = {int(p): j for j, p in enumerate(cols)}
+    two_handed = np.array([problem.is_two_handed(int(k)) for k in rows])
+
+    def assign(w):
+        return [(int(rows[i]), int(cols[j])) for i, j in _assign(w)]
+
+    def value(pairs):
+        return sum(weights[np.searchsorted(rows, k), col_of[p]] for k, p in pairs)
+
+    def repair(pairs, conflicts):
+        """Drop the cheaper side of every 2H / off-hand conflict"""
+        drop = {min(pair, key=lambda kp: weights[np.searchsorted(rows, kp[0]), col_of[kp[1]]])
+                for pair in conflicts.values()}
+        return [kp for kp in pairs if kp not in drop]
+
+    def solve(forbidden):
+        w = weights.copy()
+        for kind, c in forbidden:
+            if kind == '2h':
+                w[two_handed, col_of[c * SLOT_COUNT + MAIN_HAND]] = 0.0
+            else:
+                w[:, col_of[c * SLOT_COUNT + OFF_HAND]] = 0.0
+        pairs = assign(w)
+        return pairs, value(pairs)
+
+    pairs, bound = solve([])
+    best, best_value = [], 0.0
+    forbidden, solves = [], 1
+    while True:
+        conflicts = _conflicts(problem, pairs)
+        feasible = repair(pairs, conflicts) if conflicts else pairs
+        if value(feasible) > best_value:
+            best, best_value = feasible, value(feasible)
+        if not conflicts or solves + 2 * len(conflicts) > MAX_SOLVES or bound <= best_value * (1 + GAP_TOLERANCE):
+            break
+        # Settle every conflicting character on whichever rule costs less, then re-solve
+        for ci in conflicts:
+            options = [(solve(forbidden + [rule])[1], rule) for rule in (('2h', ci), ('off', ci))]
+            forbidden.append(max(options)[1])
+            solves += 2
+        pairs, bound = solve(forbidden)
+        solves += 1
+
+    return [(k, p // SLOT_COUNT, p % SLOT_COUNT, float(problem.deltas[k, p // SLOT_COUNT, p % SLOT_COUNT]))
+            for k, p in best]
+
+def solve_greedy(problem):
+    """check_cross_character_upgrades.lua order: characters by role priority, best item first"""
+    order = sorted(range(len(problem.characters)),
+                   key=lambda ci: (problem.characters[ci].priority, problem.characters[ci].name.lower()))
+    used, filled, hands_2h, plan = set(), set(), set(), []
+    for ci in order:
+        while True:
+            best = None
+            for k in range(len(problem.candidates)):
+                if k in used:
+                    continue
+                for slot in np.flatnonzero(problem.valid[k, ci]):
+                    slot = int(slot)
+                    if (ci, slot) in filled or (slot == OFF_HAND and ci in hands_2h):
+                        continue
+                    if slot == MAIN_HAND and problem.is_two_handed(k) and (ci, OFF_HAND) in filled:
+                        continue
+                    delta = problem.deltas[k, ci, slot]
+                    if best is None or delta > best[3]:
+                        best = (k, ci, slot, float(delta))
+            if best is None:
+                break
+            k, _, slot, _ = best
+            used.add(k)
+            filled.add((ci, slot))
+            if slot == MAIN_HAND and problem.is_two_handed(k):
+                hands_2h.add(ci)
+            plan.append(best)
+    return plan
+
+def trade_plan(problem, assignment):
+    """Plan rows sorted by giver, then receiver priority"""
+    rows = []
+    for k, ci, slot, delta in assignment:
+        owner, item_id, item_name = problem.candidates[k]
+        char = problem.characters[ci]
+        replaced = char.equipped.get(slot)
+        rows.append({
+            'giver': owner,
+            'receiver': char.name,
+            'action': 'equip' if owner == char.name else 'trade',
+            'item_id': item_id,
+            'item_name': item_name,
+            'slot': slot,
+            'slot_name': SLOT_NAMES.get(slot, str(slot)),
+            'replaces_id': replaced[0] if replaced else None,
+            'replaces': replaced[1] if replaced else None,
+            'delta': round(delta, 1),
+            'priority': char.priority,
+        })
+        off_hand = char.equipped.get(OFF_HAND)
+        if slot == MAIN_HAND and off_hand and problem.is_two_handed(k):
+            rows.append({
+                'giver': char.name,
+                'receiver': char.name,
+                'action': 'unequip',
+                'item_id': off_hand[0],
+                'item_name': off_hand[1],
+                'slot': OFF_HAND,
+                'slot_name': SLOT_NAMES.get(OFF_HAND, str(OFF_HAND)),
+                'replaces_id': None,
+                'replaces': None,
+                'delta': 0.0,
+                'priority': char.priority,
+            })
+    rows.sort(key=lambda r: (r['giver'].lower(), r['priority'], r['receiver'].lower(), r['slot']))
+    return rows
+
+def print_plan(rows):
+    if not rows:
+        print("No upgrades found")
+        return
+    giver = None
+    for r in rows:
+        if r['giver'] != giver:
+            giver = r['giver']
+            print(f"\n{giver}:")
+        if r['action'] == 'unequip':
+            print(f"  {'unequip':18s} {r['item_name'][:36]:36s} {r['slot_name']:12s} "
+                  f"for the two-handed weapon")
+            continue
+        target = 'equip' if r['action'] == 'equip' else f"-> {r['receiver']}"
+        print(f"  {target:18s} {r['item_name'][:36]:36s} {r['slot_name']:12s} "
+              f"replaces {(r['replaces'] or '[Empty]')[:30]:30s} +{r['delta']:.1f}")
+
+def plan_upgrades(conn, characters, candidates, compare=True):
+    start = time.perf_counter()
+    problem = UpgradeProblem(conn, characters, candidates)
+    scored = time.perf_counter()
+    assignment = solve_optimal(problem)
+    solved = time.perf_counter()
+    summary = {
+        'characters': len(characters),
+        'candidates': len(candidates),
+        'score_ms': round((scored - start) * 1000, 2),
+        'solve_ms': round((solved - scored) * 1000, 2),
+        'total_delta': round(sum(a[3] for a in assignment), 1),
+    }
+    if compare:
+        greedy = solve_greedy(problem)
+        summary['greedy_ms'] = round((time.perf_counter() - solved) * 1000, 2)
+        summary['greedy_total_delta'] = round(sum(a[3] for a in greedy), 1)
+    return trade_plan(problem, assignment), summary
+
+# --- Benchmark -----------------------------------------------------------
+
+def synthetic_group(conn, n_chars, items_per_char, rng):
+    """Characters wearing random equippable items, each holding tradeable ones"""
+    items = conn.execute('SELECT id, name, slots, CAST(reqlevel AS INTEGER) FROM raw_item_data '
+                         'WHERE slots > 0 ORDER BY id').fetchall()
+    by_slot = {slot: [i for i in items if i[2] & (1 << slot)] for slot in range(SLOT_COUNT)}
+    characters, candidates = [], []
+    for c in range(n_chars):
+        name = f'Char{c:02d}'
+        equipped = {}
+        for slot, pool in by_slot.items():
+            if pool and rng.random() < 0.9:
+                item_id, item_name, _, _ = rng.choice(pool)
+                equipped[slot] = (item_id, item_name)
+        characters.append(Character(name, rng.choice(CLASS_NAMES), rng.randint(60, 125), equipped))
+        candidates.extend((name, item_id, item_name) for item_id, item_name, _, _ in rng.sample(items, items_per_char))
+    return characters, candidates
+
+def run_bench(conn, sizes, items_per_char, seed):
+    rng = random.Random(seed)
+    print(f"  {'characters':>10s} {'candidates':>10s} {'score ms':>9s} {'solve ms':>9s} {'greedy ms':>10s} "
+          f"{'planned':>9s} {'greedy':>9s}")
+    for n_chars in sizes:
+        characters, candidates = synthetic_group(conn, n_chars, items_per_char, rng)
+        _, s = plan_upgrades(conn, characters, candidates)
+        print(f"  {n_chars:10d} {len(candidates):10d} {s['score_ms']:9.2f} {s['solve_ms']:9.2f} {s['greedy_ms']:10.2f} "
+              f"{s['total_delta']:9.1f} {s['greedy_total_delta']:9.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plan cross-character upgrade trades from equipment snapshots')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--equipped', default=EQUIPPED_DIR, help='Directory of write_equipped_items_ini.lua files')
+    parser.add_argument('--snapshots', help='Read equipped_items from this quest_tasks.db instead of INI files')
+    parser.add_argument('--character', nargs=3, action='append', metavar=('NAME', 'CLASS', 'LEVEL'), default=[],
+                        help='Roster entry for --snapshots (class may be a short name)')
+    parser.add_argument('--items', type=int, nargs='+', default=[], help='Extra tradeable item ids')
+    parser.add_argument('--giver', default='Inventory', help='Owner shown for --items')
+    parser.add_argument('--json', help='Write the plan as JSON')
+    parser.add_argument('--bench', action='store_true', help='Time synthetic groups against --db')
+    parser.add_argument('--characters', type=int, nargs='+', default=[6, 12, 54], help='Group sizes for --bench')
+    parser.add_argument('--items-per-character', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=16)
+    args = parser.parse_args()
+
+    db = LinkDB(args.db)
+    if args.bench:
+        run_bench(db.conn, args.characters, args.items_per_character, args.seed)
+        sys.exit(0)
+
+    if args.snapshots:
+        characters, tradeable = load_db_snapshots(args.snapshots, args.character), []
+    else:
+        characters, tradeable = load_ini_snapshots(args.equipped)
+    if args.items:
+        names = {item_id: row['name'] for item_id, row in db.get_items(args.items, ['id', 'name']).items()}
+        tradeable.extend((args.giver, item_id, names.get(item_id, '?')) for item_id in args.items)
+    print(f"{len(characters)} characters, {len(tradeable)} tradeable items")
+
+    rows, summary = plan_upgrades(db.conn, characters, tradeable)
+    print_plan(rows)
+    print(f"\nTotal delta {summary['total_delta']:.1f} (greedy by role priority: {summary['greedy_total_delta']:.1f}); "
+          f"scored in {summary['score_ms']:.1f}ms, solved in {summary['solve_ms']:.1f}ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'plan': rows}, f, indent=2)
+        print(f"Plan written to {args.json}")
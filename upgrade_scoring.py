@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Vectorized class-weighted item scoring and best-in-slot precompute
+
+Scores every equippable item in raw_item_data for every class at once,
+using the same weights and weapon-efficiency rules as calculate_stat_score
+in check_upgrades.lua, and writes the top items per
+(class, level band, slot) to the best_in_slot table:
+
+    best_in_slot(class, level_band, slot, rank, item_id, score)
+
+A level band holds the items with reqlevel <= level_band, one band per
+level so a character's ranking includes items of its own level; look a
+character up with band_for_level(level). Upgrade checks can then compare against a
+precomputed rank instead of rescoring items pair by pair.
+
+Usage:
+    python upgrade_scoring.py [--db PATH] [--top N]
+    python upgrade_scoring.py --show Rogue 90 13
+"""
+
+import time
+import sqlite3
+import argparse
+
+import numpy as np
+
+from item_rules import (CLASS_NAMES, CLASS_BITS, DAMAGE_BONUS, SHIELD_CLASSES, SHIELD_ITEMTYPE,
+                        SLOT_COUNT, SLOT_NAMES, MAIN_HAND, OFF_HAND, WEIGHT_KEYS, class_weights,
+                        normalize_class)
+from linkdb import resolve_db_path
+
+DB_PATH = r'C:\MQ2\lua\yalm2\MQ2LinkDB.db'
+
+STAT_COLUMNS = [
+    'ac', 'hp', 'mana', 'endur', 'mr', 'fr', 'cr', 'pr', 'dr', 'attack', 'regen',
+    'manaregen', 'healamt', 'clairvoyance', 'damage', 'delay', 'backstabdmg',
+    'reqlevel', 'classes', 'slots', 'itemtype',
+]
+
+TOP_N = 10
+# One band per level: wider bands floor a level-93 character to band 90 and
+# hide the reqlevel 91-93 items it can already wear
+BAND_WIDTH = 1
+MAX_LEVEL = 125
+LEVEL_BANDS = list(range(0, MAX_LEVEL + 1, BAND_WIDTH))
+
+def band_for_level(level):
+    """Highest band whose items a character of this level can all wear"""
+    return max(0, min(MAX_LEVEL, int(level) // BAND_WIDTH * BAND_WIDTH))
+
+def load_stat_arrays(conn, where='slots > 0'):
+    """(ids, {column: int64 array}) for raw_item_data rows matching where
+
+    Missing columns and NULL/empty values load as 0, like tonumber(x) or 0.
+    """
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(raw_item_data)')}
+    select = ', '.join(f'COALESCE(CAST({c} AS INTEGER), 0)' if c in existing else '0' for c in STAT_COLUMNS)
+    rows = conn.execute(f'SELECT id, {select} FROM raw_item_data WHERE {where} ORDER BY id').fetchall()
+    data = np.array(rows, dtype=np.int64).reshape(-1, len(STAT_COLUMNS) + 1)
+    return data[:, 0], {c: data[:, i + 1] for i, c in enumerate(STAT_COLUMNS)}
+
+def weight_matrix(class_names=CLASS_NAMES):
+    """classes x WEIGHT_KEYS"""
+    return np.array([[class_weights(c)[k] for k in WEIGHT_KEYS] for c in class_names], dtype=np.float64)
+
+def feature_matrix(stats):
+    """items x WEIGHT_KEYS, resists summed like calculate_stat_score"""
+    resists = stats['mr'] + stats['fr'] + stats['cr'] + stats['pr'] + stats['dr']
+    return np.column_stack([
+        stats['ac'], stats['hp'], stats['mana'], stats['endur'], resists, stats['attack'],
+        stats['regen'], stats['manaregen'], stats['healamt'], stats['clairvoyance'],
+    ]).astype(np.float64)
+
+def class_eligibility(stats, class_names=CLASS_NAMES):
+    """items x classes bool: classes = 0 means any class"""
+    classes = stats['classes']
+    bits = np.array([1 << CLASS_BITS[normalize_class(c)] for c in class_names], dtype=np.int64)
+    return (classes[:, None] == 0) | ((classes[:, None] & bits[None, :]) != 0)
+
+def weapon_efficiency(stats, slot, class_names=CLASS_NAMES):
+    """items x classes weapon efficiency for a slot (0 for non-weapons)"""
+    damage = stats['damage'].astype(np.float64)
+    delay = stats['delay'].astype(np.float64)
+    is_weapon = (damage > 0) & (delay > 0)
+    safe_delay = np.where(is_weapon, delay, 1.0)
+
+    if slot == MAIN_HAND:
+        bonus = np.array([DAMAGE_BONUS.get(normalize_class(c), 0) for c in class_names], dtype=np.float64)
+        rogue = np.array([normalize_class(c) == 'Rogue' for c in class_names])
+        backstab = np.where(stats['backstabdmg'] > 0, stats['backstabdmg'] * 0.5, 0.0)
+        effective = damage[:, None] * 2 + bonus[None, :] + np.outer(backstab, rogue)
+        eff = effective / safe_delay[:, None] * 50
+    elif slot == OFF_HAND:
+        eff = np.repeat((damage * 2 / safe_delay * 50 * 0.62)[:, None], len(class_names), axis=1)
+    else:
+        eff = np.repeat((damage / safe_delay * 1000)[:, None], len(class_names), axis=1)
+    return np.where(is_weapon[:, None], eff, 0.0)
+
+def base_scores(stats, class_names=CLASS_NAMES):
+    """items x classes score from the weighted stats alone"""
+    return feature_matrix(stats) @ weight_matrix(class_names).T
+
+def slot_scores(stats, slot, base=None, class_names=CLASS_NAMES):
+    """items x classes calculate_stat_score for an item worn in slot"""
+    if base is None:
+        base = base_scores(stats, class_names)
+    efficiency_weight = weight_matrix(class_names)[:, WEIGHT_KEYS.index('attack')] * 10
+    return base + weapon_efficiency(stats, slot, class_names) * efficiency_weight[None, :]
+
+def compute_best_in_slot(ids, stats, top_n=TOP_N, bands=LEVEL_BANDS):
+    """Rows of (class, level_band, slot, rank, item_id, score)"""
+    eligible = class_eligibility(stats)
+    base = base_scores(stats)
+    reqlevel = stats['reqlevel']
+    rows = []
+
+    for slot in range(SLOT_COUNT):
+        in_slot = (stats['slots'] & (1 << slot)) != 0
+        if not in_slot.any():
+            continue
+        scores = slot_scores(stats, slot, base)
+        for ci, char_class in enumerate(CLASS_NAMES):
+            mask = in_slot & eligible[:, ci]
+            if slot == OFF_HAND and char_class not in SHIELD_CLASSES:
+                mask &= stats['itemtype'] != SHIELD_ITEMTYPE
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                continue
+            order = candidates[np.argsort(-scores[candidates, ci], kind='stable')]
+            order_req = reqlevel[order]
+            for band in bands:
+                top = order[order_req <= band][:top_n]
+                for rank, i in enumerate(top, 1):
+                    rows.append((char_class, band, slot, rank, int(ids[i]), float(scores[i, ci])))
+    return rows
+
+def write_best_in_slot(conn, rows):
+    conn.execute('DROP TABLE IF EXISTS best_in_slot')
+    conn.execute('''
+        CREATE TABLE best_in_slot (
+            class TEXT NOT NULL,
+            level_band INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (class, level_band, slot, rank)
+        ) WITHOUT ROWID''')
+    conn.executemany('INSERT INTO best_in_slot VALUES (?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+
+def best_items(conn, char_class, level, slot, limit=TOP_N):
+    """[(rank, item_id, score)] for a character's level and slot"""
+    return conn.execute(
+        'SELECT rank, item_id, score FROM best_in_slot WHERE class = ? AND level_band = ? AND slot = ? '
+        'ORDER BY rank LIMIT ?',
+        (normalize_class(char_class), band_for_level(level), slot, limit)).fetchall()
+
+def build(db_path=DB_PATH, top_n=TOP_N):
+    conn = sqlite3.connect(resolve_db_path(db_path))
+    start = time.perf_counter()
+    ids, stats = load_stat_arrays(conn)
+    loaded = time.perf_counter()
+    print(f"Loaded {len(ids)} equippable items in {loaded - start:.2f}s")
+
+    rows = compute_best_in_slot(ids, stats, top_n)
+    scored = time.perf_counter()
+    print(f"Scored {len(ids)} items x {len(CLASS_NAMES)} classes x {SLOT_COUNT} slots in {scored - loaded:.2f}s")
+
+    write_best_in_slot(conn, rows)
+    print(f"Wrote {len(rows)} best_in_slot rows in {time.perf_counter() - scored:.2f}s")
+    conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute best_in_slot rankings')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--top', type=int, default=TOP_N, help='Items kept per class/band/slot')
+    parser.add_argument('--show', nargs=3, metavar=('CLASS', 'LEVEL', 'SLOT'),
+                        help='Print the ranking for a class, level and slot number')
+    args = parser.parse_args()
+
+    if args.show:
+        char_class, level, slot = args.show[0], int(args.show[1]), int(args.show[2])
+        conn = sqlite3.connect(resolve_db_path(args.db))
+        print(f"Best {SLOT_NAMES.get(slot, slot)} items for level {level} {char_class} (band {band_for_level(level)}):")
+        for rank, item_id, score in best_items(conn, char_class, level, slot, args.top):
+            name = conn.execute('SELECT name FROM raw_item_data WHERE id = ?', (item_id,)).fetchone()
+            print(f"  {rank:2d}. {item_id:7d} {name[0] if name else '?':40s} {score:9.1f}")
+        conn.close()
+    else:
+        build(args.db, args.top)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""One-pass, rule-driven data-quality validation of raw_item_data
+
+check_slots_issue.py, check_slots_type.py and check_lucy_coverage.py each
+ran their own query for one anomaly, and the coverage check only looked at
+the first 100 ids. This streams raw_item_data once (fetchmany over id
+ranges, one process per range) and evaluates every rule on every row:
+
+    ac_without_slots    AC > 0 but slots 0 / NULL (never offered as an upgrade)
+    invalid_class_bits  classes has bits outside the 16 class bits
+    invalid_slot_bits   slots has bits beyond the last equipment slot
+    type_mismatch       a numeric column the runtime reads holds text ('' or
+                        '12') or a real, whatever the column's declared type,
+                        so tonumber() and comparisons differ
+    weapon_missing_stats weapon itemtype, or damage/delay on only one side,
+                        without both damage and delay
+    reqlevel_range      reqlevel outside 0..MAX_LEVEL
+    missing_name        no name (name lookups can never find it)
+    missing_from_lucy   id has no Lucy file (cannot be refreshed)
+
+The Lucy corpus is listed once (open_lucy) and the id set handed to the
+workers. Every finding also records whether its id is in Lucy, so the
+report says how many are fixable by a re-import, and Lucy ids that never
+made it into the table are listed as not_imported.
+
+A rule is a function decorated with @rule(name, severity, columns,
+description) that gets the row (a dict of the columns it asked for) and
+returns None, a short detail string, or {key: detail} to also count the
+finding per key (type_mismatch counts per column). The process exits 1 when an
+error-severity rule fires.
+
+Usage:
+    python validate_items.py [--db PATH] [--lucy DIR|LPAK | --no-lucy] [--workers N]
+                             [--rules ac_without_slots ...] [--samples N] [--json FILE]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from multiprocessing import Pool
+
+import instrument
+from linkdb import DB_PATH, connect, to_number
+from item_rules import CLASS_BITS, SLOT_COUNT, WEAPON_CATEGORIES
+from lucy_archive import open_lucy
+from lucy_profile import HOT_COLUMNS
+from upgrade_scoring import MAX_LEVEL
+
+LUCY_DIR = r'D:\Lucy'
+
+FETCH_SIZE = 5000
+SAMPLES = 10
+# Id ranges per worker, so one slow range does not hold up the rest
+RANGES_PER_WORKER = 4
+
+VALID_CLASS_BITS = sum(1 << bit for bit in CLASS_BITS.values())
+VALID_SLOT_BITS = (1 << SLOT_COUNT) - 1
+# Every hot column but the name and lore text is an integer in the game data,
+# whatever the column was declared as (legacy tables declare them all TEXT)
+NUMERIC_COLUMNS = [c for c in HOT_COLUMNS if c not in ('name', 'lore')]
+
+RULES = {}
+
+class Rule:
+    def __init__(self, name, severity, columns, description, check):
+        self.name = name
+        self.severity = severity
+        self.columns = columns
+        self.description = description
+        self.check = check
+
+def rule(name, severity, columns, description):
+    """Register check(row, ctx) -> None, a detail string or {key: detail} (counted per key)"""
+    def register(check):
+        RULES[name] = Rule(name, severity, columns, description, check)
+        return check
+    return register
+
+def _int(value):
+    number = to_number(value)
+    return int(number) if isinstance(number, (int, float)) else 0
+
+def _numeric_text(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+@rule('ac_without_slots', 'warning', ['ac', 'slots'], 'AC > 0 but no equipment slots')
+def ac_without_slots(row, ctx):
+    if _int(row['ac']) > 0 and _int(row['slots']) == 0:
+        return f"ac={row['ac']} slots={row['slots']!r}"
+
+@rule('invalid_class_bits', 'error', ['classes'], 'classes has bits outside the 16 class bits')
+def invalid_class_bits(row, ctx):
+    classes = _int(row['classes'])
+    if classes < 0 or classes & ~VALID_CLASS_BITS:
+        return f"classes={classes} (extra bits {classes & ~VALID_CLASS_BITS:#x})"
+
+@rule('invalid_slot_bits', 'error', ['slots'], f'slots has bits beyond slot {SLOT_COUNT - 1}')
+def invalid_slot_bits(row, ctx):
+    slots = _int(row['slots'])
+    if slots < 0 or slots & ~VALID_SLOT_BITS:
+        return f"slots={slots} (extra bits {slots & ~VALID_SLOT_BITS:#x})"
+
+@rule('type_mismatch', 'warning', NUMERIC_COLUMNS, 'numeric column holds text or a real value')
+def type_mismatch(row, ctx):
+    bad = {}
+    for column in NUMERIC_COLUMNS:
+        value = row.get(column)
+        if value is None or isinstance(value, int):
+            continue
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', 'replace')
+        if isinstance(value, str):
+            kind = 'empty text' if not value.strip() else 'numeric text' if _numeric_text(value) else 'text'
+        else:
+            kind = 'real'
+        bad[column] = f'{column}={value!r} ({kind})'
+    return bad or None
+
+@rule('weapon_missing_stats', 'warning', ['itemtype', 'damage', 'delay'], 'weapon without both damage and delay')
+def weapon_missing_stats(row, ctx):
+    damage, delay = _int(row['damage']), _int(row['delay'])
+    if damage > 0 and delay > 0:
+        return None
+    if _int(row['itemtype']) in WEAPON_CATEGORIES or (damage > 0) != (delay > 0):
+        return f"itemtype={row['itemtype']} damage={row['damage']!r} delay={row['delay']!r}"
+
+@rule('reqlevel_range', 'warning', ['reqlevel'], f'reqlevel outside 0..{MAX_LEVEL}')
+def reqlevel_range(row, ctx):
+    reqlevel = _int(row['reqlevel'])
+    if not 0 <= reqlevel <= MAX_LEVEL:
+        return f"reqlevel={reqlevel}"
+
+@rule('missing_name', 'error', [], 'no item name')
+def missing_name(row, ctx):
+    if not row['name'] or not str(row['name']).strip():
+        return f"name={row['name']!r}"
+
+@rule('missing_from_lucy', 'info', [], 'no Lucy file for this id')
+def missing_from_lucy(row, ctx):
+    if ctx['lucy_ids'] is not None and row['id'] not in ctx['lucy_ids']:
+        return 'not in Lucy corpus'
+
+# --- Engine ----------------------------------------------------------------
+
+def new_result(rule_names):
+    return {name: {'count': 0, 'in_lucy': 0, 'samples': [], 'keys': {}} for name in rule_names}
+
+def validate_range(db_path, rule_names, low, high, lucy_ids, samples=SAMPLES):
+    """(rows, {rule: result}) for ids in [low, high]"""
+    conn = connect(db_path)
+    declared = {row[1]: (row[2] or '').upper() for row in conn.execute('PRAGMA table_info(raw_item_data)')}
+    rules = [RULES[name] for name in rule_names]
+    wanted = {'id', 'name'} | {c for r in rules for c in r.columns}
+    columns = [c for c in declared if c in wanted]
+    ctx = {'lucy_ids': lucy_ids}
+    results = new_result(rule_names)
+    missing = {c: None for c in wanted if c not in declared}
+
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM raw_item_data WHERE id BETWEEN ? AND ? ORDER BY id",
+                          (low, high))
+    rows = 0
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            break
+        rows += len(batch)
+        for values in batch:
+            row = dict(zip(columns, values))
+            row.update(missing)
+            in_lucy = lucy_ids is not None and row['id'] in lucy_ids
+            for r in rules:
+                detail = r.check(row, ctx)
+                if detail is None:
+                    continue
+                result = results[r.name]
+                result['count'] += 1
+                result['in_lucy'] += in_lucy
+                if isinstance(detail, dict):
+                    for key in detail:
+                        result['keys'][key] = result['keys'].get(key, 0) + 1
+                    detail = ' '.join(detail.values())
+                if len(result['samples']) < samples:
+                    result['samples'].append([row['id'], row['name'], detail])
+    conn.close()
+    return rows, results
+
+_worker = {}
+
+def _init_worker(db_path, rule_names, lucy_ids, samples):
+    _worker.update(db_path=db_path, rule_names=rule_names, lucy_ids=lucy_ids, samples=samples)
+
+def _validate_task(bounds):
+    return validate_range(_worker['db_path'], _worker['rule_names'], bounds[0], bounds[1],
+                          _worker['lucy_ids'], _worker['samples'])
+
+def id_ranges(conn, parts):
+    """Split the id space into up to `parts` ranges with about the same row count"""
+    total = conn.execute('SELECT COUNT(*) FROM raw_item_data').fetchone()[0]
+    if not total:
+        return []
+    bounds = [conn.execute('SELECT id FROM raw_item_data ORDER BY id LIMIT 1 OFFSET ?', (total * i // parts,)).fetchone()[0]
+              for i in range(parts)]
+    bounds = sorted(set(bounds))
+    last = conn.execute('SELECT MAX(id) FROM raw_item_data').fetchone()[0]
+    return [(low, (bounds[i + 1] - 1) if i + 1 < len(bounds) else last) for i, low in enumerate(bounds)]
+
+def merge_results(into, other, samples=SAMPLES):
+    for name, result in other.items():
+        target = into[name]
+        target['count'] += result['count']
+        target['in_lucy'] += result['in_lucy']
+        target['samples'] = (target['samples'] + result['samples'])[:samples]
+        for column, n in result['keys'].items():
+            target['keys'][column] = target['keys'].get(column, 0) + n
+
+def validate(db_path, rule_names=None, lucy_ids=None, workers=1, samples=SAMPLES):
+    """Full-table report dict"""
+    rule_names = rule_names or list(RULES)
+    if lucy_ids is None:
+        rule_names = [name for name in rule_names if name != 'missing_from_lucy']
+    conn = connect(db_path)
+    ranges = id_ranges(conn, max(1, workers) * RANGES_PER_WORKER if workers > 1 else 1)
+    table_ids = None
+    if lucy_ids is not None:
+        table_ids = {row[0] for row in conn.execute('SELECT id FROM raw_item_data')}
+    conn.close()
+
+    results = new_result(rule_names)
+    rows = 0
+    if workers > 1 and len(ranges) > 1:
+        with Pool(workers, initializer=_init_worker, initargs=(db_path, rule_names, lucy_ids, samples)) as pool:
+            # imap keeps id order, so samples are the lowest ids
+            for count, partial in pool.imap(_validate_task, ranges):
+                rows += count
+                merge_results(results, partial, samples)
+                instrument.count(count)
+    else:
+        for low, high in ranges:
+            count, partial = validate_range(db_path, rule_names, low, high, lucy_ids, samples)
+            rows += count
+            merge_results(results, partial, samples)
+            instrument.count(count)
+
+    report = {'db': os.path.abspath(db_path), 'rows': rows, 'ranges': len(ranges), 'rules': {}}
+    for name in rule_names:
+        r = RULES[name]
+        report['rules'][name] = dict(results[name], severity=r.severity, description=r.description)
+    if lucy_ids is not None:
+        not_imported = sorted(lucy_ids - table_ids)
+        report['lucy_items'] = len(lucy_ids)
+        report['not_imported'] = {'count': len(not_imported), 'samples': not_imported[:samples]}
+    return report
+
+def print_report(report):
+    rows = report['rows']
+    print(f"Validated {rows} rows of raw_item_data in {report['ranges']} range(s)")
+    if 'lucy_items' in report:
+        print(f"Lucy corpus: {report['lucy_items']} items, {report['not_imported']['count']} not in the table"
+              + (f" (e.g. {', '.join(map(str, report['not_imported']['samples']))})"
+                 if report['not_imported']['count'] else ''))
+    print()
+    for name, result in report['rules'].items():
+        count = result['count']
+        pct = count / rows * 100 if rows else 0.0
+        fixable = f", {result['in_lucy']} in Lucy" if 'lucy_items' in report and name != 'missing_from_lucy' else ''
+        print(f"[{result['severity']:7s}] {name:22s} {count:7d} ({pct:5.1f}%{fixable})  {result['description']}")
+        if result['keys']:
+            worst = sorted(result['keys'].items(), key=lambda kv: -kv[1])[:8]
+            print(f"            columns: {', '.join(f'{c} {n}' for c, n in worst)}")
+        for item_id, item_name, detail in result['samples']:
+            print(f"            {item_id:7d} {str(item_name or '')[:36]:36s} {detail[:80]}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate every raw_item_data row against the data-quality rules')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path')
+    parser.add_argument('--lucy', default=LUCY_DIR, help='Lucy directory or .lpak archive (missing_from_lucy)')
+    parser.add_argument('--no-lucy', action='store_true', help='Skip the Lucy coverage checks')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes (1 = in this process)')
+    parser.add_argument('--rules', nargs='+', choices=list(RULES), help='Only these rules (default all)')
+    parser.add_argument('--samples', type=int, default=SAMPLES, help='Example rows kept per rule')
+    parser.add_argument('--json', metavar='FILE', help='Also write the report as JSON')
+    args = parser.parse_args()
+
+    with instrument.run('validate_items', db_path=args.db, args=vars(args)):
+        lucy_ids = None
+        if not args.no_lucy:
+            with instrument.phase('lucy_listing'):
+                if os.path.exists(args.lucy):
+                    lucy = open_lucy(args.lucy)
+                    lucy_ids = set(lucy.ids())
+                    lucy.close()
+                else:
+                    print(f"Lucy corpus {args.lucy} not found - skipping coverage checks")
+        with instrument.phase('validate'):
+            start = time.perf_counter()
+            report = validate(args.db, args.rules, lucy_ids, max(1, args.workers), args.samples)
+            report['seconds'] = round(time.perf_counter() - start, 3)
+        print_report(report)
+        print(f"\n{report['rows']} rows in {report['seconds']:.2f}s")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    if any(r['count'] and r['severity'] == 'error' for r in report['rules'].values()):
+        sys.exit(1)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Ranked weapon ladders per class and level band
+
+calculate_mainhand_efficiency / calculate_offhand_efficiency (with
+calculate_damage_bonus_at_level) in check_upgrades.lua are evaluated one
+weapon at a time during an upgrade check. This applies the same formulas
+(upgrade_scoring.weapon_efficiency) to every weapon in raw_item_data for
+every class at once and writes the ranking to weapon_ladder:
+
+    weapon_ladder(class, level_band, hand, category, rank, item_id,
+                  damage, delay, efficiency, score)
+
+    hand      main (slot 13), off (slot 14), ranged (slot 11)
+    category  1h, 2h, ranged - 2H weapons (itemtype 1/4) never share a
+              ladder with 1H ones; other one-handed damage items
+              (1H slash, hand to hand) rank as 1h
+    rank      by efficiency, then by calculate_stat_score for the slot
+
+Like best_in_slot, a band holds the weapons with reqlevel <= level_band
+that the class can use; the damage bonus is the fixed level 70 value the
+Lua uses, so the level only decides which weapons are allowed.
+
+Usage:
+    python weapon_ladder.py [--db PATH | --snapshot FILE] [--top N]
+    python weapon_ladder.py --show Rogue 90 [--hand main] [--category 1h] [--than ITEM_ID]
+"""
+
+import time
+import sqlite3
+import argparse
+
+import numpy as np
+
+from item_rules import CLASS_NAMES, TWO_HANDED_ITEMTYPES, MAIN_HAND, OFF_HAND, normalize_class
+from linkdb import resolve_db_path
+from stat_snapshot import StatSnapshot
+from upgrade_scoring import (DB_PATH, LEVEL_BANDS, band_for_level, load_stat_arrays, class_eligibility,
+                             base_scores, slot_scores, weapon_efficiency)
+
+RANGED = 11
+RANGED_ITEMTYPE = 5
+TOP_N = 20
+
+# hand -> (slot, categories ranked in it)
+HANDS = {
+    'main': (MAIN_HAND, ['1h', '2h']),
+    'off': (OFF_HAND, ['1h']),
+    'ranged': (RANGED, ['ranged']),
+}
+
+def weapon_categories(stats):
+    """1h / 2h / ranged per item (get_weapon_category, other damage items as 1h)"""
+    itemtype = stats['itemtype']
+    return np.where(np.isin(itemtype, list(TWO_HANDED_ITEMTYPES)), '2h',
+                    np.where((itemtype == RANGED_ITEMTYPE) | (((stats['slots'] & (1 << RANGED)) != 0)
+                             & ((stats['slots'] & ((1 << MAIN_HAND) | (1 << OFF_HAND))) == 0)), 'ranged', '1h'))
+
+def weapons_only(ids, stats):
+    weapon = (stats['damage'] > 0) & (stats['delay'] > 0)
+    return ids[weapon], {c: np.asarray(v)[weapon] for c, v in stats.items()}
+
+def compute_ladders(ids, stats, top_n=TOP_N, bands=LEVEL_BANDS):
+    """Rows of (class, level_band, hand, category, rank, item_id, damage, delay, efficiency, score)"""
+    eligible = class_eligibility(stats)
+    category = weapon_categories(stats)
+    base = base_scores(stats)
+    reqlevel = stats['reqlevel']
+    rows = []
+
+    for hand, (slot, categories) in HANDS.items():
+        in_slot = (stats['slots'] & (1 << slot)) != 0
+        efficiency = weapon_efficiency(stats, slot)
+        scores = slot_scores(stats, slot, base)
+        for cat in categories:
+            in_ladder = in_slot & (category == cat)
+            for ci, char_class in enumerate(CLASS_NAMES):
+                candidates = np.flatnonzero(in_ladder & eligible[:, ci])
+                if len(candidates) == 0:
+                    continue
+                # lexsort: last key is primary
+                order = candidates[np.lexsort((-scores[candidates, ci], -efficiency[candidates, ci]))]
+                order_req = reqlevel[order]
+                for band in bands:
+                    top = order[order_req <= band][:top_n]
+                    for rank, i in enumerate(top, 1):
+                        rows.append((char_class, band, hand, cat, rank, int(ids[i]), int(stats['damage'][i]),
+                                     int(stats['delay'][i]), float(efficiency[i, ci]), float(scores[i, ci])))
+    return rows
+
+def write_ladders(conn, rows):
+    conn.execute('DROP TABLE IF EXISTS weapon_ladder')
+    conn.execute('''
+        CREATE TABLE weapon_ladder (
+            class TEXT NOT NULL,
+            level_band INTEGER NOT NULL,
+            hand TEXT NOT NULL,
+            category TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            damage INTEGER NOT NULL,
+            delay INTEGER NOT NULL,
+            efficiency REAL NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (class, level_band, hand, category, rank)
+        ) WITHOUT ROWID''')
+    conn.executemany('INSERT INTO weapon_ladder VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+
+def top_weapons(conn, char_class, level, hand='main', category=None, limit=TOP_N, above=None):
+    """[(category, rank, item_id, damage, delay, efficiency, score)] for a character's level
+
+    Without a category the hand's ladders are merged by efficiency; above
+    keeps only weapons more efficient than that value.
+    """
+    sql = ('SELECT category, rank, item_id, damage, delay, efficiency, score FROM weapon_ladder '
+           'WHERE class = ? AND level_band = ? AND hand = ?')
+    params = [normalize_class(char_class), band_for_level(level), hand]
+    if category:
+        sql += ' AND category = ?'
+        params.append(category)
+    if above is not None:
+        sql += ' AND efficiency > ?'
+        params.append(above)
+    sql += ' ORDER BY efficiency DESC, score DESC LIMIT ?'
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+def item_efficiency(conn, item_id, char_class, hand='main'):
+    """(category, efficiency) of one weapon for a class, as the ladder computes it"""
+    _, stats = load_stat_arrays(conn, f'id = {int(item_id)}')
+    if not len(stats['damage']):
+        return None, 0.0
+    slot = HANDS[hand][0]
+    return str(weapon_categories(stats)[0]), float(weapon_efficiency(stats, slot, [normalize_class(char_class)])[0, 0])
+
+def build(conn, ids, stats, top_n=TOP_N):
+    start = time.perf_counter()
+    ids, stats = weapons_only(ids, stats)
+    rows = compute_ladders(ids, stats, top_n)
+    ranked = time.perf_counter()
+    print(f"Ranked {len(ids)} weapons x {len(CLASS_NAMES)} classes x {len(LEVEL_BANDS)} bands in {ranked - start:.2f}s")
+    write_ladders(conn, rows)
+    print(f"Wrote {len(rows)} weapon_ladder rows in {time.perf_counter() - ranked:.2f}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute weapon efficiency ladders')
+    parser.add_argument('--db', default=DB_PATH, help='MQ2LinkDB.db path (the ladder is written here)')
+    parser.add_argument('--snapshot', help='Read stats from a stat_snapshot.py file instead of raw_item_data')
+    parser.add_argument('--top', type=int, default=TOP_N, help='Weapons kept per class/band/hand/category')
+    parser.add_argument('--show', nargs=2, metavar=('CLASS', 'LEVEL'), help='Print the ladder for a class and level')
+    parser.add_argument('--hand', choices=list(HANDS), default='main')
+    parser.add_argument('--category', choices=['1h', '2h', 'ranged'])
+    parser.add_argument('--than', type=int, metavar='ITEM_ID', help='Only weapons better than this one (--show)')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(resolve_db_path(args.db))
+    if args.show:
+        char_class, level = args.show[0], int(args.show[1])
+        above = None
+        if args.than:
+            # Compare like with like, as are_items_comparable does
+            category, above = item_efficiency(conn, args.than, char_class, args.hand)
+            args.category = args.category or category
+        title = f"Best {' '.join(filter(None, [args.hand, args.category]))} weapons for level {level} {char_class} (band {band_for_level(level)})"
+        if args.than:
+            title += f" better than {args.than} ({above:.1f})"
+        print(title + ':')
+        for category, rank, item_id, damage, delay, efficiency, score in top_weapons(
+                conn, char_class, level, args.hand, args.category, args.top, above):
+            name = conn.execute('SELECT name FROM raw_item_data WHERE id = ?', (item_id,)).fetchone()
+            print(f"  {category:6s} {rank:2d}. {item_id:7d} {name[0] if name else '?':40s} "
+                  f"{damage:3d}/{delay:<3d} {efficiency:8.1f} {score:9.1f}")
+    else:
+        start = time.perf_counter()
+        if args.snapshot:
+            ids, stats = StatSnapshot(args.snapshot).stat_arrays()
+        else:
+            ids, stats = load_stat_arrays(conn, 'CAST(damage AS INTEGER) > 0 AND CAST(delay AS INTEGER) > 0')
+        print(f"Loaded stats in {time.perf_counter() - start:.2f}s")
+        build(conn, ids, stats, args.top)
+    conn.close()
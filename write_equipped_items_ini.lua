@@ -33,9 +33,50 @@ for slot = 0, 22 do
     end
 end
 
--- Create section for equipped items
+-- Class and level let upgrade_plan.py score this character offline;
+-- Updated is the snapshot time for equipment_store.py
+local character_data = {
+    Name = char_name,
+    Class = mq.TLO.Me.Class.Name(),
+    Level = mq.TLO.Me.Level(),
+    Updated = os.time(),
+}
+
+-- Tradeable equipment in the pack slots and inside bags (same filter as
+-- get_tradeable_inventory_items: not NO TRADE, wearable, not an augment)
+local tradeable_data = {}
+local tradeable_count = 0
+
+local function add_tradeable(item)
+    if not item or not item.ID() or (tonumber(item.ID()) or 0) == 0 then
+        return
+    end
+    local notrade = item.NoTrade()
+    if notrade == true or (tonumber(notrade) or 0) ~= 0 then
+        return
+    end
+    if (tonumber(item.WornSlots()) or 0) == 0 or (tonumber(item.AugType()) or 0) > 0 then
+        return
+    end
+    tradeable_count = tradeable_count + 1
+    tradeable_data[string.format('Item_%d', tradeable_count)] = string.format('%d|%s', item.ID(), item.Name())
+end
+
+for slot = 23, 34 do
+    local item = mq.TLO.Me.Inventory(slot)
+    if item and item.ID() then
+        add_tradeable(item)
+        for j = 1, tonumber(item.Container()) or 0 do
+            add_tradeable(item.Item(j))
+        end
+    end
+end
+
+-- Create sections for character info, equipped and tradeable items
 local ini_table = {
-    Equipped = equipped_data
+    Character = character_data,
+    Equipped = equipped_data,
+    Tradeable = tradeable_data
 }
 
 -- Write to INI using LIP
@@ -44,7 +85,7 @@ local success = LIP.save(path, ini_table)
 if success then
     local count = 0
     for _ in pairs(equipped_data) do count = count + 1 end
-    mq.cmdf('/echo [YALM2] ✓ Successfully wrote %d equipped items to: %s', count, path)
+    mq.cmdf('/echo [YALM2] ✓ Successfully wrote %d equipped and %d tradeable items to: %s', count, tradeable_count, path)
 else
     mq.cmdf('/echo [YALM2] ✗ ERROR: Failed to write INI file to: %s', path)
 end